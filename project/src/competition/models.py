@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import BaseUserManager
 from django.contrib.auth import get_user_model
+from src.connect.models import Connection
 from src.notifications.models import Device
 
 User = get_user_model()
@@ -16,17 +17,26 @@ class CollegeCompetitionUserManager(BaseUserManager):
             social_count=models.Count('social_auth'),
             friendthem_points=models.Count(
                 'connection_user_1__user_2',
-                filter=models.Q(connection_user_1__user_2=FRIENDTHEM_USER_ID),
+                filter=models.Q(
+                    connection_user_1__user_2=FRIENDTHEM_USER_ID,
+                    connection_user_1__status=Connection.DONE
+                ),
                 distinct=True
             ),
             fraternity_points=models.Count(
                 'connection_user_1__user_2',
-                filter=models.Q(connection_user_1__user_2__in=FRATERNITY_USER_IDS),
+                filter=models.Q(
+                    connection_user_1__user_2__in=FRATERNITY_USER_IDS,
+                    connection_user_1__status=Connection.DONE
+                ),
                 distinct=True
             ),
             sorority_points=models.Count(
                 'connection_user_1__user_2',
-                filter=models.Q(connection_user_1__user_2__in=SORORITY_USER_IDS),
+                filter=models.Q(
+                    connection_user_1__user_2__in=SORORITY_USER_IDS,
+                    connection_user_1__status=Connection.DONE
+                ),
                 distinct=True
             ),
             social_sync_points=models.Case(
@@ -54,8 +64,16 @@ class CompetitionUserManager(BaseUserManager):
         qs = super(CompetitionUserManager, self).get_queryset()
         qs = qs.annotate(
             social_count=models.Count('social_auth'),
-            received_connections=models.Count('connection_user_2__user_1', distinct=True),
-            sent_connections=models.Count('connection_user_1__user_2', distinct=True),
+            received_connections=models.Count(
+                'connection_user_2__user_1',
+                filter=models.Q(connection_user_2__status=Connection.DONE),
+                distinct=True
+            ),
+            sent_connections=models.Count(
+                'connection_user_1__user_2',
+                filter=models.Q(connection_user_1__status=Connection.DONE),
+                distinct=True
+            ),
             invite_count=models.Count(
                 'invite__device_id',
                 filter=models.Q(
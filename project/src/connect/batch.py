@@ -0,0 +1,170 @@
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from social_django.models import UserSocialAuth
+
+from src.connect.models import Connection
+from src.connect.tasks import follow_connection, get_connect_class
+from src.notifications.models import Notification
+from src.notifications.services import notify_user
+
+logger = logging.getLogger(__name__)
+
+
+def batch_connect(user, items):
+    '''
+    Connects `user` with many (other_user, provider) pairs at once and
+    returns one result per pair, in order.
+
+    Each provider client is authenticated once and every social account is
+    looked up in a single query, so the worker threads only do the provider
+    follows. Clients that aren't thread safe run their follows serially.
+    Edges are written with one bulk upsert per provider and each other user
+    gets a single notification listing all the new providers, queued in the
+    same transaction as the edges.
+    With CONNECT_ASYNC the follows are queued instead, as for `connect/`.
+    '''
+    items = list(OrderedDict.fromkeys(items))
+    results = OrderedDict(
+        ((other_user.id, provider), {
+            'user_2': other_user.id, 'provider': provider, 'confirmed': False,
+            'status': Connection.FAILED, 'error': '', 'notified': False,
+            'notification_status': None,
+        })
+        for other_user, provider in items
+    )
+
+    existing = Connection.objects.filter(
+        user_1=user, user_2__in=[other_user for other_user, _ in items]
+    ).exclude(status=Connection.FAILED).values_list('user_2_id', 'provider', 'confirmed', 'status')
+    for other_user_id, provider, confirmed, status in existing:
+        result = results.get((other_user_id, provider))
+        if result is not None:
+            result.update(confirmed=confirmed, status=status, error='Connection already exists.')
+
+    pending = [
+        (other_user, provider) for other_user, provider in items
+        if not results[(other_user.id, provider)]['error']
+    ]
+    if settings.CONNECT_ASYNC:
+        confirmed = dict.fromkeys(pending, False)
+    else:
+        confirmed = _follow(user, pending, results)
+
+    with transaction.atomic():
+        created = _write(user, confirmed, results)
+        _notify(user, created, results)
+    return list(results.values())
+
+
+def _follow(user, items, results):
+    '''Returns {(other_user, provider): confirmed} for the successful follows.'''
+    by_provider = OrderedDict()
+    for other_user, provider in items:
+        by_provider.setdefault(provider, []).append(other_user)
+
+    connects = {}
+    for provider in list(by_provider):
+        try:
+            connects[provider] = get_connect_class(provider)(user)
+        except Exception as err:
+            for other_user in by_provider.pop(provider):
+                results[(other_user.id, provider)]['error'] = getattr(err, 'message', str(err))
+
+    social_providers = [connect.social_provider for connect in connects.values() if connect.social_provider]
+    social_auths = {}
+    for social_auth in UserSocialAuth.objects.filter(
+        user__in=[other_user for other_user, _ in items], provider__in=social_providers
+    ):
+        social_auths.setdefault((social_auth.user_id, social_auth.provider), social_auth)
+
+    follows = []
+    for provider, other_users in by_provider.items():
+        connect = connects[provider]
+        for other_user in other_users:
+            try:
+                target = connect.get_target(
+                    other_user, social_auths.get((other_user.id, connect.social_provider))
+                )
+            except Exception as err:
+                results[(other_user.id, provider)]['error'] = getattr(err, 'message', str(err))
+            else:
+                follows.append((other_user, provider, target))
+
+    if not follows:
+        return {}
+
+    def follow(item):
+        other_user, provider, target = item
+        try:
+            return connects[provider].follow(target), None
+        except Exception as err:
+            logger.info('Follow of %s on %s failed.', other_user.id, provider, exc_info=True)
+            return None, getattr(err, 'message', str(err))
+
+    # A client that isn't thread safe gets one job running all its follows
+    # in order, so it's never used by two workers at once.
+    jobs, serial = [], OrderedDict()
+    for item in follows:
+        if connects[item[1]].thread_safe:
+            jobs.append([item])
+        else:
+            serial.setdefault(item[1], []).append(item)
+    jobs += serial.values()
+
+    workers = min(settings.CONNECT_BATCH_WORKERS, len(jobs))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        done = list(executor.map(lambda job: [(item, follow(item)) for item in job], jobs))
+
+    confirmed = OrderedDict()
+    for job in done:
+        for (other_user, provider, _), (is_confirmed, error) in job:
+            if error is None:
+                confirmed[(other_user, provider)] = bool(is_confirmed)
+            else:
+                results[(other_user.id, provider)]['error'] = error
+    return confirmed
+
+
+def _write(user, confirmed, results):
+    '''Stores the connections; returns {other_user: [providers]} of the new ones.'''
+    status = Connection.PENDING if settings.CONNECT_ASYNC else Connection.DONE
+    groups = OrderedDict()
+    for (other_user, provider), is_confirmed in confirmed.items():
+        groups.setdefault((provider, is_confirmed), []).append(other_user)
+
+    created_by_user = OrderedDict()
+    for (provider, is_confirmed), other_users in groups.items():
+        created, updated = Connection.objects.bulk_connect(
+            user, [other_user.id for other_user in other_users], provider,
+            confirmed=is_confirmed, status=status
+        )
+        other_users = {other_user.id: other_user for other_user in other_users}
+        for instance in created + updated:
+            results[(instance.user_2_id, provider)].update(
+                confirmed=is_confirmed, status=status
+            )
+            if status == Connection.PENDING:
+                follow_connection.enqueue(instance.id)
+        for instance in created:
+            created_by_user.setdefault(other_users[instance.user_2_id], []).append(provider)
+    return created_by_user
+
+
+def _notify(user, created, results):
+    names = dict(Connection.PROVIDER_CHOICES)
+    for other_user, providers in created.items():
+        msg = '{} wants to connect with you on {}. Would you like to return?'.format(
+            user.get_full_name(), ', '.join(names[provider] for provider in providers)
+        )
+        status = notify_user(user, other_user, msg)
+        for provider in providers:
+            results[(other_user.id, provider)].update(
+                notified=status in (
+                    Notification.QUEUED, Notification.SENDING, Notification.SENT
+                ),
+                notification_status=status
+            )
@@ -10,3 +10,9 @@ class SocialUserNotFound(Exception):
             user.id, provider
         )
 
+
+class FriendListError(Exception):
+    def __init__(self, provider, error):
+        self.message = 'Could not read the friend list from provider "{}": {}'.format(
+            provider, error
+        )
@@ -0,0 +1,68 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+POPULATE_CONNECTION_STATS = '''
+INSERT INTO connect_connectionstats (
+    user_id, other_user_id, sent_count, received_count, category,
+    user_social_count, other_social_count
+)
+SELECT
+    pairs.user_id, pairs.other_user_id, pairs.sent_count, pairs.received_count,
+    CASE
+        WHEN pairs.sent_count >= 1 AND pairs.received_count = 0 THEN 1
+        WHEN pairs.received_count >= 1 AND pairs.sent_count = 0 THEN 2
+        WHEN pairs.sent_count >= 1 AND pairs.received_count >= 1 THEN 3
+        ELSE 0
+    END,
+    (SELECT COUNT(*) FROM social_auth_usersocialauth WHERE user_id = pairs.user_id),
+    (SELECT COUNT(*) FROM social_auth_usersocialauth WHERE user_id = pairs.other_user_id)
+FROM (
+    SELECT edges.user_id, edges.other_user_id,
+           SUM(edges.sent_count) AS sent_count,
+           SUM(edges.received_count) AS received_count
+    FROM (
+        SELECT user_1_id AS user_id, user_2_id AS other_user_id,
+               COUNT(*) AS sent_count, 0 AS received_count
+        FROM connect_connection GROUP BY user_1_id, user_2_id
+        UNION ALL
+        SELECT user_2_id AS user_id, user_1_id AS other_user_id,
+               0 AS sent_count, COUNT(*) AS received_count
+        FROM connect_connection GROUP BY user_2_id, user_1_id
+    ) edges
+    GROUP BY edges.user_id, edges.other_user_id
+) pairs;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_django', '0008_partial_timestamp'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('connect', '0005_auto_20180511_1919'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConnectionStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sent_count', models.IntegerField(default=0)),
+                ('received_count', models.IntegerField(default=0)),
+                ('category', models.IntegerField(default=0)),
+                ('user_social_count', models.IntegerField(default=0)),
+                ('other_social_count', models.IntegerField(default=0)),
+                ('other_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='connection_stats_other', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='connection_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='connectionstats',
+            unique_together={('user', 'other_user')},
+        ),
+        migrations.RunSQL(POPULATE_CONNECTION_STATS, migrations.RunSQL.noop),
+    ]
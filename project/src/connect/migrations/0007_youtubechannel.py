@@ -0,0 +1,43 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_youtube_channels(apps, schema_editor):
+    UserSocialAuth = apps.get_model('social_django', 'UserSocialAuth')
+    YoutubeChannel = apps.get_model('connect', 'YoutubeChannel')
+
+    channels = []
+    social_auths = UserSocialAuth.objects.filter(provider='google-oauth2').iterator()
+    for social_auth in social_auths:
+        channel_id = (social_auth.extra_data or {}).get('youtube_channel')
+        if channel_id:
+            channels.append(YoutubeChannel(
+                social_auth_id=social_auth.id, user_id=social_auth.user_id,
+                channel_id=channel_id
+            ))
+    YoutubeChannel.objects.bulk_create(channels, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_django', '0008_partial_timestamp'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('connect', '0006_connectionstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YoutubeChannel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel_id', models.CharField(db_index=True, max_length=64)),
+                ('social_auth', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='youtube_channel', to='social_django.UserSocialAuth')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='youtube_channels', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(populate_youtube_channels, migrations.RunPython.noop),
+    ]
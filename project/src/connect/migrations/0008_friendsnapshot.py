@@ -0,0 +1,31 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.conf import settings
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('connect', '0007_youtubechannel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FriendSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('facebook', 'Facebook'), ('instagram', 'Instagram'), ('linkedin', 'Linkedin'), ('youtube', 'Youtube'), ('twitter', 'Twitter'), ('snapchat', 'Snapchat')], max_length=10)),
+                ('friend_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None)),
+                ('synced_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friend_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='friendsnapshot',
+            unique_together={('user', 'provider')},
+        ),
+    ]
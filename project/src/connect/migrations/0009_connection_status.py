@@ -0,0 +1,23 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('connect', '0008_friendsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='connection',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='done', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='connection',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.db import migrations
+
+# Pending and failed connections used to be counted like done ones.
+RECOUNT_CONNECTION_STATS = '''
+UPDATE connect_connectionstats stats SET
+    sent_count = counts.sent_count,
+    received_count = counts.received_count,
+    category = CASE
+        WHEN counts.sent_count >= 1 AND counts.received_count = 0 THEN 1
+        WHEN counts.received_count >= 1 AND counts.sent_count = 0 THEN 2
+        WHEN counts.sent_count >= 1 AND counts.received_count >= 1 THEN 3
+        ELSE 0
+    END
+FROM (
+    SELECT pairs.user_id, pairs.other_user_id,
+        (SELECT COUNT(*) FROM connect_connection
+         WHERE user_1_id = pairs.user_id AND user_2_id = pairs.other_user_id
+            AND status = 'done') AS sent_count,
+        (SELECT COUNT(*) FROM connect_connection
+         WHERE user_1_id = pairs.other_user_id AND user_2_id = pairs.user_id
+            AND status = 'done') AS received_count
+    FROM (
+        SELECT user_1_id AS user_id, user_2_id AS other_user_id
+        FROM connect_connection WHERE status <> 'done'
+        UNION
+        SELECT user_2_id AS user_id, user_1_id AS other_user_id
+        FROM connect_connection WHERE status <> 'done'
+    ) pairs
+) counts
+WHERE stats.user_id = counts.user_id AND stats.other_user_id = counts.other_user_id;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('connect', '0009_connection_status'),
+    ]
+
+    operations = [
+        migrations.RunSQL(RECOUNT_CONNECTION_STATS, migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,71 @@
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection, models
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from social_django.models import UserSocialAuth
+
+from src.core_auth.models import UserQuerySet
+
+class ConnectionManager(models.Manager):
+    def done(self):
+        '''Connections whose follow went through; pending and failed ones aren't real yet.'''
+        return self.filter(status=self.model.DONE)
+
+    def bulk_connect(self, user, other_user_ids, provider, confirmed=True, status=None):
+        '''
+        Inserts the (user, other_user, provider) connections for all
+        `other_user_ids` in a single statement, relying on the unique_together
+        constraint; existing ones get the new `confirmed` and `status`.
+        Returns (created, updated) lists.
+        Bypasses the save signals, so the connection stats are recorded here
+        for the rows that became, or stopped being, done.
+        '''
+        other_user_ids = sorted(set(other_user_ids))
+        if not other_user_ids:
+            return [], []
+
+        status = status or self.model.DONE
+        table = self.model._meta.db_table
+        sql = f'''
+            WITH previous AS (
+                SELECT user_2_id, status FROM {table}
+                WHERE user_1_id = %s AND provider = %s AND user_2_id = ANY(%s::integer[])
+            ), upserted AS (
+                INSERT INTO {table} (user_1_id, user_2_id, provider, confirmed, status, error)
+                SELECT %s, other_user_id, %s, %s, %s, ''
+                FROM unnest(%s::integer[]) AS other_user_id
+                ON CONFLICT (user_1_id, user_2_id, provider) DO UPDATE SET
+                    confirmed = EXCLUDED.confirmed, status = EXCLUDED.status, error = ''
+                RETURNING id, user_2_id, (xmax = 0) AS inserted
+            )
+            SELECT upserted.id, upserted.user_2_id, upserted.inserted, previous.status
+            FROM upserted LEFT JOIN previous USING (user_2_id)
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                user.id, provider, other_user_ids,
+                user.id, provider, confirmed, status, other_user_ids
+            ])
+            rows = cursor.fetchall()
+
+        created, updated, counted, uncounted = [], [], [], []
+        for connection_id, other_user_id, inserted, previous_status in rows:
+            instance = self.model(
+                id=connection_id, user_1_id=user.id, user_2_id=other_user_id,
+                provider=provider, confirmed=confirmed, status=status
+            )
+            (created if inserted else updated).append(instance)
+            was_done = previous_status == self.model.DONE
+            if status == self.model.DONE and not was_done:
+                counted.append((user.id, other_user_id))
+            elif status != self.model.DONE and was_done:
+                uncounted.append((user.id, other_user_id))
+
+        ConnectionStats.objects.record_many(counted)
+        ConnectionStats.objects.record_many(uncounted, -1)
+        return created, updated
+
 
 class Connection(models.Model):
     FACEBOOK = 'facebook'
@@ -9,6 +75,16 @@ class Connection(models.Model):
     YOUTUBE = 'youtube'
     SNAPCHAT = 'snapchat'
 
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
     PROVIDER_CHOICES = (
         (FACEBOOK, 'Facebook'),
         (INSTAGRAM, 'Instagram'),
@@ -30,6 +106,229 @@ class Connection(models.Model):
     )
     provider = models.CharField(max_length=10, choices=PROVIDER_CHOICES)
     confirmed = models.BooleanField(default=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=DONE)
+    error = models.TextField(blank=True)
+
+    objects = ConnectionManager()
 
     class Meta:
         unique_together = ('user_1', 'user_2', 'provider')
+
+
+class ConnectionStatsManager(models.Manager):
+    def record(self, user_1_id, user_2_id, delta=1):
+        '''
+        Applies `delta` connections from user_1 to user_2 on both sides of
+        the pair: the sent count of (user_1, user_2) and the received count
+        of (user_2, user_1).
+        '''
+        self.record_many([(user_1_id, user_2_id)], delta)
+
+    def record_many(self, pairs, delta=1):
+        counts = {}
+        for user_1_id, user_2_id in pairs:
+            counts.setdefault((user_1_id, user_2_id), [0, 0])[0] += delta
+            counts.setdefault((user_2_id, user_1_id), [0, 0])[1] += delta
+
+        if not counts:
+            return
+
+        if delta < 0:
+            self._decrement(counts)
+        else:
+            self._increment(counts)
+
+    def update_social_count(self, user_id):
+        count = UserSocialAuth.objects.filter(user_id=user_id).count()
+        self.filter(user_id=user_id).update(user_social_count=count)
+        self.filter(other_user_id=user_id).update(other_social_count=count)
+
+    def _increment(self, counts):
+        params = []
+        for (user_id, other_user_id), (sent, received) in counts.items():
+            params += [
+                user_id, other_user_id, sent, received,
+                self.model.get_category(sent, received)
+            ]
+
+        table = self.model._meta.db_table
+        social_table = UserSocialAuth._meta.db_table
+        sent = f'{table}.sent_count + EXCLUDED.sent_count'
+        received = f'{table}.received_count + EXCLUDED.received_count'
+        values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(counts))
+        sql = f'''
+            INSERT INTO {table} (
+                user_id, other_user_id, sent_count, received_count, category,
+                user_social_count, other_social_count
+            )
+            SELECT
+                delta.user_id, delta.other_user_id, delta.sent_count,
+                delta.received_count, delta.category,
+                (SELECT COUNT(*) FROM {social_table} WHERE user_id = delta.user_id),
+                (SELECT COUNT(*) FROM {social_table} WHERE user_id = delta.other_user_id)
+            FROM (VALUES {values}) AS delta (
+                user_id, other_user_id, sent_count, received_count, category
+            )
+            ON CONFLICT (user_id, other_user_id) DO UPDATE SET
+                sent_count = {sent},
+                received_count = {received},
+                category = {self.model.category_sql(sent, received)}
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def _decrement(self, counts):
+        # Only existing rows are touched: deletes may come from a user
+        # cascade, where inserting would reference a user being removed.
+        params = []
+        for (user_id, other_user_id), (sent, received) in counts.items():
+            params += [user_id, other_user_id, sent, received]
+
+        table = self.model._meta.db_table
+        sent = f'GREATEST({table}.sent_count + delta.sent_count, 0)'
+        received = f'GREATEST({table}.received_count + delta.received_count, 0)'
+        values = ', '.join(['(%s, %s, %s, %s)'] * len(counts))
+        sql = f'''
+            UPDATE {table} SET
+                sent_count = {sent},
+                received_count = {received},
+                category = {self.model.category_sql(sent, received)}
+            FROM (VALUES {values}) AS delta (user_id, other_user_id, sent_count, received_count)
+            WHERE {table}.user_id = delta.user_id
+                AND {table}.other_user_id = delta.other_user_id
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+class ConnectionStats(models.Model):
+    '''
+    Materialized connection counts between two users, seen from `user`:
+    how many connections `user` sent to `other_user` and received from them,
+    plus both users' social profile counts. Maintained incrementally from
+    Connection and UserSocialAuth changes so listing users with their
+    connection percentage is a plain join.
+    '''
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='connection_stats',
+        on_delete=models.CASCADE
+    )
+    other_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='connection_stats_other',
+        on_delete=models.CASCADE
+    )
+    sent_count = models.IntegerField(default=0)
+    received_count = models.IntegerField(default=0)
+    category = models.IntegerField(default=UserQuerySet.NOTHING)
+    user_social_count = models.IntegerField(default=0)
+    other_social_count = models.IntegerField(default=0)
+
+    objects = ConnectionStatsManager()
+
+    class Meta:
+        unique_together = ('user', 'other_user')
+
+    @staticmethod
+    def get_category(sent, received):
+        if sent >= 1 and received <= 0:
+            return UserQuerySet.SENT
+        if received >= 1 and sent <= 0:
+            return UserQuerySet.RECEIVED
+        if sent >= 1 and received >= 1:
+            return UserQuerySet.BOTH
+        return UserQuerySet.NOTHING
+
+    @staticmethod
+    def category_sql(sent, received):
+        return f'''CASE
+            WHEN {sent} >= 1 AND {received} = 0 THEN {UserQuerySet.SENT}
+            WHEN {received} >= 1 AND {sent} = 0 THEN {UserQuerySet.RECEIVED}
+            WHEN {sent} >= 1 AND {received} >= 1 THEN {UserQuerySet.BOTH}
+            ELSE {UserQuerySet.NOTHING}
+        END'''
+
+
+class YoutubeChannel(models.Model):
+    '''
+    Indexed copy of the `youtube_channel` stored in google-oauth2 extra_data,
+    kept in sync on save, so subscriptions can be matched with an IN lookup.
+    '''
+    social_auth = models.OneToOneField(
+        UserSocialAuth,
+        related_name='youtube_channel',
+        on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='youtube_channels',
+        on_delete=models.CASCADE
+    )
+    channel_id = models.CharField(max_length=64, db_index=True)
+
+
+class FriendSnapshot(models.Model):
+    '''
+    The app users found in a user's provider friend list at the last sync,
+    as a sorted id array, so the next sync only writes the difference.
+    '''
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='friend_snapshots',
+        on_delete=models.CASCADE
+    )
+    provider = models.CharField(max_length=10, choices=Connection.PROVIDER_CHOICES)
+    friend_ids = ArrayField(models.IntegerField(), default=list)
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'provider')
+
+
+# Only done connections are counted: pending ones may still fail, and
+# failed ones are kept just so their error can be read.
+@receiver(pre_save, sender=Connection, dispatch_uid='connection_stats_before_save')
+def remember_connection_status(sender, instance, **kwargs):
+    instance._was_done = bool(instance.pk) and Connection.objects.done().filter(
+        pk=instance.pk
+    ).exists()
+
+
+@receiver(post_save, sender=Connection, dispatch_uid='connection_stats_on_save')
+def add_connection_to_stats(sender, instance, created, **kwargs):
+    is_done = instance.status == Connection.DONE
+    if is_done != instance._was_done:
+        ConnectionStats.objects.record(instance.user_1_id, instance.user_2_id, 1 if is_done else -1)
+
+
+@receiver(post_delete, sender=Connection, dispatch_uid='connection_stats_on_delete')
+def remove_connection_from_stats(sender, instance, **kwargs):
+    if instance.status == Connection.DONE:
+        ConnectionStats.objects.record(instance.user_1_id, instance.user_2_id, -1)
+
+
+@receiver(post_save, sender=UserSocialAuth, dispatch_uid='connection_stats_social_on_save')
+def add_social_auth_to_stats(sender, instance, created, **kwargs):
+    if created:
+        ConnectionStats.objects.update_social_count(instance.user_id)
+
+
+@receiver(post_delete, sender=UserSocialAuth, dispatch_uid='connection_stats_social_on_delete')
+def remove_social_auth_from_stats(sender, instance, **kwargs):
+    ConnectionStats.objects.update_social_count(instance.user_id)
+
+
+@receiver(post_save, sender=UserSocialAuth, dispatch_uid='sync_youtube_channel')
+def sync_youtube_channel(sender, instance, **kwargs):
+    if instance.provider != 'google-oauth2':
+        return
+
+    channel_id = (instance.extra_data or {}).get('youtube_channel')
+    if channel_id:
+        YoutubeChannel.objects.update_or_create(
+            social_auth=instance,
+            defaults={'user_id': instance.user_id, 'channel_id': channel_id}
+        )
+    else:
+        YoutubeChannel.objects.filter(social_auth=instance).delete()
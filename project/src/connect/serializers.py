@@ -1,14 +1,19 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from src.core_auth.serializers import (RetrieveUserSerializer,
                                        SocialProfileSerializer)
 from src.pictures.serializers import PictureSerializer
+from src.notifications.models import Notification
 from src.notifications.services import notify_user
 
 from src.core_auth.models import UserQuerySet
 from src.connect.models import Connection
 from src.connect import services
+from src.connect.tasks import follow_connection
 
 
 User = get_user_model()
@@ -18,10 +23,22 @@ class ConnectionSerializer(serializers.ModelSerializer):
     user_2_data = RetrieveUserSerializer(source='user_2', read_only=True)
     confirmed = serializers.BooleanField(read_only=True)
     notified = serializers.SerializerMethodField()
+    notification_status = serializers.SerializerMethodField()
 
     class Meta:
         model = Connection
-        fields = ('user_1', 'user_2', 'provider', 'confirmed', 'notified', 'user_2_data')
+        fields = (
+            'id', 'user_1', 'user_2', 'provider', 'confirmed', 'status',
+            'error', 'notified', 'notification_status', 'user_2_data',
+        )
+        read_only_fields = ('status', 'error')
+        # Failed connections don't count, so posting them again retries.
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Connection.objects.exclude(status=Connection.FAILED),
+                fields=('user_1', 'user_2', 'provider')
+            )
+        ]
 
     def _get_connect_class(self, provider):
         return getattr(
@@ -31,6 +48,11 @@ class ConnectionSerializer(serializers.ModelSerializer):
         )
 
     def validate(self, data):
+        if settings.CONNECT_ASYNC:
+            data['confirmed'] = False
+            data['status'] = Connection.PENDING
+            return data
+
         connect_class = self._get_connect_class(data['provider'])
         try:
             connect = connect_class(data['user_1'])
@@ -41,15 +63,54 @@ class ConnectionSerializer(serializers.ModelSerializer):
         data['confirmed'] = confirmed
         return data
 
-    def get_notified(self, obj):
+    def create(self, validated_data):
+        user_1, user_2 = validated_data['user_1'], validated_data['user_2']
         msg = '{} wants to connect with you. Would you like to return?'.format(
-            obj.user_1.get_full_name()
+            user_1.get_full_name()
         )
 
-        try:
-            return notify_user(obj.user_1, obj.user_2, msg)
-        except:
-            return False
+        with transaction.atomic():
+            Connection.objects.filter(
+                user_1=user_1, user_2=user_2,
+                provider=validated_data['provider'], status=Connection.FAILED
+            ).delete()
+            instance = super(ConnectionSerializer, self).create(validated_data)
+            instance.notification_status = notify_user(user_1, user_2, msg)
+            if instance.status == Connection.PENDING:
+                follow_connection.enqueue(instance.id)
+        return instance
+
+    def get_notified(self, obj):
+        return self.get_notification_status(obj) in (
+            Notification.QUEUED, Notification.SENDING, Notification.SENT
+        )
+
+    def get_notification_status(self, obj):
+        '''Push status of the notification queued when the connection was created.'''
+        return getattr(obj, 'notification_status', None)
+
+class BatchConnectionItemSerializer(serializers.Serializer):
+    user_2 = serializers.IntegerField()
+    provider = serializers.ChoiceField(choices=Connection.PROVIDER_CHOICES)
+
+class BatchConnectionSerializer(serializers.Serializer):
+    connections = BatchConnectionItemSerializer(many=True)
+
+    def validate_connections(self, value):
+        if not value:
+            raise serializers.ValidationError('No connections given.')
+        if len(value) > settings.CONNECT_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'At most {settings.CONNECT_BATCH_MAX_SIZE} connections can be sent at once.'
+            )
+
+        users = User.objects.in_bulk({item['user_2'] for item in value})
+        missing = sorted({item['user_2'] for item in value} - set(users))
+        if missing:
+            raise serializers.ValidationError(
+                'Users not found: {}.'.format(', '.join(map(str, missing)))
+            )
+        return [(users[item['user_2']], item['provider']) for item in value]
 
 class ConnectedUserSerializer(RetrieveUserSerializer):
     connection_percentage = serializers.SerializerMethodField()
@@ -1,4 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from social_django.models import UserSocialAuth
+
+from src.connect.exceptions import SocialUserNotFound
+from src.connect.models import Connection, FriendSnapshot
+
+
+def iter_chunks(pages, size):
+    for page in pages:
+        for start in range(0, len(page), size):
+            yield page[start:start + size]
+
+
 class BaseConnect(object):
+    social_provider = None
+    # Whether `follow` can be called from many threads on one instance.
+    thread_safe = False
+
     def __init__(self, user):
         self.user = user
         self.api = self._authenticate(self.user)
@@ -7,7 +27,80 @@ class BaseConnect(object):
         raise NotImplemented
 
     def connect(self, other_user):
+        '''Follows `other_user` on the provider; returns whether it's confirmed.'''
+        social_auth = None
+        if self.social_provider:
+            social_auth = other_user.social_auth.filter(provider=self.social_provider).first()
+        return self.follow(self.get_target(other_user, social_auth))
+
+    def get_target(self, other_user, social_auth):
+        '''
+        The provider id to follow for `other_user`, from their `social_auth`.
+        Only reads the database, so it's split from `follow`, which only
+        calls the provider API. Providers without follows have no target.
+        '''
+        if self.social_provider is None:
+            return None
+        if social_auth is None:
+            raise SocialUserNotFound(self.social_provider, other_user)
+        return social_auth.uid
+
+    def follow(self, target):
         raise NotImplemented
 
-    def connect_users(self):
+    def connect_users(self, force=False):
         raise NotImplemented
+
+    def connect_friend_pages(self, pages, provider, force=False):
+        '''
+        Syncs the user's connections with the app users among the provider
+        uids yielded by `pages`. Each page is matched in chunks of
+        CONNECT_FRIENDS_CHUNK_SIZE as it arrives, so memory stays flat
+        however long the friend list is.
+
+        Only the difference with the last sync's FriendSnapshot is written:
+        new friends are connected, known friends whose connection isn't done
+        and confirmed are connected again, and friends no longer in the list
+        are disconnected. Removals and the snapshot are only written once
+        every page was read, so a provider error raised from `pages` leaves
+        the existing connections alone. Syncs younger than
+        CONNECT_SYNC_INTERVAL seconds are skipped, unless `force` is set.
+        '''
+        snapshot = FriendSnapshot.objects.filter(user=self.user, provider=provider).first()
+        now = timezone.now()
+        if snapshot and not force:
+            if snapshot.synced_at > now - timedelta(seconds=settings.CONNECT_SYNC_INTERVAL):
+                return []
+
+        previous = set(snapshot.friend_ids) if snapshot else set()
+        found = set()
+        connections = []
+        for uids in iter_chunks(pages, settings.CONNECT_FRIENDS_CHUNK_SIZE):
+            friend_ids = set(self.get_friend_user_ids(uids, provider)) - found
+            found |= friend_ids
+            known = friend_ids & previous
+            healthy = set(Connection.objects.filter(
+                user_1=self.user, user_2_id__in=known, provider=provider,
+                status=Connection.DONE, confirmed=True
+            ).values_list('user_2_id', flat=True)) if known else set()
+            created, updated = Connection.objects.bulk_connect(
+                self.user, (friend_ids - previous) | (known - healthy), provider
+            )
+            connections += created + updated
+
+        removed = previous - found
+        if removed:
+            Connection.objects.filter(
+                user_1=self.user, user_2_id__in=removed, provider=provider
+            ).delete()
+
+        FriendSnapshot.objects.update_or_create(
+            user=self.user, provider=provider,
+            defaults={'friend_ids': sorted(found), 'synced_at': now}
+        )
+        return connections
+
+    def get_friend_user_ids(self, uids, provider):
+        return UserSocialAuth.objects.filter(
+            provider=provider, uid__in=uids
+        ).values_list('user_id', flat=True)
@@ -3,8 +3,8 @@ class DummyConnect(BaseConnect):
     def _authenticate(self, user):
         pass
 
-    def connect(self, other_user):
+    def follow(self, target):
         return False
 
-    def connect_users(self):
+    def connect_users(self, force=False):
         return []
@@ -1,11 +1,11 @@
-import facebook, requests
+import facebook
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from social_django.models import UserSocialAuth
 
-from src.connect.exceptions import CredentialsNotFound
-from src.connect.models import Connection
+from src.connect.exceptions import CredentialsNotFound, FriendListError
 from src.connect.services.dummy import DummyConnect
+from src.utils import http
 
 class FacebookConnect(DummyConnect):
     provider = 'facebook'
@@ -19,44 +19,27 @@ class FacebookConnect(DummyConnect):
 
         return facebook.GraphAPI(
             access_token,
-            version=settings.SOCIAL_AUTH_FACEBOOK_API_VERSION
+            version=settings.SOCIAL_AUTH_FACEBOOK_API_VERSION,
+            session=http.get_session()
         )
 
-    def connect_users(self):
-        connections = []
-        friends_data = self.api.get_connections('me', 'friends', fields='id', limit=500)
-        friends = [data['id'] for data in friends_data['data']]
-        while True:
-            try:
-                _next = friends_data['paging']['next']
-                friends_data = requests.get(_next).json()
-                friends += [data['id'] for data in friends_data['data']]
-            except KeyError:
-                break
+    def connect_users(self, force=False):
+        return self.connect_friend_pages(self.iter_friend_pages(), self.provider, force=force)
 
-        existing_friends = UserSocialAuth.objects.filter(uid__in=friends, provider=self.provider)
-        for friend in existing_friends:
-            other_user = friend.user
-            connections.append(
-                Connection.objects.update_or_create(
-                user_1=self.user, user_2=other_user,
-                provider=self.provider, defaults={'confirmed': True}
-                )[0]
-            )
-
-        return connections
-
-    def get_existing_friends(self):
-        connections = []
+    def iter_friend_pages(self):
         friends_data = self.api.get_connections('me', 'friends', fields='id', limit=500)
-        friends = [data['id'] for data in friends_data['data']]
         while True:
+            # An error payload must not read as an empty page, or the sync
+            # would take it as every friend having been removed.
+            if 'error' in friends_data or 'data' not in friends_data:
+                raise FriendListError(self.provider, friends_data.get('error', friends_data))
+            yield [data['id'] for data in friends_data['data']]
             try:
                 _next = friends_data['paging']['next']
-                friends_data = requests.get(_next).json()
-                friends += [data['id'] for data in friends_data['data']]
             except KeyError:
                 break
+            friends_data = http.get(_next).json()
 
+    def get_existing_friends(self):
+        friends = [uid for page in self.iter_friend_pages() for uid in page]
         return UserSocialAuth.objects.filter(uid__in=friends, provider=self.provider)
-
@@ -3,9 +3,11 @@ from django.conf import settings
 
 from instagram import InstagramAPI
 from src.connect.services.dummy import DummyConnect
-from src.connect.exceptions import CredentialsNotFound, SocialUserNotFound
+from src.connect.exceptions import CredentialsNotFound
 
 class InstagramConnect(DummyConnect):
+    social_provider = 'instagram'
+
     def _authenticate(self, user):
         try:
             social_auth = user.social_auth.get(provider='instagram')
@@ -18,13 +20,7 @@ class InstagramConnect(DummyConnect):
             access_token=token_key
         )
 
-    def connect(self, other_user):
-        try:
-            other_social_auth = other_user.social_auth.get(provider='instagram')
-            other_user_id = other_social_auth.uid
-        except ObjectDoesNotExist:
-            raise SocialUserNotFound('instagram', other_user)
-
+    def follow(self, other_user_id):
         follow = self.api.follow_user(user_id=other_user_id)
 
         if follow[0].outgoing_status == 'follows':
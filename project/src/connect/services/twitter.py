@@ -3,12 +3,13 @@ import twitter
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
-from social_django.models import UserSocialAuth
 from src.connect.services.base import BaseConnect
-from src.connect.exceptions import CredentialsNotFound, SocialUserNotFound
-from src.connect.models import Connection
+from src.connect.exceptions import CredentialsNotFound
 
 class TwitterConnect(BaseConnect):
+    social_provider = 'twitter'
+    thread_safe = True
+
     def _authenticate(self, user):
         try:
             social_auth = user.social_auth.get(provider='twitter')
@@ -24,13 +25,7 @@ class TwitterConnect(BaseConnect):
             access_token_key=token_key, access_token_secret=token_secret,
         )
 
-    def connect(self, other_user):
-        try:
-            other_social_auth = other_user.social_auth.get(provider='twitter')
-            other_user_id = other_social_auth.uid
-        except ObjectDoesNotExist:
-            raise SocialUserNotFound('twitter', other_user)
-
+    def follow(self, other_user_id):
         friendship = self.api.CreateFriendship(
             user_id=other_user_id, follow=False
         )
@@ -39,25 +34,13 @@ class TwitterConnect(BaseConnect):
             return True
         return False
 
-    def connect_users(self):
-        connections = []
-        friends = []
+    def connect_users(self, force=False):
+        return self.connect_friend_pages(self.iter_friend_pages(), 'twitter', force=force)
+
+    def iter_friend_pages(self):
         cursor = -1
         while True:
             cursor, previous, twitter_users = self.api.GetFriendIDsPaged(cursor)
-            friends +=  twitter_users
+            yield twitter_users
             if cursor == 0:
-                break;
-
-        existing_friends = UserSocialAuth.objects.filter(
-            provider='twitter', uid__in=friends
-        )
-        for friend in existing_friends:
-            other_user = friend.user
-            connection, _ = Connection.objects.update_or_create(
-                user_1=self.user, user_2=other_user, provider='twitter',
-                defaults={'confirmed': True}
-            )
-            connections.append(connection)
-
-        return connections
+                break
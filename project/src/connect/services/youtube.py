@@ -4,14 +4,15 @@ import googleapiclient.discovery, google.oauth2.credentials
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
-from social_django.models import UserSocialAuth
 from social_django.utils import load_strategy
 
 from src.connect.exceptions import CredentialsNotFound, SocialUserNotFound
-from src.connect.models import Connection
+from src.connect.models import YoutubeChannel
 from src.connect.services.dummy import DummyConnect
 
 class YoutubeConnect(DummyConnect):
+    social_provider = 'google-oauth2'
+
     def _authenticate(self, user):
         try:
             social_auth = user.social_auth.get(provider='google-oauth2')
@@ -37,14 +38,13 @@ class YoutubeConnect(DummyConnect):
 
         return googleapiclient.discovery.build('youtube', 'v3', credentials=credentials)
 
-    def connect(self, other_user):
+    def get_target(self, other_user, social_auth):
         try:
-            other_social_auth = other_user.social_auth.get(provider='google-oauth2')
-            channel_id = other_social_auth.extra_data['youtube_channel']
-
-        except (ObjectDoesNotExist, KeyError):
+            return social_auth.extra_data['youtube_channel']
+        except (AttributeError, KeyError):
             raise SocialUserNotFound('google-oauth2', other_user)
 
+    def follow(self, channel_id):
         resource = {'snippet': {
             'resourceId': {
                 'kind': 'youtube#channel',
@@ -55,45 +55,26 @@ class YoutubeConnect(DummyConnect):
 
         return True
 
-    def connect_users(self):
-        connections = []
-        channels_data = self.api.subscriptions().list(
-            part='snippet', mine=True, maxResults=50
-        ).execute()
-        channels_ids = [
-            data['snippet']['resourceId']['channelId'] for data in
-            channels_data['items']
-            if data['snippet']['resourceId']['kind'] == 'youtube#channel'
-        ]
+    def connect_users(self, force=False):
+        return self.connect_friend_pages(self.iter_channel_pages(), 'youtube', force=force)
+
+    def iter_channel_pages(self):
+        page_token = None
         while True:
-            try:
-                next_page_token = channels_data['nextPageToken']
-                channels_data = self.api.subscriptions().list(
-                    part='snippet', mine=True, maxResults=50,
-                    pageToken=next_page_token
-                ).execute()
-                channels_ids += [
-                    data['snippet']['resourceId']['channelId'] for data in
-                    channels_data['items']
-                    if data['snippet']['resourceId']['kind'] == 'youtube#channel'
-                ]
-            except KeyError:
+            params = {'part': 'snippet', 'mine': True, 'maxResults': 50}
+            if page_token:
+                params['pageToken'] = page_token
+            channels_data = self.api.subscriptions().list(**params).execute()
+            yield [
+                data['snippet']['resourceId']['channelId'] for data in
+                channels_data['items']
+                if data['snippet']['resourceId']['kind'] == 'youtube#channel'
+            ]
+            page_token = channels_data.get('nextPageToken')
+            if not page_token:
                 break
 
-        if not channels_ids:
-            return []
-
-        channels_ids_regex = '({})'.format('|'.join(channels_ids))
-        existing_friends = UserSocialAuth.objects.filter(
-            provider='google-oauth2',
-            extra_data__regex=channels_ids_regex
-        )
-        for friend in existing_friends:
-            other_user = friend.user
-            connection, _ = Connection.objects.update_or_create(
-                user_1=self.user, user_2=other_user,
-                provider='youtube', defaults={'confirmed': True}
-            )
-            connections.append(connection)
-
-        return connections
+    def get_friend_user_ids(self, channel_ids, provider):
+        return YoutubeChannel.objects.filter(
+            channel_id__in=channel_ids
+        ).values_list('user_id', flat=True)
@@ -0,0 +1,41 @@
+import logging
+
+from src.connect import services
+from src.connect.models import Connection
+from src.tasks.queue import task
+
+logger = logging.getLogger(__name__)
+
+
+def get_connect_class(provider):
+    return getattr(
+        services,
+        f'{provider.capitalize()}Connect',
+        services.DummyConnect
+    )
+
+
+@task(max_attempts=1)
+def follow_connection(connection_id):
+    '''
+    Runs the provider follow of a pending connection created with
+    CONNECT_ASYNC, then stores whether it was confirmed. Errors mark the
+    connection as failed; posting it again retries the follow.
+    '''
+    connection = Connection.objects.select_related('user_1', 'user_2').filter(
+        id=connection_id, status=Connection.PENDING
+    ).first()
+    if connection is None:
+        return
+
+    try:
+        connect = get_connect_class(connection.provider)(connection.user_1)
+        connection.confirmed = connect.connect(connection.user_2)
+    except Exception as err:
+        logger.info('Connection %s failed.', connection.id, exc_info=True)
+        connection.status = Connection.FAILED
+        connection.error = getattr(err, 'message', str(err))
+    else:
+        connection.status = Connection.DONE
+        connection.error = ''
+    connection.save(update_fields=['confirmed', 'status', 'error'])
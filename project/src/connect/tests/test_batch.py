@@ -0,0 +1,101 @@
+import threading
+from unittest.mock import Mock, patch
+from model_mommy import mommy
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from src.connect.batch import batch_connect
+from src.connect.exceptions import CredentialsNotFound
+from src.connect.models import Connection
+
+User = get_user_model()
+
+
+@patch('src.connect.batch.notify_user')
+@patch('src.connect.batch.get_connect_class')
+class BatchConnectTestCase(TestCase):
+    def setUp(self):
+        self.user = mommy.make(User, first_name='Ann', last_name='Lee')
+        self.friends = mommy.make(User, _quantity=2)
+        for friend in self.friends:
+            mommy.make('UserSocialAuth', user=friend, provider='twitter', uid=f'tw{friend.id}')
+
+        self.twitter = Mock(social_provider='twitter')
+        self.twitter.get_target.side_effect = lambda other_user, social_auth: social_auth.uid
+        self.twitter.follow.return_value = True
+        self.connects = {'twitter': Mock(return_value=self.twitter)}
+
+    def test_authenticates_once_and_follows_every_user(self, get_connect_class, notify_user):
+        get_connect_class.side_effect = self.connects.get
+
+        results = batch_connect(self.user, [(friend, 'twitter') for friend in self.friends])
+
+        self.connects['twitter'].assert_called_once_with(self.user)
+        assert {f'tw{friend.id}' for friend in self.friends} == {
+            call[0][0] for call in self.twitter.follow.call_args_list
+        }
+        assert [friend.id for friend in self.friends] == [result['user_2'] for result in results]
+        assert all(result['confirmed'] and result['status'] == 'done' for result in results)
+        assert 2 == Connection.objects.filter(user_1=self.user, provider='twitter', confirmed=True).count()
+
+    def test_sends_one_notification_per_user(self, get_connect_class, notify_user):
+        youtube = Mock(social_provider=None)
+        youtube.get_target.return_value = None
+        youtube.follow.return_value = False
+        self.connects['youtube'] = Mock(return_value=youtube)
+        get_connect_class.side_effect = self.connects.get
+        notify_user.return_value = 'queued'
+        friend = self.friends[0]
+
+        results = batch_connect(self.user, [(friend, 'twitter'), (friend, 'youtube')])
+
+        notify_user.assert_called_once_with(
+            self.user, friend, 'Ann Lee wants to connect with you on Twitter, Youtube. Would you like to return?'
+        )
+        assert [True, True] == [result['notified'] for result in results]
+        assert ['queued', 'queued'] == [result['notification_status'] for result in results]
+        assert [True, False] == [result['confirmed'] for result in results]
+
+    def test_client_not_thread_safe_follows_serially(self, get_connect_class, notify_user):
+        threads = set()
+        self.twitter.thread_safe = False
+        self.twitter.follow.side_effect = lambda target: threads.add(threading.get_ident()) or True
+        get_connect_class.side_effect = self.connects.get
+
+        results = batch_connect(self.user, [(friend, 'twitter') for friend in self.friends])
+
+        assert 2 == self.twitter.follow.call_count
+        assert 1 == len(threads)
+        assert all(result['confirmed'] for result in results)
+
+    def test_reports_errors_per_item(self, get_connect_class, notify_user):
+        self.connects['youtube'] = Mock(side_effect=CredentialsNotFound('google-oauth2', self.user))
+        get_connect_class.side_effect = self.connects.get
+        self.twitter.follow.side_effect = [Exception('Rate limited'), True]
+        mommy.make(Connection, user_1=self.user, user_2=self.friends[1], provider='instagram')
+
+        results = batch_connect(self.user, [
+            (self.friends[0], 'twitter'), (self.friends[0], 'youtube'),
+            (self.friends[1], 'instagram'),
+        ])
+
+        assert 'failed' == results[0]['status']
+        assert 'Rate limited' == results[0]['error']
+        assert 'failed' == results[1]['status']
+        assert results[1]['error'].startswith('Credentials not found')
+        assert 'Connection already exists.' == results[2]['error']
+        assert not Connection.objects.filter(user_1=self.user, user_2=self.friends[0]).exists()
+
+    @override_settings(CONNECT_ASYNC=True)
+    @patch('src.connect.batch.follow_connection')
+    def test_async_queues_follows(self, follow_connection, get_connect_class, notify_user):
+        results = batch_connect(self.user, [(friend, 'twitter') for friend in self.friends])
+
+        get_connect_class.assert_not_called()
+        connections = Connection.objects.filter(user_1=self.user, status=Connection.PENDING)
+        assert 2 == connections.count()
+        assert {connection.id for connection in connections} == {
+            call[0][0] for call in follow_connection.enqueue.call_args_list
+        }
+        assert all(result['status'] == 'pending' for result in results)
@@ -0,0 +1,196 @@
+from model_mommy import mommy
+
+from django.conf import settings
+from django.test import TestCase
+
+from src.core_auth.models import UserQuerySet
+from src.connect.models import Connection, ConnectionStats, YoutubeChannel
+
+class ConnectionStatsTestCase(TestCase):
+    def setUp(self):
+        self.user = mommy.make(settings.AUTH_USER_MODEL)
+        self.other_user = mommy.make(settings.AUTH_USER_MODEL)
+
+    def get_stats(self, user, other_user):
+        return ConnectionStats.objects.get(user=user, other_user=other_user)
+
+    def test_connection_updates_both_sides_of_pair(self):
+        mommy.make(Connection, user_1=self.user, user_2=self.other_user, provider='facebook')
+
+        stats = self.get_stats(self.user, self.other_user)
+        assert stats.sent_count == 1
+        assert stats.received_count == 0
+        assert stats.category == UserQuerySet.SENT
+
+        other_stats = self.get_stats(self.other_user, self.user)
+        assert other_stats.sent_count == 0
+        assert other_stats.received_count == 1
+        assert other_stats.category == UserQuerySet.RECEIVED
+
+    def test_connections_in_both_directions_are_both(self):
+        mommy.make(Connection, user_1=self.user, user_2=self.other_user, provider='facebook')
+        mommy.make(Connection, user_1=self.other_user, user_2=self.user, provider='twitter')
+
+        assert self.get_stats(self.user, self.other_user).category == UserQuerySet.BOTH
+        assert self.get_stats(self.other_user, self.user).category == UserQuerySet.BOTH
+
+    def test_deleting_connection_decrements_stats(self):
+        connection = mommy.make(
+            Connection, user_1=self.user, user_2=self.other_user, provider='facebook'
+        )
+        mommy.make(Connection, user_1=self.user, user_2=self.other_user, provider='twitter')
+        connection.delete()
+
+        stats = self.get_stats(self.user, self.other_user)
+        assert stats.sent_count == 1
+        assert stats.category == UserQuerySet.SENT
+
+        Connection.objects.all().delete()
+        stats = self.get_stats(self.user, self.other_user)
+        assert stats.sent_count == 0
+        assert stats.category == UserQuerySet.NOTHING
+
+    def test_update_or_create_of_existing_connection_does_not_count_twice(self):
+        mommy.make(Connection, user_1=self.user, user_2=self.other_user, provider='facebook')
+        Connection.objects.update_or_create(
+            user_1=self.user, user_2=self.other_user, provider='facebook',
+            defaults={'confirmed': True}
+        )
+
+        assert self.get_stats(self.user, self.other_user).sent_count == 1
+
+    def test_only_done_connections_are_counted(self):
+        connection = mommy.make(
+            Connection, user_1=self.user, user_2=self.other_user, provider='facebook',
+            status=Connection.PENDING
+        )
+        assert not ConnectionStats.objects.filter(sent_count__gt=0).exists()
+
+        connection.status = Connection.DONE
+        connection.save()
+        assert self.get_stats(self.user, self.other_user).sent_count == 1
+
+        connection.status = Connection.FAILED
+        connection.save()
+        assert self.get_stats(self.user, self.other_user).sent_count == 0
+
+        connection.delete()
+        assert self.get_stats(self.user, self.other_user).sent_count == 0
+
+    def test_social_auth_changes_update_social_counts(self):
+        mommy.make(Connection, user_1=self.user, user_2=self.other_user, provider='facebook')
+        mommy.make('UserSocialAuth', user=self.other_user, _quantity=2)
+        social_auth = mommy.make('UserSocialAuth', user=self.user)
+
+        stats = self.get_stats(self.user, self.other_user)
+        assert stats.user_social_count == 1
+        assert stats.other_social_count == 2
+
+        social_auth.delete()
+        stats = self.get_stats(self.user, self.other_user)
+        assert stats.user_social_count == 0
+        assert self.get_stats(self.other_user, self.user).other_social_count == 0
+
+    def test_deleting_user_removes_stats(self):
+        mommy.make(Connection, user_1=self.user, user_2=self.other_user, provider='facebook')
+        mommy.make('UserSocialAuth', user=self.other_user)
+        self.other_user.delete()
+
+        assert ConnectionStats.objects.count() == 0
+
+
+class BulkConnectTestCase(TestCase):
+    def setUp(self):
+        self.user = mommy.make(settings.AUTH_USER_MODEL)
+        self.friends = mommy.make(settings.AUTH_USER_MODEL, _quantity=3)
+
+    def test_creates_and_confirms_connections(self):
+        existing = mommy.make(
+            Connection, user_1=self.user, user_2=self.friends[0],
+            provider='facebook', confirmed=False
+        )
+        friend_ids = [friend.id for friend in self.friends] + [self.friends[1].id]
+
+        with self.assertNumQueries(2):
+            created, updated = Connection.objects.bulk_connect(
+                self.user, friend_ids, 'facebook'
+            )
+
+        assert [existing] == updated
+        assert {self.friends[1].id, self.friends[2].id} == {c.user_2_id for c in created}
+        assert 3 == Connection.objects.filter(
+            user_1=self.user, provider='facebook', confirmed=True
+        ).count()
+
+    def test_records_stats_only_for_created_connections(self):
+        mommy.make(Connection, user_1=self.user, user_2=self.friends[0], provider='facebook')
+
+        Connection.objects.bulk_connect(
+            self.user, [friend.id for friend in self.friends], 'facebook'
+        )
+
+        for friend in self.friends:
+            stats = ConnectionStats.objects.get(user=self.user, other_user=friend)
+            assert 1 == stats.sent_count
+
+    def test_retries_failed_connections_as_pending(self):
+        failed = mommy.make(
+            Connection, user_1=self.user, user_2=self.friends[0], provider='twitter',
+            confirmed=False, status=Connection.FAILED, error='Error'
+        )
+
+        created, updated = Connection.objects.bulk_connect(
+            self.user, [self.friends[0].id, self.friends[1].id], 'twitter',
+            confirmed=False, status=Connection.PENDING
+        )
+
+        assert [failed] == updated
+        failed.refresh_from_db()
+        assert Connection.PENDING == failed.status
+        assert '' == failed.error
+        assert Connection.PENDING == Connection.objects.get(id=created[0].id).status
+
+    def test_records_stats_when_failed_connections_are_done(self):
+        mommy.make(
+            Connection, user_1=self.user, user_2=self.friends[0], provider='twitter',
+            confirmed=False, status=Connection.FAILED, error='Error'
+        )
+
+        Connection.objects.bulk_connect(self.user, [self.friends[0].id], 'twitter')
+
+        stats = ConnectionStats.objects.get(user=self.user, other_user=self.friends[0])
+        assert 1 == stats.sent_count
+
+    def test_no_ids(self):
+        with self.assertNumQueries(0):
+            assert ([], []) == Connection.objects.bulk_connect(self.user, [], 'facebook')
+
+
+class YoutubeChannelTestCase(TestCase):
+    def test_channel_is_mapped_when_stored_in_extra_data(self):
+        social_auth = mommy.make(
+            'UserSocialAuth', provider='google-oauth2', extra_data={'access_token': 'a'}
+        )
+        assert not YoutubeChannel.objects.exists()
+
+        social_auth.set_extra_data({'youtube_channel': 'UCChannel'})
+        social_auth.save()
+
+        channel = YoutubeChannel.objects.get(channel_id='UCChannel')
+        assert channel.social_auth == social_auth
+        assert channel.user_id == social_auth.user_id
+
+    def test_channel_is_removed_with_social_auth(self):
+        social_auth = mommy.make(
+            'UserSocialAuth', provider='google-oauth2',
+            extra_data={'youtube_channel': 'UCChannel'}
+        )
+        social_auth.delete()
+
+        assert not YoutubeChannel.objects.exists()
+
+    def test_other_providers_are_ignored(self):
+        mommy.make(
+            'UserSocialAuth', provider='facebook', extra_data={'youtube_channel': 'UCChannel'}
+        )
+        assert not YoutubeChannel.objects.exists()
@@ -1,4 +1,5 @@
 from unittest.mock import Mock, patch
+from django.test import override_settings
 from model_mommy import mommy
 
 from rest_framework.test import APITestCase
@@ -43,8 +44,8 @@ class ConnectionSerializerTestCase(APITestCase):
 
     @patch('src.connect.serializers.services')
     @patch('src.connect.serializers.notify_user')
-    def test_return_notified_false_if_error_on_notification(self, mocked_notify, mocked_services):
-        mocked_notify.side_effect = Exception()
+    def test_return_notified_false_if_push_is_skipped(self, mocked_notify, mocked_services):
+        mocked_notify.return_value = 'skipped'
         youtube_connect = Mock()
         youtube_connect.connect.return_value = True
         mocked_services.YoutubeConnect.return_value = youtube_connect
@@ -68,6 +69,7 @@ class ConnectionSerializerTestCase(APITestCase):
         assert serializer.data['provider'] == 'youtube'
         assert serializer.data['confirmed'] == True
         assert serializer.data['notified'] == False
+        assert serializer.data['notification_status'] == 'skipped'
 
         mocked_services.YoutubeConnect.assert_called_once_with(user_1)
         youtube_connect.connect.assert_called_once_with(user_2)
@@ -78,7 +80,7 @@ class ConnectionSerializerTestCase(APITestCase):
     @patch('src.connect.serializers.services')
     @patch('src.connect.serializers.notify_user')
     def test_serializer_validation_calls_service_connect_for_youtube(self, mocked_notify, mocked_services):
-        mocked_notify.return_value = True
+        mocked_notify.return_value = 'queued'
         youtube_connect = Mock()
         youtube_connect.connect.return_value = True
         mocked_services.YoutubeConnect.return_value = youtube_connect
@@ -102,6 +104,7 @@ class ConnectionSerializerTestCase(APITestCase):
         assert serializer.data['provider'] == 'youtube'
         assert serializer.data['confirmed'] == True
         assert serializer.data['notified'] == True
+        assert serializer.data['notification_status'] == 'queued'
 
         mocked_services.YoutubeConnect.assert_called_once_with(user_1)
         youtube_connect.connect.assert_called_once_with(user_2)
@@ -127,3 +130,57 @@ class ConnectionSerializerTestCase(APITestCase):
         )
         assert serializer.is_valid() is False
         assert serializer.errors == {'non_field_errors': ['Credentials not found for user "{}" in provider "youtube".'.format(user_1.id)]}
+
+    @override_settings(CONNECT_ASYNC=True)
+    @patch('src.connect.serializers.follow_connection')
+    @patch('src.connect.serializers.services')
+    def test_async_connection_is_created_pending(self, mocked_services, mocked_follow):
+        user_1 = mommy.make('UserSocialAuth', provider='twitter').user
+        user_2 = mommy.make('UserSocialAuth', provider='twitter').user
+
+        request = Mock()
+        request.user = user_1
+
+        serializer = ConnectionSerializer(
+            data={'user_2': user_2.id, 'provider': 'twitter'}, context={'request': request}
+        )
+        assert serializer.is_valid() is True
+        connection = serializer.save()
+
+        assert connection.status == Connection.PENDING
+        assert connection.confirmed is False
+        mocked_services.TwitterConnect.assert_not_called()
+        mocked_follow.enqueue.assert_called_once_with(connection.id)
+
+    @override_settings(CONNECT_ASYNC=True)
+    @patch('src.connect.serializers.follow_connection')
+    def test_failed_connection_can_be_posted_again(self, mocked_follow):
+        failed = mommy.make(
+            'Connection', provider='twitter', confirmed=False,
+            status=Connection.FAILED, error='Error'
+        )
+
+        request = Mock()
+        request.user = failed.user_1
+
+        serializer = ConnectionSerializer(
+            data={'user_2': failed.user_2.id, 'provider': 'twitter'}, context={'request': request}
+        )
+        assert serializer.is_valid() is True
+        connection = serializer.save()
+
+        assert connection.status == Connection.PENDING
+        assert not Connection.objects.filter(id=failed.id).exists()
+
+    def test_pending_connection_can_not_be_posted_again(self):
+        pending = mommy.make(
+            'Connection', provider='twitter', confirmed=False, status=Connection.PENDING
+        )
+
+        request = Mock()
+        request.user = pending.user_1
+
+        serializer = ConnectionSerializer(
+            data={'user_2': pending.user_2.id, 'provider': 'twitter'}, context={'request': request}
+        )
+        assert serializer.is_valid() is False
@@ -1,20 +1,20 @@
 import time
-import requests
 from facebook import GraphAPI
 from unittest.mock import Mock, patch
 import pytest
 from model_mommy import mommy
 
 from social_django.models import UserSocialAuth
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.conf import settings
 
 from src.connect.services.twitter import TwitterConnect
 from src.connect.services.instagram import InstagramConnect
 from src.connect.services.youtube import YoutubeConnect
 from src.connect.services.facebook import FacebookConnect
-from src.connect.exceptions import CredentialsNotFound, SocialUserNotFound
-from src.connect.models import Connection
+from src.connect.exceptions import CredentialsNotFound, FriendListError, SocialUserNotFound
+from src.utils import http
+from src.connect.models import Connection, FriendSnapshot
 
 class TwitterConnectTestCase(TestCase):
     def setUp(self):
@@ -141,6 +141,103 @@ class TwitterConnectTestCase(TestCase):
         assert connection.confirmed is True
 
 
+    @override_settings(CONNECT_FRIENDS_CHUNK_SIZE=2)
+    @patch('src.connect.services.twitter.twitter')
+    def test_connect_users_writes_each_chunk_before_next_page(self, mocked_twitter):
+        friends = mommy.make('UserSocialAuth', provider='twitter', _quantity=3)
+        connection_counts = []
+
+        def get_friend_ids_paged(cursor):
+            connection_counts.append(Connection.objects.filter(user_1=self.user).count())
+            if cursor == -1:
+                return 2, None, [self.other_social_auth.uid, friends[0].uid, friends[1].uid]
+            return 0, None, ['invalid_id', friends[2].uid]
+
+        api_object = Mock()
+        api_object.GetFriendIDsPaged.side_effect = get_friend_ids_paged
+        mocked_twitter.Api.return_value = api_object
+        connections = TwitterConnect(self.user).connect_users()
+
+        assert [0, 3] == connection_counts
+        assert 4 == len(connections)
+        assert 4 == Connection.objects.filter(user_1=self.user, provider='twitter').count()
+
+
+@patch('src.connect.services.twitter.twitter')
+class FriendSnapshotSyncTestCase(TestCase):
+    def setUp(self):
+        self.user = mommy.make(
+            'UserSocialAuth', provider='twitter',
+            extra_data={'access_token': {'oauth_token': 'a', 'oauth_token_secret': 'b'}}
+        ).user
+        self.friends = mommy.make('UserSocialAuth', provider='twitter', _quantity=3)
+
+    def sync(self, mocked_twitter, uids, force=True):
+        api_object = Mock()
+        api_object.GetFriendIDsPaged.return_value = (0, None, uids)
+        mocked_twitter.Api.return_value = api_object
+        return TwitterConnect(self.user).connect_users(force=force), api_object
+
+    def test_only_the_difference_is_written(self, mocked_twitter):
+        first, second, third = self.friends
+        self.sync(mocked_twitter, [first.uid, second.uid])
+
+        with patch.object(Connection.objects, 'bulk_connect', wraps=Connection.objects.bulk_connect) as bulk:
+            connections, _ = self.sync(mocked_twitter, [second.uid, third.uid])
+
+        bulk.assert_called_once_with(self.user, {third.user_id}, 'twitter')
+        assert [third.user_id] == [c.user_2_id for c in connections]
+        assert {second.user_id, third.user_id} == set(
+            Connection.objects.filter(user_1=self.user).values_list('user_2_id', flat=True)
+        )
+        snapshot = FriendSnapshot.objects.get(user=self.user, provider='twitter')
+        assert sorted([second.user_id, third.user_id]) == snapshot.friend_ids
+
+    def test_unhealthy_known_friends_are_connected_again(self, mocked_twitter):
+        first, second, third = self.friends
+        self.sync(mocked_twitter, [first.uid, second.uid, third.uid])
+        Connection.objects.filter(user_2_id=first.user_id).update(status=Connection.FAILED)
+        Connection.objects.filter(user_2_id=second.user_id).update(confirmed=False)
+
+        connections, _ = self.sync(mocked_twitter, [first.uid, second.uid, third.uid])
+
+        assert {first.user_id, second.user_id} == {c.user_2_id for c in connections}
+        assert 3 == Connection.objects.filter(
+            user_1=self.user, status=Connection.DONE, confirmed=True
+        ).count()
+
+    def test_provider_error_keeps_connections(self, mocked_twitter):
+        first, second, _ = self.friends
+        self.sync(mocked_twitter, [first.uid, second.uid])
+
+        def pages():
+            yield [first.uid]
+            raise FriendListError('twitter', 'Rate limit exceeded')
+
+        connect = TwitterConnect(self.user)
+        with pytest.raises(FriendListError):
+            connect.connect_friend_pages(pages(), 'twitter', force=True)
+
+        assert 2 == Connection.objects.filter(user_1=self.user).count()
+        snapshot = FriendSnapshot.objects.get(user=self.user, provider='twitter')
+        assert sorted([first.user_id, second.user_id]) == snapshot.friend_ids
+
+    def test_recent_sync_is_skipped(self, mocked_twitter):
+        self.sync(mocked_twitter, [self.friends[0].uid])
+        connections, api_object = self.sync(mocked_twitter, [self.friends[1].uid], force=False)
+
+        assert [] == connections
+        api_object.GetFriendIDsPaged.assert_not_called()
+        assert 1 == Connection.objects.filter(user_1=self.user).count()
+
+    @override_settings(CONNECT_SYNC_INTERVAL=0)
+    def test_sync_runs_after_interval(self, mocked_twitter):
+        self.sync(mocked_twitter, [self.friends[0].uid])
+        connections, _ = self.sync(mocked_twitter, [self.friends[1].uid], force=False)
+
+        assert [self.friends[1].user_id] == [c.user_2_id for c in connections]
+
+
 class InstagramConnectTestCase(TestCase):
     def setUp(self):
         self.user_social_auth = mommy.make(
@@ -476,7 +573,7 @@ class FacebookConnectTestCase(TestCase):
         self.other_user = self.other_social_auth.user
 
     @patch.object(GraphAPI, 'get_connections')
-    @patch.object(requests, 'get')
+    @patch.object(http, 'get')
     def test_connect_users(self, mocked_get, mocked_fb_connections):
         mocked_fb_connections.return_value = {'data':
             [{'id': self.other_social_auth.uid}]
@@ -491,7 +588,7 @@ class FacebookConnectTestCase(TestCase):
         assert connection.confirmed is True
 
     @patch.object(GraphAPI, 'get_connections')
-    @patch.object(requests, 'get')
+    @patch.object(http, 'get')
     def test_connect_users_with_paging_and_unexisting_user(self, mocked_get, mocked_fb_connections):
         mocked_fb_connections.return_value = {
             'data': [{'id': self.other_social_auth.uid}],
@@ -510,3 +607,20 @@ class FacebookConnectTestCase(TestCase):
         assert connection.user_1 == self.user
         assert connection.user_2 == self.other_user
         assert connection.confirmed is True
+
+    @patch.object(GraphAPI, 'get_connections')
+    @patch.object(http, 'get')
+    def test_error_page_keeps_connections(self, mocked_get, mocked_fb_connections):
+        mommy.make(Connection, user_1=self.user, user_2=self.other_user, provider='facebook')
+        mocked_fb_connections.return_value = {
+            'data': [{'id': self.other_social_auth.uid}],
+            'paging': {'next': 'http://fb.com/next'}
+        }
+        return_get = Mock()
+        return_get.json.return_value = {'error': {'message': 'Session expired.'}}
+        mocked_get.return_value = return_get
+
+        with pytest.raises(FriendListError):
+            FacebookConnect(self.user).connect_users(force=True)
+
+        assert Connection.objects.filter(user_1=self.user, user_2=self.other_user).exists()
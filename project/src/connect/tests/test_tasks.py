@@ -0,0 +1,52 @@
+from unittest.mock import Mock, patch
+from model_mommy import mommy
+
+from django.test import TestCase
+
+from src.connect.exceptions import SocialUserNotFound
+from src.connect.models import Connection
+from src.connect.tasks import follow_connection
+
+
+class FollowConnectionTestCase(TestCase):
+    def setUp(self):
+        self.connection = mommy.make(
+            'Connection', provider='twitter', confirmed=False, status=Connection.PENDING
+        )
+
+    @patch('src.connect.tasks.services')
+    def test_follow_confirms_connection(self, mocked_services):
+        twitter_connect = Mock()
+        twitter_connect.connect.return_value = True
+        mocked_services.TwitterConnect.return_value = twitter_connect
+
+        follow_connection(self.connection.id)
+
+        self.connection.refresh_from_db()
+        assert self.connection.status == Connection.DONE
+        assert self.connection.confirmed is True
+        mocked_services.TwitterConnect.assert_called_once_with(self.connection.user_1)
+        twitter_connect.connect.assert_called_once_with(self.connection.user_2)
+
+    @patch('src.connect.tasks.services')
+    def test_follow_error_marks_connection_failed(self, mocked_services):
+        mocked_services.TwitterConnect.side_effect = SocialUserNotFound(
+            'twitter', self.connection.user_2
+        )
+
+        follow_connection(self.connection.id)
+
+        self.connection.refresh_from_db()
+        assert self.connection.status == Connection.FAILED
+        assert self.connection.confirmed is False
+        assert self.connection.error == 'User with id "{}" not found for provider "twitter".'.format(
+            self.connection.user_2.id
+        )
+
+    @patch('src.connect.tasks.services')
+    def test_follow_skips_finished_connection(self, mocked_services):
+        Connection.objects.filter(id=self.connection.id).update(status=Connection.DONE)
+
+        follow_connection(self.connection.id)
+
+        mocked_services.TwitterConnect.assert_not_called()
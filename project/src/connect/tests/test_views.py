@@ -4,6 +4,7 @@ from rest_framework.test import APITestCase
 from rest_framework.generics import CreateAPIView
 
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from django.urls import reverse
 
 from src.core_auth.models import UserQuerySet
@@ -30,6 +31,42 @@ class ConnectionAPIViewTestCase(APITestCase):
         assert issubclass(view_class, CreateAPIView)
 
 
+class BatchConnectionAPIViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+        self.friend = mommy.make(User)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('connect:batch_connect')
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.post(self.url)
+        assert 401 == response.status_code
+
+    @patch('src.connect.views.batch_connect')
+    def test_batch_connect(self, mocked_batch_connect):
+        mocked_batch_connect.return_value = [{'user_2': self.friend.id, 'provider': 'twitter'}]
+        data = {'connections': [{'user_2': self.friend.id, 'provider': 'twitter'}]}
+        response = self.client.post(self.url, data, format='json')
+        assert 200 == response.status_code
+        assert {'results': [{'user_2': self.friend.id, 'provider': 'twitter'}]} == response.json()
+        mocked_batch_connect.assert_called_once_with(self.user, [(self.friend, 'twitter')])
+
+    def test_unknown_users_are_rejected(self):
+        data = {'connections': [{'user_2': self.friend.id + 100, 'provider': 'twitter'}]}
+        response = self.client.post(self.url, data, format='json')
+        assert 400 == response.status_code
+
+    @override_settings(CONNECT_BATCH_MAX_SIZE=1)
+    def test_batch_size_is_limited(self):
+        data = {'connections': [
+            {'user_2': self.friend.id, 'provider': 'twitter'},
+            {'user_2': self.friend.id, 'provider': 'youtube'},
+        ]}
+        response = self.client.post(self.url, data, format='json')
+        assert 400 == response.status_code
+
+
 class ConnectionListAPIView(APITestCase):
     def setUp(self):
         self.user = mommy.make(User)
@@ -75,6 +112,49 @@ class ConnectionListAPIView(APITestCase):
         response = self.client.get(self.url)
         assert 404 == response.status_code
 
+    def test_failed_connection_is_not_listed(self):
+        other_user = mommy.make(User)
+        mommy.make(
+            'Connection', user_1=self.user, user_2=other_user, provider='twitter',
+            confirmed=False, status='failed'
+        )
+        self.url = reverse(
+            'connect:connection_list', kwargs={'user_id': other_user.id}
+        )
+        response = self.client.get(self.url)
+        assert 404 == response.status_code
+
+class ConnectionDetailAPIViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+        self.connection = mommy.make(
+            'Connection', user_1=self.user, provider='twitter',
+            confirmed=False, status='pending'
+        )
+        self.client.force_authenticate(self.user)
+        self.url = reverse('connect:connection_detail', kwargs={'pk': self.connection.id})
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        assert 401 == response.status_code
+
+    @patch.object(ConnectionSerializer, 'get_notified')
+    def test_connection_status(self, mocked_notified):
+        mocked_notified.return_value = True
+        response = self.client.get(self.url)
+        assert 200 == response.status_code
+        content = response.json()
+        assert self.connection.id == content['id']
+        assert 'pending' == content['status']
+        assert content['confirmed'] is False
+
+    def test_connection_of_other_user_is_not_found(self):
+        self.client.force_authenticate(mommy.make(User))
+        response = self.client.get(self.url)
+        assert 404 == response.status_code
+
+
 class ConnectedUsersAPIViewTestCase(APITestCase):
     def setUp(self):
         self.user = mommy.make(User)
@@ -99,5 +179,5 @@ class ConnectedUsersAPIViewTestCase(APITestCase):
         assert 1 == len(content)
         user_data = content[0]
         assert user_data['id'] == self.connected_user.id
-        assert 100 == user_data['connection_percentage']
+        assert 50 == user_data['connection_percentage']
         assert 'sent' == user_data['category']
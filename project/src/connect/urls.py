@@ -3,6 +3,8 @@ from src.connect import views
 
 urlpatterns = [
     path('users/', views.connected_users_view, name='users'),
+    path('batch/', views.batch_connection_view, name='batch_connect'),
     path('<int:user_id>/', views.connection_list_view, name='connection_list'),
+    path('status/<int:pk>/', views.connection_detail_view, name='connection_detail'),
     path('', views.connection_view, name='connect'),
 ]
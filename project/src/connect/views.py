@@ -1,10 +1,13 @@
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_list_or_404
-from rest_framework.generics import CreateAPIView, ListAPIView
+from rest_framework.generics import CreateAPIView, GenericAPIView, ListAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from src.core_auth.models import UserQuerySet
-from src.connect.serializers import ConnectionSerializer, ConnectedUserSerializer
+from src.connect.batch import batch_connect
+from src.connect.serializers import (BatchConnectionSerializer, ConnectionSerializer,
+                                     ConnectedUserSerializer)
 from src.connect.models import Connection
 
 User = get_user_model()
@@ -13,16 +16,41 @@ class ConnectionAPIView(CreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ConnectionSerializer
 
+class BatchConnectionAPIView(GenericAPIView):
+    '''
+    Connects with many (user_2, provider) pairs in one request and returns
+    the result of each one, in order. Failed pairs don't fail the batch.
+    '''
+    permission_classes = [IsAuthenticated]
+    serializer_class = BatchConnectionSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = batch_connect(request.user, serializer.validated_data['connections'])
+        return Response({'results': results})
+
 class ConnectionListAPIView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ConnectionSerializer
 
     def get_queryset(self, *args, **kwargs):
         return get_list_or_404(
-            Connection, user_1=self.request.user,
+            Connection.objects.done(), user_1=self.request.user,
             user_2=self.kwargs['user_id'],
         )
 
+class ConnectionDetailAPIView(RetrieveAPIView):
+    '''
+    A connection sent by the current user, so clients can poll the status
+    of a follow running in the background.
+    '''
+    permission_classes = [IsAuthenticated]
+    serializer_class = ConnectionSerializer
+
+    def get_queryset(self):
+        return Connection.objects.filter(user_1=self.request.user)
+
 class ConnectedUsersAPIView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ConnectedUserSerializer
@@ -33,5 +61,7 @@ class ConnectedUsersAPIView(ListAPIView):
         ).exclude(category=UserQuerySet.NOTHING)
 
 connection_view = ConnectionAPIView.as_view()
+batch_connection_view = BatchConnectionAPIView.as_view()
 connected_users_view = ConnectedUsersAPIView.as_view()
 connection_list_view = ConnectionListAPIView.as_view()
+connection_detail_view = ConnectionDetailAPIView.as_view()
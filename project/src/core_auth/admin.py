@@ -5,6 +5,8 @@ from mapwidgets.widgets import GooglePointFieldWidget
 
 from social_django.models import UserSocialAuth
 
+from src.core_auth.models import invalidate_featured_user_ids
+
 User = get_user_model()
 
 class SocialAuthInline(admin.TabularInline):
@@ -40,12 +42,14 @@ class UserAdmin(admin.ModelAdmin):
     def mark_as_featured(self, request, queryset):
         msg = 'Users marked as featured.'
         queryset.update(featured=True)
+        invalidate_featured_user_ids()
         self.message_user(request, msg, messages.SUCCESS)
     mark_as_featured.shirt_description = 'Mark as featured.'
 
     def unmark_as_featured(self, request, queryset):
         msg = 'Users unmarked as featured.'
         queryset.update(featured=False)
+        invalidate_featured_user_ids()
         self.message_user(request, msg, messages.SUCCESS)
     mark_as_featured.shirt_description = 'Unmark as featured.'
 
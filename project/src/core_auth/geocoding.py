@@ -0,0 +1,146 @@
+import threading, time
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+
+import googlemaps
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from src.core_auth.models import GeocodedLocation
+
+
+class GoogleGeocoder(object):
+    def __init__(self):
+        self.client = googlemaps.Client(settings.GOOGLE_MAPS_API_KEY)
+
+    def reverse_geocode(self, lat, lng):
+        address_data = self.client.reverse_geocode((lat, lng))
+        formatted = [
+            x['formatted_address'] for x in address_data
+            if 'locality' in x.get('types', [])
+        ]
+        if formatted:
+            return formatted[0]
+
+
+class StubGeocoder(object):
+    '''
+    Offline geocoder for tests and local development. Returns a fake
+    locality derived from the coordinates and records every lookup.
+    '''
+    def __init__(self):
+        self.calls = []
+
+    def reverse_geocode(self, lat, lng):
+        self.calls.append((lat, lng))
+        return 'Locality {}, {}'.format(lat, lng)
+
+
+class LRUCache(object):
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        '''Returns (found, value), so cached None values can be told apart.'''
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return False, None
+            if expires < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CachedGeocoder(object):
+    '''
+    Reverse geocodes points to their locality. Coordinates are rounded to
+    GEOCODE_PRECISION decimal places, so GPS jitter inside the same cell
+    hits the cache. Lookups go through an in-process LRU first, then the
+    GeocodedLocation table, and only then the geocoding backend.
+    '''
+    def __init__(self, backend, precision, cache_size, ttl):
+        self.backend = backend
+        self.step = Decimal(10) ** -precision
+        self.ttl = ttl
+        self.cache = LRUCache(cache_size, ttl)
+
+    def quantize(self, point):
+        return (
+            Decimal(repr(point.y)).quantize(self.step),
+            Decimal(repr(point.x)).quantize(self.step),
+        )
+
+    def locality(self, point):
+        key = self.quantize(point)
+        found, address = self.cache.get(key)
+        if found:
+            return address
+
+        latitude, longitude = key
+        stored = GeocodedLocation.objects.filter(
+            latitude=latitude, longitude=longitude,
+            updated_at__gte=timezone.now() - timedelta(seconds=self.ttl)
+        ).first()
+        if stored is not None:
+            address = stored.address
+        else:
+            address = self.backend.reverse_geocode(float(latitude), float(longitude))
+            GeocodedLocation.objects.update_or_create(
+                latitude=latitude, longitude=longitude,
+                defaults={'address': address}
+            )
+
+        self.cache.set(key, address)
+        return address
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder():
+    '''Returns the process-wide CachedGeocoder, sharing one backend client.'''
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                backend = import_string(settings.GEOCODER_BACKEND)()
+                _geocoder = CachedGeocoder(
+                    backend, settings.GEOCODE_PRECISION,
+                    settings.GEOCODE_CACHE_SIZE, settings.GEOCODE_CACHE_TTL
+                )
+    return _geocoder
+
+
+def reset_geocoder():
+    global _geocoder
+    with _geocoder_lock:
+        _geocoder = None
+
+
+@receiver(setting_changed, dispatch_uid='reset_geocoder')
+def reset_geocoder_on_setting_changed(setting, **kwargs):
+    if setting.startswith('GEOCODE'):
+        reset_geocoder()
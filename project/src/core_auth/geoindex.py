@@ -0,0 +1,198 @@
+import math, threading, time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_M / 360
+
+
+def haversine(lng_1, lat_1, lng_2, lat_2):
+    lng_1, lat_1, lng_2, lat_2 = map(math.radians, (lng_1, lat_1, lng_2, lat_2))
+    a = (
+        math.sin((lat_2 - lat_1) / 2) ** 2 +
+        math.cos(lat_1) * math.cos(lat_2) * math.sin((lng_2 - lng_1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1, math.sqrt(a)))
+
+
+class GridIndex(object):
+    '''
+    In-process index of user locations bucketed into a fixed lat/lng grid.
+    A radius query only visits the cells overlapping the search circle and
+    then checks the exact distance, so it never scans every user.
+
+    Each process keeps its own copy: writes made by other processes only
+    show up after the periodic reload, which is why callers still fetch
+    (and re-filter) the candidates from the database.
+    '''
+    def __init__(self, cell_size=0.25):
+        self.cell_size = cell_size
+        self.columns = int(round(360 / cell_size))
+        self._cells = defaultdict(set)
+        self._points = {}
+        self._changes = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lng, lat):
+        x = int(math.floor((lng + 180) / self.cell_size)) % self.columns
+        y = int(math.floor((lat + 90) / self.cell_size))
+        return x, y
+
+    def update(self, user_id, point):
+        '''Stores `point` for the user, or removes the user when it's None.'''
+        self._write(user_id, (point.x, point.y) if point is not None else None)
+
+    def remove(self, user_id):
+        self._write(user_id, None)
+
+    def _write(self, user_id, location):
+        with self._lock:
+            if self._changes is not None:
+                self._changes[user_id] = location
+            self._store(user_id, location)
+
+    def _store(self, user_id, location):
+        self._discard(user_id)
+        if location is not None:
+            self._points[user_id] = location
+            self._cells[self._cell(*location)].add(user_id)
+
+    def _discard(self, user_id):
+        previous = self._points.pop(user_id, None)
+        if previous is not None:
+            cell = self._cell(*previous)
+            self._cells[cell].discard(user_id)
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def start_replace(self):
+        '''
+        Records the updates and removals from now on, so the ones made while
+        a replacement is being read are applied on top of it by replace().
+        '''
+        with self._lock:
+            self._changes = {}
+
+    def cancel_replace(self):
+        with self._lock:
+            self._changes = None
+
+    def replace(self, points):
+        '''
+        Swaps the whole index for `points`, an iterable of (user_id, lng,
+        lat), then re-applies the writes recorded since start_replace().
+        '''
+        cells = defaultdict(set)
+        stored = {}
+        for user_id, lng, lat in points:
+            stored[user_id] = (lng, lat)
+            cells[self._cell(lng, lat)].add(user_id)
+
+        with self._lock:
+            changes, self._changes = self._changes or {}, None
+            self._cells, self._points = cells, stored
+            for user_id, location in changes.items():
+                self._store(user_id, location)
+
+    def query(self, lng, lat, radius):
+        '''Returns the ids of the users within `radius` meters of (lng, lat).'''
+        lat_delta = radius / METERS_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_delta, 90)))
+        if cos_lat < 1e-6:
+            lng_delta = 180
+        else:
+            lng_delta = min(180, lat_delta / cos_lat)
+
+        min_x, min_y = self._cell(lng - lng_delta, lat - lat_delta)
+        max_x, max_y = self._cell(lng + lng_delta, lat + lat_delta)
+        width = (max_x - min_x) % self.columns + 1
+        if lng_delta >= 180:
+            width = self.columns
+
+        found = []
+        with self._lock:
+            cells, points = self._cells, self._points
+            for offset in range(width):
+                x = (min_x + offset) % self.columns
+                for y in range(min_y, max_y + 1):
+                    for user_id in cells.get((x, y), ()):
+                        other_lng, other_lat = points[user_id]
+                        if haversine(lng, lat, other_lng, other_lat) <= radius:
+                            found.append(user_id)
+        return found
+
+
+class NearbyUsersIndex(GridIndex):
+    '''
+    GridIndex of non-ghost users, loaded from the database on first use and
+    reloaded in the background every NEARBY_GRID_REFRESH_SECONDS.
+    '''
+    def __init__(self, cell_size=0.25, refresh=300):
+        super(NearbyUsersIndex, self).__init__(cell_size)
+        self.refresh = refresh
+        self.loaded_at = None
+        self._reloading = threading.Lock()
+
+    def load(self):
+        User = get_user_model()
+        self.start_replace()
+        try:
+            users = User.objects.filter(
+                ghost_mode=False, last_location__isnull=False
+            ).values_list('id', 'last_location').iterator()
+            self.replace((user_id, point.x, point.y) for user_id, point in users)
+        except Exception:
+            self.cancel_replace()
+            raise
+        self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self):
+        if self.loaded_at is None:
+            with self._reloading:
+                if self.loaded_at is None:
+                    self.load()
+        elif time.monotonic() - self.loaded_at > self.refresh:
+            if self._reloading.acquire(blocking=False):
+                threading.Thread(target=self._background_reload, daemon=True).start()
+
+    def _background_reload(self):
+        try:
+            self.load()
+        finally:
+            connection.close()
+            self._reloading.release()
+
+    def update_user(self, user):
+        if user.ghost_mode:
+            self.remove(user.id)
+        else:
+            self.update(user.id, user.last_location)
+
+    def query(self, lng, lat, radius):
+        self.ensure_loaded()
+        return super(NearbyUsersIndex, self).query(lng, lat, radius)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_nearby_index():
+    '''Returns the process-wide index, or None when NEARBY_GRID_INDEX is off.'''
+    global _index
+    if not settings.NEARBY_GRID_INDEX:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearbyUsersIndex(
+                    settings.NEARBY_GRID_CELL_DEGREES,
+                    settings.NEARBY_GRID_REFRESH_SECONDS
+                )
+    return _index
@@ -0,0 +1,142 @@
+import atexit, logging, threading, time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection
+
+from src.core_auth.geocoding import get_geocoder
+from src.core_auth.geoindex import get_nearby_index
+
+logger = logging.getLogger(__name__)
+
+
+class LocationIngestBuffer(object):
+    '''
+    Accepts location updates without touching the database. Updates are
+    coalesced per user (the latest point wins) and a background thread
+    flushes them every `window` seconds in batches of `batch_size`, writing
+    only `last_location` and `address` with one statement per batch.
+
+    The buffer lives in the process memory: updates are only coalesced
+    within one worker, and the ones waiting for a flush are lost if the
+    worker is killed. That's accepted for locations, which the app sends
+    again on its next update; don't use it for data that must not be lost.
+    '''
+    def __init__(self, window=5, batch_size=500, autostart=True):
+        self.window = window
+        self.batch_size = batch_size
+        self.autostart = autostart
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, user_id, point):
+        with self._lock:
+            self._pending[user_id] = point
+        if self.autostart:
+            self._ensure_worker()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            try:
+                self._write(batch)
+            except Exception:
+                self._requeue(items[start:])
+                raise
+        return len(items)
+
+    def _requeue(self, items):
+        with self._lock:
+            for user_id, point in items:
+                self._pending.setdefault(user_id, point)
+
+    def _write(self, items):
+        # Geocode first, so no transaction is open during the lookups. A
+        # failed lookup keeps the user's current address instead of holding
+        # back the location.
+        geocoder = get_geocoder()
+        rows, failed = [], 0
+        # Sorted by user, so concurrent flushes lock the rows in the same order.
+        for user_id, point in sorted(items, key=lambda item: item[0]):
+            address, geocoded = None, True
+            if point is not None:
+                try:
+                    address = geocoder.locality(point)
+                except Exception:
+                    geocoded = False
+                    failed += 1
+            rows.append((user_id, point, address, geocoded))
+        if failed:
+            logger.warning('Could not geocode %s of %s location updates.', failed, len(rows))
+
+        table = get_user_model()._meta.db_table
+        values = ', '.join(
+            ['(%s::integer, ST_GeogFromText(%s), %s::varchar, %s::boolean)'] * len(rows)
+        )
+        params = []
+        for user_id, point, address, geocoded in rows:
+            params += [user_id, point.ewkt if point is not None else None, address, geocoded]
+        sql = f'''
+            UPDATE {table} AS account SET
+                last_location = location.last_location,
+                address = CASE WHEN location.geocoded THEN location.address ELSE account.address END
+            FROM (VALUES {values}) AS location (id, last_location, address, geocoded)
+            WHERE account.id = location.id
+            RETURNING account.id, account.ghost_mode
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            updated = cursor.fetchall()
+
+        nearby_index = get_nearby_index()
+        if nearby_index is not None:
+            points = dict(items)
+            for user_id, ghost_mode in updated:
+                if ghost_mode:
+                    nearby_index.remove(user_id)
+                else:
+                    nearby_index.update(user_id, points[user_id])
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.window)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not flush location updates.')
+            finally:
+                close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_location_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = LocationIngestBuffer(
+                    settings.LOCATION_INGEST_WINDOW,
+                    settings.LOCATION_INGEST_BATCH_SIZE
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
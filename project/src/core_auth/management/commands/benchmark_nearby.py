@@ -0,0 +1,109 @@
+import random, time
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from src.core_auth.geoindex import GridIndex
+from src.core_auth.models import User
+
+# Rough centers of a few dense metro areas; synthetic users cluster around them.
+CITY_CENTERS = [
+    (-74.006, 40.713), (-118.244, 34.052), (-87.630, 41.878), (-95.370, 29.760),
+    (-122.419, 37.775), (-80.192, 25.762), (-0.128, 51.507), (-43.173, -22.907),
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100. * (len(values) - 1))))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Compares nearby lookups through the grid index and PostGIS on synthetic users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--miles', type=float, default=25)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--skip-db', action='store_true',
+            help='Only benchmark the grid index (no synthetic users are inserted).'
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        radius = D(mi=options['miles'])
+        rng = random.Random(options['seed'])
+
+        self.stdout.write('users     path     build(s)  p50(ms)  p99(ms)  avg hits')
+        for size in sizes:
+            points = [self.synthetic_point(rng) for _ in range(size)]
+            origins = rng.sample(points, min(options['queries'], size))
+
+            build, timings, hits = self.benchmark_grid(points, origins, radius)
+            self.report(size, 'grid', build, timings, hits)
+
+            if not options['skip_db']:
+                build, timings, hits = self.benchmark_postgis(size, points, origins, radius)
+                self.report(size, 'postgis', build, timings, hits)
+
+    @staticmethod
+    def synthetic_point(rng):
+        lng, lat = rng.choice(CITY_CENTERS)
+        return (
+            max(-180, min(180, rng.gauss(lng, 0.5))),
+            max(-90, min(90, rng.gauss(lat, 0.5))),
+        )
+
+    def report(self, size, path, build, timings, hits):
+        self.stdout.write('{:<9} {:<8} {:>8.2f} {:>8.3f} {:>8.3f} {:>9.1f}'.format(
+            size, path, build,
+            percentile(timings, 50) * 1000, percentile(timings, 99) * 1000,
+            sum(hits) / len(hits)
+        ))
+
+    def benchmark_grid(self, points, origins, radius):
+        grid = GridIndex(settings.NEARBY_GRID_CELL_DEGREES)
+        start = time.perf_counter()
+        grid.replace((i, lng, lat) for i, (lng, lat) in enumerate(points))
+        build = time.perf_counter() - start
+
+        timings, hits = [], []
+        for lng, lat in origins:
+            start = time.perf_counter()
+            found = grid.query(lng, lat, radius.m)
+            timings.append(time.perf_counter() - start)
+            hits.append(len(found))
+        return build, timings, hits
+
+    def benchmark_postgis(self, size, points, origins, radius):
+        timings, hits = [], []
+        with transaction.atomic():
+            start = time.perf_counter()
+            User.objects.bulk_create((
+                User(
+                    email=f'nearby-benchmark-{size}-{i}@example.com',
+                    last_location=Point(lng, lat, srid=4326)
+                )
+                for i, (lng, lat) in enumerate(points)
+            ), batch_size=5000)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_auth_user')
+            build = time.perf_counter() - start
+
+            for lng, lat in origins:
+                origin = Point(lng, lat, srid=4326)
+                start = time.perf_counter()
+                found = list(User.objects.filter(
+                    last_location__dwithin=(origin, radius), ghost_mode=False
+                ).values_list('id', flat=True))
+                timings.append(time.perf_counter() - start)
+                hits.append(len(found))
+
+            transaction.set_rollback(True)
+        return build, timings, hits
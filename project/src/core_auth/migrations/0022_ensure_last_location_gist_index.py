@@ -0,0 +1,24 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    '''
+    `last_location` is created with a spatial index, but nearby search now
+    depends on it (ST_DWithin), so make sure databases restored from dumps
+    without it get it back. Same name Django uses, so this is a no-op on a
+    freshly migrated database.
+    '''
+
+    dependencies = [
+        ('core_auth', '0021_user_address'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS core_auth_user_last_location_id '
+            'ON core_auth_user USING GIST (last_location);',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.conf import settings
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_django', '0008_partial_timestamp'),
+        ('core_auth', '0023_geocodedlocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SocialSync',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=32)),
+                ('steps', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('completed_steps', models.IntegerField(default=0)),
+                ('response', django.contrib.postgres.fields.jsonb.JSONField(default=dict)),
+                ('details', django.contrib.postgres.fields.jsonb.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('social_auth', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='social_django.UserSocialAuth')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='social_syncs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,18 +1,24 @@
 from facebook import GraphAPIError
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.fields import ArrayField, JSONField
+from django.core.cache import cache
 from django.contrib.gis.db.models import PointField
 from django.db import models
+from django.db.models.functions import Coalesce, Greatest
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 from phonenumber_field.modelfields import PhoneNumberField
+from social_django.models import UserSocialAuth
 
 from src.pictures.services import FacebookProfilePicture
 from src.pictures.exceptions import ProfilePicturesAlbumNotFound
 
+FEATURED_USERS_CACHE_KEY = 'core_auth:featured_user_ids'
+
+
 class UserQuerySet(models.QuerySet):
     SENT = 1
     RECEIVED = 2
@@ -26,44 +32,30 @@ class UserQuerySet(models.QuerySet):
     }
 
     def with_connection_percentage_for_user(self, user):
-        user_social_count = user.social_auth.count()
         qs = self.exclude(id=user.id).annotate(
-            sent_connections_count=models.Count(
-                'connection_user_2', filter=models.Q(connection_user_2__user_1=user)
+            stats=models.FilteredRelation(
+                'connection_stats_other',
+                condition=models.Q(connection_stats_other__user=user)
             ),
-            received_connections_count=models.Count(
-                'connection_user_1', filter=models.Q(connection_user_1__user_2=user)
-            ),
-            category=models.Case(
-                models.When(
-                    models.Q(sent_connections_count__gte=1) & \
-                    models.Q(received_connections_count=0), then=UserQuerySet.SENT
-                ),
-                models.When(
-                    models.Q(received_connections_count__gte=1) & \
-                    models.Q(sent_connections_count=0), then=UserQuerySet.RECEIVED
-                ),
-                models.When(
-                    models.Q(sent_connections_count__gte=1) & \
-                    models.Q(received_connections_count__gte=1), then=UserQuerySet.BOTH
-                ),
-                default=UserQuerySet.NOTHING,
-                output_field=models.CharField(max_length=10)
-            )
-        ).distinct()
+        ).annotate(
+            sent_connections_count=Coalesce(models.F('stats__sent_count'), 0),
+            received_connections_count=Coalesce(models.F('stats__received_count'), 0),
+            category=Coalesce(models.F('stats__category'), UserQuerySet.NOTHING),
+            social_count=Greatest(models.F('stats__other_social_count'), 1),
+            user_social_count=Greatest(models.F('stats__user_social_count'), 1),
+        )
         qs = qs.annotate(
-            social_count=models.Count('social_auth'),
             connection_percentage=models.Case(
                 models.When(
                     category=UserQuerySet.BOTH,
                     then=(
                         models.F('received_connections_count') + \
                         models.F('sent_connections_count')
-                    ) * 100. / (models.F('social_count') + user_social_count)
+                    ) * 100. / (models.F('social_count') + models.F('user_social_count'))
                 ),
                 models.When(
                     category=UserQuerySet.RECEIVED,
-                    then=models.F('received_connections_count') * 100. / user_social_count),
+                    then=models.F('received_connections_count') * 100. / models.F('user_social_count')),
                 models.When(
                     category=UserQuerySet.SENT,
                     then=models.F('sent_connections_count') * 100. / models.F('social_count')),
@@ -163,6 +155,52 @@ class AuthError(models.Model):
     message = models.TextField()
 
 
+class SocialSync(models.Model):
+    '''
+    Slow social-auth pipeline steps deferred from the OAuth callback, with
+    the pipeline context they need. A background task runs the steps in
+    order and retries from the failed one.
+    '''
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='social_syncs'
+    )
+    social_auth = models.ForeignKey(
+        UserSocialAuth, on_delete=models.SET_NULL, null=True, related_name='+'
+    )
+    provider = models.CharField(max_length=32)
+    steps = JSONField(default=list)
+    completed_steps = models.IntegerField(default=0)
+    response = JSONField(default=dict)
+    details = JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class GeocodedLocation(models.Model):
+    '''Reverse geocoded locality for a quantized (latitude, longitude).'''
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    address = models.CharField(max_length=256, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('latitude', 'longitude')
+
+
 @receiver(post_save, sender=User, dispatch_uid='pull_profile_pictures')
 def pull_profile_pictures_from_facebook(sender, instance, **kwargs):
     facebook_auths = instance.social_auth.filter(provider='facebook')
@@ -182,3 +220,27 @@ def pull_profile_pictures_from_facebook(sender, instance, **kwargs):
             ]
         except (ProfilePicturesAlbumNotFound, GraphAPIError):
             pass
+
+
+def get_featured_user_ids():
+    '''
+    Ids of the featured users, cached for NEARBY_FEATURED_CACHE_TIMEOUT.
+    Saves invalidate the cache of their own process only, unless CACHES is
+    a shared backend, so other workers may serve the old list until then.
+    '''
+    return cache.get_or_set(
+        FEATURED_USERS_CACHE_KEY,
+        lambda: list(User.objects.filter(featured=True).values_list('id', flat=True)),
+        settings.NEARBY_FEATURED_CACHE_TIMEOUT
+    )
+
+
+def invalidate_featured_user_ids():
+    cache.delete(FEATURED_USERS_CACHE_KEY)
+
+
+@receiver(post_save, sender=User, dispatch_uid='refresh_featured_users_cache')
+def refresh_featured_users_cache(sender, instance, **kwargs):
+    featured_ids = cache.get(FEATURED_USERS_CACHE_KEY)
+    if featured_ids is not None and (instance.id in featured_ids) != instance.featured:
+        invalidate_featured_user_ids()
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import GEOSGeometry
+from django.contrib.gis.measure import D
+from django.db.models import Q
+
+from src.core_auth.geoindex import get_nearby_index
+from src.core_auth.models import get_featured_user_ids
+
+User = get_user_model()
+
+
+class NearbyUsersSearch(object):
+    '''
+    Finds users around `user`. The radius is snapped up to one of the
+    configured distance tiers (and capped at the largest one), and the
+    lookup uses ST_DWithin so it is answered from the GiST index on
+    `last_location` instead of computing the distance to every user.
+    With NEARBY_GRID_INDEX on, the candidates come from the in-process grid
+    index instead and the database only fetches them by id. Featured users
+    come from a cached id list.
+    '''
+    def __init__(self, user, miles=None):
+        self.user = user
+        self.radius = self.get_radius(miles)
+
+    @staticmethod
+    def get_radius(miles):
+        tiers = sorted(settings.NEARBY_DISTANCE_TIERS)
+        try:
+            miles = float(miles)
+        except (TypeError, ValueError):
+            miles = settings.NEARBY_DEFAULT_MILES
+
+        for tier in tiers:
+            if miles <= tier:
+                return D(mi=tier)
+        return D(mi=tiers[-1])
+
+    def get_nearby_filter(self):
+        nearby_index = get_nearby_index()
+        if nearby_index is None:
+            return Q(last_location__dwithin=(self.user.last_location, self.radius))
+
+        location = self.user.last_location
+        return Q(id__in=nearby_index.query(location.x, location.y, self.radius.m))
+
+    def get_queryset(self):
+        featured = Q(id__in=get_featured_user_ids())
+
+        if self.user.last_location:
+            nearby = self.get_nearby_filter() & Q(ghost_mode=False)
+            queryset = User.objects.filter(nearby | featured)
+            origin = self.user.last_location
+        else:
+            queryset = User.objects.filter(featured)
+            origin = GEOSGeometry('POINT (0 0)', srid=4326)
+
+        return queryset.annotate(
+            distance=Distance('last_location', origin)
+        ).exclude(
+            id=self.user.id
+        )
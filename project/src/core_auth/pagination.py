@@ -0,0 +1,19 @@
+from django.contrib.gis.measure import D
+
+from src.utils.pagination import KeysetPagination
+
+
+class NearbyUsersPagination(KeysetPagination):
+    keyset = ('picture_is_null', 'distance', 'id')
+
+    def encode_value(self, field, value):
+        if field == 'distance' and value is not None:
+            return value.m
+        return value
+
+    def decode_value(self, field, value):
+        if field == 'distance':
+            return D(m=float(value))
+        if field == 'picture_is_null':
+            return bool(value)
+        return int(value)
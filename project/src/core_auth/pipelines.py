@@ -1,11 +1,12 @@
 import random, string, logging
-import boto, facebook, requests
+import boto, facebook
 import googleapiclient.discovery, google.oauth2.credentials
 from boto.s3.key import Key
 
 from django.conf import settings
 
 from src.core_auth.exceptions import YoutubeChannelNotFound
+from src.utils import http
 
 USER_FIELDS = ['username', 'email']
 
@@ -95,7 +96,8 @@ def get_picture_s3_url(backend, social, user, key, response):
     if backend.name == 'facebook':
         api = facebook.GraphAPI(
             social.extra_data['access_token'],
-            version=settings.SOCIAL_AUTH_FACEBOOK_API_VERSION
+            version=settings.SOCIAL_AUTH_FACEBOOK_API_VERSION,
+            session=http.get_session()
         )
         picture_data = api.get_connections('me', 'picture?height=2048')
         key.key = 'profile-pic-{}.png'.format(user.id)
@@ -108,7 +110,7 @@ def get_picture_s3_url(backend, social, user, key, response):
             picture_url = response.get('profile_image_url', '').replace('_normal', '')
         if not picture_url:
             return
-        picture_response = requests.get(picture_url)
+        picture_response = http.get(picture_url)
         key.key = 'profile-pic-{}.png'.format(user.id)
         key.content_type = picture_response.headers['Content-Type']
         key.set_contents_from_string(picture_response.content)
@@ -1,7 +1,4 @@
-import googlemaps
-
 from rest_framework import serializers
-from django.conf import settings
 from django.contrib.auth import get_user_model
 
 from oauth2_provider.models import Application
@@ -14,7 +11,9 @@ from src.connect.models import Connection
 from src.pictures.serializers import PictureSerializer
 from src.utils.fields import PointField
 
-from src.core_auth.models import AuthError, UserQuerySet
+from src.core_auth.geocoding import get_geocoder
+from src.core_auth.geoindex import get_nearby_index
+from src.core_auth.models import AuthError, SocialSync, UserQuerySet
 
 User = get_user_model()
 
@@ -24,6 +23,12 @@ class AuthErrorSerializer(serializers.ModelSerializer):
         fields = ('provider', 'message')
 
 
+class SocialSyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SocialSync
+        fields = ('provider', 'status', 'error', 'created_at', 'updated_at')
+
+
 class SocialAuthUsernameField(serializers.Field):
     def to_representation(self, obj):
         return obj.get('username')
@@ -216,19 +221,16 @@ class LocationSerializer(serializers.ModelSerializer):
         location = self.validated_data['last_location']
         address = None
 
-        if location is not None and instance.last_location != location:
-            gmaps = googlemaps.Client(settings.GOOGLE_MAPS_API_KEY)
-            address_data = gmaps.reverse_geocode((location.y, location.x))
-            formatted = [
-                x['formatted_address'] for x in address_data
-                if 'locality' in x.get('types', [])
-            ]
-            if formatted:
-                address = formatted[0]
+        if location is not None:
+            address = get_geocoder().locality(location)
         self.instance.last_location = location
         self.instance.address = address
 
         instance.save()
+
+        nearby_index = get_nearby_index()
+        if nearby_index is not None:
+            nearby_index.update_user(instance)
         return instance
 
 
@@ -0,0 +1,71 @@
+import json
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from social_django.utils import load_strategy
+
+from src.core_auth.exceptions import YoutubeChannelNotFound
+from src.core_auth.models import AuthError, SocialSync
+from src.tasks.queue import current_task, task
+
+
+def defer_social_sync(backend, user, social, response=None, details=None, *args, **kwargs):
+    '''
+    Last step of the OAuth pipeline: stores what the deferred steps need
+    so a background task can run them after the callback has returned.
+    '''
+    sync = SocialSync.objects.create(
+        user=user, social_auth=social, provider=backend.name,
+        steps=list(settings.SOCIAL_AUTH_DEFERRED_STEPS),
+        response=json.loads(json.dumps(response or {}, default=str)),
+        details=json.loads(json.dumps(details or {}, default=str)),
+    )
+    run_social_sync.enqueue(sync.id)
+
+
+@task(max_attempts=settings.SOCIAL_SYNC_MAX_ATTEMPTS)
+def run_social_sync(sync_id):
+    '''
+    Runs the deferred steps of a sync in order. A failing step is raised so
+    the task queue retries the sync, with its backoff, from where it
+    stopped; the sync is failed once the task has no attempt left.
+    '''
+    sync = SocialSync.objects.select_related('user', 'social_auth').filter(id=sync_id).first()
+    if sync is None or sync.status in (SocialSync.DONE, SocialSync.FAILED):
+        return
+
+    social = sync.social_auth
+    if social is None:
+        _finish(sync, SocialSync.FAILED, 'Social account was removed.')
+        return
+
+    sync.status = SocialSync.RUNNING
+    sync.save(update_fields=['status', 'updated_at'])
+
+    strategy = load_strategy()
+    backend = social.get_backend_instance(strategy)
+    try:
+        for path in sync.steps[sync.completed_steps:]:
+            import_string(path)(
+                strategy=strategy, backend=backend, user=sync.user, social=social,
+                response=sync.response, details=sync.details, is_new=False
+            )
+            sync.completed_steps += 1
+            sync.save(update_fields=['completed_steps', 'updated_at'])
+    except YoutubeChannelNotFound as err:
+        AuthError.objects.create(provider=sync.provider, user=sync.user, message=str(err))
+        _finish(sync, SocialSync.FAILED, str(err))
+    except Exception as err:
+        running = current_task()
+        retried = running is not None and running.attempts < running.max_attempts
+        _finish(sync, SocialSync.PENDING if retried else SocialSync.FAILED, repr(err))
+        raise
+    else:
+        _finish(sync, SocialSync.DONE)
+
+
+def _finish(sync, status, error=''):
+    sync.status = status
+    sync.error = error
+    sync.save(update_fields=['status', 'error', 'updated_at'])
@@ -0,0 +1,52 @@
+from model_mommy import mommy
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.test import TestCase, override_settings
+
+from src.core_auth.geocoding import StubGeocoder, get_geocoder, reset_geocoder
+from src.core_auth.models import GeocodedLocation
+
+@override_settings(
+    GEOCODER_BACKEND='src.core_auth.geocoding.StubGeocoder',
+    GEOCODE_PRECISION=3, GEOCODE_CACHE_SIZE=2, GEOCODE_CACHE_TTL=60
+)
+class CachedGeocoderTestCase(TestCase):
+    def setUp(self):
+        reset_geocoder()
+        self.geocoder = get_geocoder()
+
+    def test_backend_client_is_reused(self):
+        assert isinstance(self.geocoder.backend, StubGeocoder)
+        assert get_geocoder() is self.geocoder
+
+    def test_nearby_points_share_cached_locality(self):
+        first = self.geocoder.locality(GEOSGeometry('POINT (-73.98571 40.74844)'))
+        second = self.geocoder.locality(GEOSGeometry('POINT (-73.98569 40.74841)'))
+
+        assert first == second == 'Locality 40.748, -73.986'
+        assert [(40.748, -73.986)] == self.geocoder.backend.calls
+
+    def test_locality_is_stored_in_database(self):
+        self.geocoder.locality(GEOSGeometry('POINT (2 1)'))
+        stored = GeocodedLocation.objects.get()
+        assert 'Locality 1.0, 2.0' == stored.address
+
+        reset_geocoder()
+        geocoder = get_geocoder()
+        assert 'Locality 1.0, 2.0' == geocoder.locality(GEOSGeometry('POINT (2 1)'))
+        assert [] == geocoder.backend.calls
+
+    def test_expired_database_entry_is_refreshed(self):
+        mommy.make(GeocodedLocation, latitude='1.000', longitude='2.000', address='Old')
+        GeocodedLocation.objects.update(updated_at='2000-01-01T00:00:00Z')
+
+        assert 'Locality 1.0, 2.0' == self.geocoder.locality(GEOSGeometry('POINT (2 1)'))
+        assert 'Locality 1.0, 2.0' == GeocodedLocation.objects.get().address
+
+    def test_lru_evicts_least_recently_used_entries(self):
+        for lng in (1, 2, 3):
+            self.geocoder.locality(GEOSGeometry('POINT ({} 0)'.format(lng)))
+        GeocodedLocation.objects.all().delete()
+
+        self.geocoder.locality(GEOSGeometry('POINT (1 0)'))
+        assert 4 == len(self.geocoder.backend.calls)
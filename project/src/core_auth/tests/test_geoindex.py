@@ -0,0 +1,77 @@
+from unittest.mock import patch
+from model_mommy import mommy
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from src.core_auth import geoindex
+from src.core_auth.geoindex import GridIndex
+from src.core_auth.models import User
+
+class GridIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        self.index = GridIndex(cell_size=0.25)
+
+    def test_query_returns_users_within_radius(self):
+        self.index.update(1, GEOSGeometry('POINT (0.0001 0)'))
+        self.index.update(2, GEOSGeometry('POINT (0.3 0)'))
+        self.index.update(3, GEOSGeometry('POINT (20 0)'))
+
+        assert [1] == self.index.query(0, 0, 1000)
+        assert {1, 2} == set(self.index.query(0, 0, 50000))
+
+    def test_update_moves_user_and_none_removes_it(self):
+        self.index.update(1, GEOSGeometry('POINT (0 0)'))
+        self.index.update(1, GEOSGeometry('POINT (10 10)'))
+        assert [] == self.index.query(0, 0, 1000)
+        assert [1] == self.index.query(10, 10, 1000)
+
+        self.index.update(1, None)
+        assert [] == self.index.query(10, 10, 1000)
+        assert 0 == len(self.index)
+
+    def test_writes_during_replace_are_kept(self):
+        self.index.start_replace()
+        self.index.update(1, GEOSGeometry('POINT (10 10)'))
+        self.index.remove(2)
+        self.index.replace([(1, 0, 0), (2, 0, 0), (3, 0, 0)])
+
+        assert [1] == self.index.query(10, 10, 1000)
+        assert [3] == self.index.query(0, 0, 1000)
+
+        self.index.update(3, None)
+        self.index.replace([(3, 0, 0)])
+        assert [3] == self.index.query(0, 0, 1000)
+
+    def test_query_across_antimeridian(self):
+        self.index.update(1, GEOSGeometry('POINT (-179.999 0)'))
+        assert [1] == self.index.query(179.999, 0, 1000)
+
+
+@override_settings(NEARBY_GRID_INDEX=True)
+class NearbyUsersIndexTestCase(TestCase):
+    def setUp(self):
+        patcher = patch.object(geoindex, '_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_load_skips_ghost_users_and_users_without_location(self):
+        user = mommy.make(User, last_location=GEOSGeometry('POINT (0 0)'), ghost_mode=False)
+        mommy.make(User, last_location=GEOSGeometry('POINT (0 0)'), ghost_mode=True)
+        mommy.make(User, last_location=None, ghost_mode=False)
+
+        index = geoindex.get_nearby_index()
+        assert [user.id] == index.query(0, 0, 1000)
+
+    def test_update_user_removes_ghost_users(self):
+        user = mommy.make(User, last_location=GEOSGeometry('POINT (0 0)'), ghost_mode=False)
+        index = geoindex.get_nearby_index()
+        index.ensure_loaded()
+
+        user.ghost_mode = True
+        index.update_user(user)
+        assert [] == index.query(0, 0, 1000)
+
+    @override_settings(NEARBY_GRID_INDEX=False)
+    def test_index_is_disabled_by_setting(self):
+        assert geoindex.get_nearby_index() is None
@@ -0,0 +1,18 @@
+from django.contrib.gis.measure import D
+from django.test import SimpleTestCase, override_settings
+
+from src.core_auth.nearby import NearbyUsersSearch
+
+@override_settings(NEARBY_DISTANCE_TIERS=[1, 5, 25, 100], NEARBY_DEFAULT_MILES=100)
+class NearbyUsersSearchRadiusTestCase(SimpleTestCase):
+    def test_radius_snaps_up_to_next_tier(self):
+        assert D(mi=1) == NearbyUsersSearch.get_radius('0.5')
+        assert D(mi=5) == NearbyUsersSearch.get_radius('2')
+        assert D(mi=25) == NearbyUsersSearch.get_radius(25)
+
+    def test_radius_is_capped_to_largest_tier(self):
+        assert D(mi=100) == NearbyUsersSearch.get_radius('5000')
+
+    def test_default_radius_for_missing_or_invalid_value(self):
+        assert D(mi=100) == NearbyUsersSearch.get_radius(None)
+        assert D(mi=100) == NearbyUsersSearch.get_radius('far')
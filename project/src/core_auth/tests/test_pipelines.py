@@ -129,7 +129,7 @@ class ProfileDataTestCase(TestCase):
 
     @patch('src.core_auth.pipelines.boto.connect_s3')
     @patch('src.core_auth.pipelines.Key')
-    @patch('src.core_auth.pipelines.requests')
+    @patch('src.core_auth.pipelines.http')
     def test_profile_data_for_instagram_user(self, mocked_requests, mocked_s3_key, mocked_s3):
         key = Mock()
         key.generate_url.return_value = 'https://example.com/image.png'
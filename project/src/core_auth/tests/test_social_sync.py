@@ -0,0 +1,146 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import Mock, patch
+from model_mommy import mommy
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from social_django.models import UserSocialAuth
+
+from src.core_auth.exceptions import YoutubeChannelNotFound
+from src.core_auth.models import AuthError, SocialSync
+from src.core_auth.social_sync import defer_social_sync, run_social_sync
+from src.tasks.models import Task
+from src.tasks.queue import claim_tasks, run_task
+
+User = get_user_model()
+
+calls = []
+
+def record_step(backend, user, social, response, **kwargs):
+    calls.append((user, social, response))
+
+def failing_step(**kwargs):
+    raise ValueError('provider is down')
+
+def youtube_step(**kwargs):
+    raise YoutubeChannelNotFound('Youtube channel not found.')
+
+
+@patch.object(UserSocialAuth, 'get_backend_instance', Mock())
+@patch('src.core_auth.social_sync.load_strategy', Mock())
+@override_settings(TASKS_RETRY_DELAY=30)
+class RunSocialSyncTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.social = mommy.make('UserSocialAuth', provider='facebook')
+        self.user = self.social.user
+
+    def make_sync(self, *steps):
+        return mommy.make(
+            SocialSync, user=self.user, social_auth=self.social, provider='facebook',
+            steps=[f'src.core_auth.tests.test_social_sync.{step}' for step in steps],
+            response={'id': '1'}
+        )
+
+    @override_settings(SOCIAL_AUTH_DEFERRED_STEPS=['a.step', 'b.step'])
+    def test_defer_stores_pipeline_context(self):
+        backend = Mock()
+        backend.name = 'facebook'
+        defer_social_sync(backend, self.user, self.social, response={'id': '1'}, details={})
+
+        sync = SocialSync.objects.get(user=self.user)
+        assert ['a.step', 'b.step'] == sync.steps
+        assert {'id': '1'} == sync.response
+        assert SocialSync.PENDING == sync.status
+
+        task = Task.objects.get()
+        assert 'src.core_auth.social_sync.run_social_sync' == task.name
+        assert [sync.id] == task.args
+
+    def test_runs_steps_in_order(self):
+        sync = self.make_sync('record_step', 'record_step')
+        run_social_sync(sync.id)
+
+        sync.refresh_from_db()
+        assert SocialSync.DONE == sync.status
+        assert 2 == sync.completed_steps
+        assert [(self.user, self.social, {'id': '1'})] * 2 == calls
+
+    def run_queued(self):
+        [instance] = claim_tasks()
+        return run_task(instance)
+
+    def test_failed_step_is_retried_later_from_where_it_stopped(self):
+        sync = self.make_sync('record_step', 'failing_step')
+        run_social_sync.enqueue(sync.id)
+        Task.objects.update(max_attempts=2)
+
+        instance = self.run_queued()
+        sync.refresh_from_db()
+        assert Task.QUEUED == instance.status
+        assert instance.run_after > timezone.now() + timedelta(seconds=20)
+        assert SocialSync.PENDING == sync.status
+        assert 1 == sync.completed_steps
+        assert 'provider is down' in sync.error
+
+        Task.objects.update(run_after=timezone.now())
+        instance = self.run_queued()
+        sync.refresh_from_db()
+        assert Task.FAILED == instance.status
+        assert SocialSync.FAILED == sync.status
+        assert 1 == len(calls)
+
+    def test_failed_step_outside_the_queue_fails_the_sync(self):
+        sync = self.make_sync('failing_step')
+        with pytest.raises(ValueError):
+            run_social_sync(sync.id)
+
+        sync.refresh_from_db()
+        assert SocialSync.FAILED == sync.status
+        assert not Task.objects.exists()
+
+    def test_missing_youtube_channel_is_reported_as_auth_error(self):
+        sync = self.make_sync('youtube_step')
+        run_social_sync.enqueue(sync.id)
+
+        instance = self.run_queued()
+        sync.refresh_from_db()
+        assert Task.DONE == instance.status
+        assert SocialSync.FAILED == sync.status
+        assert AuthError.objects.filter(user=self.user, provider='facebook').exists()
+
+    def test_finished_syncs_are_not_run_again(self):
+        sync = self.make_sync('record_step')
+        sync.status = SocialSync.DONE
+        sync.save()
+
+        run_social_sync(sync.id)
+        assert [] == calls
+
+
+class SocialSyncViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('user:list_social_syncs')
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        assert 401 == response.status_code
+
+    def test_lists_latest_sync_per_provider(self):
+        mommy.make(SocialSync, user=self.user, provider='facebook', status=SocialSync.FAILED)
+        mommy.make(SocialSync, user=self.user, provider='facebook', status=SocialSync.DONE)
+        mommy.make(SocialSync, user=self.user, provider='twitter', status=SocialSync.PENDING)
+        mommy.make(SocialSync, provider='twitter', status=SocialSync.DONE)
+
+        response = self.client.get(self.url)
+
+        assert 200 == response.status_code
+        statuses = {sync['provider']: sync['status'] for sync in response.json()}
+        assert {'facebook': 'done', 'twitter': 'pending'} == statuses
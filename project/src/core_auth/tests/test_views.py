@@ -2,11 +2,17 @@ from model_mommy import mommy
 from unittest.mock import Mock, patch
 from rest_framework.test import APITestCase
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from oauth2_provider.models import AccessToken
+from src.core_auth.geocoding import reset_geocoder
+from src.core_auth.location_ingest import LocationIngestBuffer
 from src.core_auth.models import AuthError
 
 User = get_user_model()
@@ -483,13 +489,14 @@ class UpdateLocationTests(APITestCase):
         self.user = mommy.make(User)
         self.client.force_authenticate(self.user)
         self.url = reverse('user:location')
+        reset_geocoder()
 
     def test_login_required(self):
         self.client.logout()
         response = self.client.put(self.url)
         assert 401 == response.status_code
 
-    @patch('src.core_auth.serializers.googlemaps')
+    @patch('src.core_auth.geocoding.googlemaps')
     def test_update_location(self, mocked_gmaps):
         gmaps_client = Mock()
         gmaps_client.reverse_geocode.return_value = [{
@@ -505,7 +512,7 @@ class UpdateLocationTests(APITestCase):
         assert 1 == user.last_location.y
         assert 'Sesame Street, 0' == user.address
 
-    @patch('src.core_auth.serializers.googlemaps')
+    @patch('src.core_auth.geocoding.googlemaps')
     def test_update_location_overrides_old_location(self, mocked_gmaps):
         gmaps_client = Mock()
         gmaps_client.reverse_geocode.return_value = [{
@@ -523,7 +530,7 @@ class UpdateLocationTests(APITestCase):
         assert 2 == user.last_location.y
         assert 'Sesame Street, 0' == user.address
 
-    @patch('src.core_auth.serializers.googlemaps')
+    @patch('src.core_auth.geocoding.googlemaps')
     def test_deletes_location_if_none_is_sent(self, mocked_gmaps):
         gmaps_client = Mock()
         mocked_gmaps.Client.return_value = gmaps_client
@@ -538,7 +545,7 @@ class UpdateLocationTests(APITestCase):
         assert user.last_location is None
         assert user.address == None
 
-    @patch('src.core_auth.serializers.googlemaps')
+    @patch('src.core_auth.geocoding.googlemaps')
     def test_sets_address_to_none_if_no_address_is_not_provided(self, mocked_gmaps):
         gmaps_client = Mock()
         gmaps_client.reverse_geocode.return_value = []
@@ -554,6 +561,25 @@ class UpdateLocationTests(APITestCase):
         assert user.address is None
 
 
+    @patch('src.core_auth.geocoding.googlemaps')
+    def test_gps_jitter_reuses_cached_address(self, mocked_gmaps):
+        gmaps_client = Mock()
+        gmaps_client.reverse_geocode.return_value = [{
+            'formatted_address': 'Sesame Street, 0',
+            'types': ['locality', 'political']
+        }]
+        mocked_gmaps.Client.return_value = gmaps_client
+
+        for lng in (2.00001, 2.00002, 2.00003):
+            data = {'last_location': {'lng': lng, 'lat': 1}}
+            response = self.client.put(self.url, data=data, format='json')
+            assert 200 == response.status_code
+
+        user = User.objects.get(id=self.user.id)
+        assert 'Sesame Street, 0' == user.address
+        mocked_gmaps.Client.assert_called_once_with(settings.GOOGLE_MAPS_API_KEY)
+        gmaps_client.reverse_geocode.assert_called_once_with((1.0, 2.0))
+
     def test_returns_400_for_incorrect_data(self):
         data = {'last_location': {'lrg': 1, 'lat': 2}}
         response = self.client.put(self.url, data=data, format='json')
@@ -562,6 +588,91 @@ class UpdateLocationTests(APITestCase):
         assert 'Point must have `lng` and `lat` keys.' == response.json()['last_location'][0]
 
 
+@override_settings(
+    LOCATION_INGEST_ASYNC=True,
+    GEOCODER_BACKEND='src.core_auth.geocoding.StubGeocoder'
+)
+class AsyncUpdateLocationTests(APITestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('user:location')
+        self.buffer = LocationIngestBuffer(autostart=False)
+        patcher = patch('src.core_auth.views.get_location_buffer', return_value=self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        reset_geocoder()
+
+    def test_update_is_accepted_without_writing(self):
+        data = {'last_location': {'lat': 1, 'lng': 2}}
+        response = self.client.put(self.url, data=data, format='json')
+        user = User.objects.get(id=self.user.id)
+
+        assert 202 == response.status_code
+        assert {'lat': 1, 'lng': 2} == response.json()['last_location']
+        assert user.last_location is None
+        assert 1 == len(self.buffer)
+
+    def test_updates_are_coalesced_per_user(self):
+        for lng in (2, 3, 4):
+            data = {'last_location': {'lat': 1, 'lng': lng}}
+            self.client.put(self.url, data=data, format='json')
+
+        assert 1 == len(self.buffer)
+        assert 1 == self.buffer.flush()
+
+        user = User.objects.get(id=self.user.id)
+        assert 4 == user.last_location.x
+        assert 1 == user.last_location.y
+        assert 'Locality 1.0, 4.0' == user.address
+        assert 0 == len(self.buffer)
+
+    def test_flush_writes_many_users_at_once(self):
+        other_user = mommy.make(User)
+        self.buffer.submit(self.user.id, GEOSGeometry('POINT (2 1)'))
+        self.buffer.submit(other_user.id, GEOSGeometry('POINT (4 3)'))
+        self.buffer.submit(0, GEOSGeometry('POINT (6 5)'))
+
+        assert 3 == self.buffer.flush()
+
+        assert 2 == User.objects.get(id=self.user.id).last_location.x
+        other_user = User.objects.get(id=other_user.id)
+        assert 4 == other_user.last_location.x
+        assert 'Locality 3.0, 4.0' == other_user.address
+
+    def test_geocoding_error_keeps_address_and_writes_location(self):
+        self.user.address = 'Sesame Street, 0'
+        self.user.save()
+        self.buffer.submit(self.user.id, GEOSGeometry('POINT (2 1)'))
+
+        with patch('src.core_auth.geocoding.StubGeocoder.reverse_geocode', side_effect=ValueError):
+            assert 1 == self.buffer.flush()
+
+        user = User.objects.get(id=self.user.id)
+        assert 2 == user.last_location.x
+        assert 'Sesame Street, 0' == user.address
+        assert 0 == len(self.buffer)
+
+    def test_flush_clears_location(self):
+        self.user.last_location = GEOSGeometry('POINT (2 1)')
+        self.user.address = 'Sesame Street, 0'
+        self.user.save()
+
+        response = self.client.put(self.url, data={'last_location': None}, format='json')
+        self.buffer.flush()
+        user = User.objects.get(id=self.user.id)
+
+        assert 202 == response.status_code
+        assert user.last_location is None
+        assert user.address is None
+
+    def test_returns_400_for_incorrect_data(self):
+        data = {'last_location': {'lrg': 1, 'lat': 2}}
+        response = self.client.put(self.url, data=data, format='json')
+        assert 400 == response.status_code
+        assert 0 == len(self.buffer)
+
+
 class NearbyUsersViewTestCase(APITestCase):
     def setUp(self):
         self.user = mommy.make(User, last_location=GEOSGeometry('POINT (0 0)'))
@@ -670,6 +781,74 @@ class NearbyUsersViewTestCase(APITestCase):
         assert featured_user_data['personal_email'] is None
         assert featured_user_data['featured'] is True
 
+    def test_get_nearby_users_paginated_with_cursor(self):
+        near_user = mommy.make(
+            User, last_location=GEOSGeometry('POINT (0.0001 0)'),
+            picture='http://example.com', ghost_mode=False, featured=False
+        )
+        far_user = mommy.make(
+            User, last_location=GEOSGeometry('POINT (0.001 0)'),
+            picture='http://example.com', ghost_mode=False, featured=False
+        )
+        no_picture_user = mommy.make(
+            User, last_location=GEOSGeometry('POINT (0.0001 0)'),
+            picture=None, ghost_mode=False, featured=False
+        )
+
+        response = self.client.get(self.url + '?miles=200&page_size=2')
+        assert 200 == response.status_code
+        content = response.json()
+        assert [near_user.id, far_user.id] == [d['id'] for d in content['results']]
+        assert content['next'] is not None
+
+        response = self.client.get(content['next'])
+        assert 200 == response.status_code
+        content = response.json()
+        assert [no_picture_user.id] == [d['id'] for d in content['results']]
+        assert content['next'] is None
+
+    def test_paginated_nearby_users_query_count_does_not_depend_on_page_size(self):
+        for i in range(6):
+            other_user = mommy.make(
+                User, last_location=GEOSGeometry('POINT (0.0001 0)'),
+                ghost_mode=False, featured=False
+            )
+            mommy.make('UserSocialAuth', user=other_user)
+            mommy.make('UserPicture', user=other_user)
+
+        with CaptureQueriesContext(connection) as small_page:
+            response = self.client.get(self.url + '?miles=200&page_size=2')
+        assert 2 == len(response.json()['results'])
+
+        with CaptureQueriesContext(connection) as large_page:
+            response = self.client.get(self.url + '?miles=200&page_size=6')
+        assert 6 == len(response.json()['results'])
+
+        assert len(small_page.captured_queries) == len(large_page.captured_queries)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(self.url + '?cursor=invalid')
+        assert 404 == response.status_code
+
+    def test_radius_is_capped_to_largest_distance_tier(self):
+        other_user = mommy.make(
+            User, last_location=GEOSGeometry('POINT (1.5 0)'),
+            ghost_mode=False, featured=False
+        )
+        response = self.client.get(self.url + '?miles=1000')
+        assert 200 == response.status_code
+        assert [] == response.json()
+
+    def test_featured_users_list_follows_featured_flag(self):
+        featured_user = mommy.make(User, featured=True, last_location=None)
+        response = self.client.get(self.url)
+        assert [featured_user.id] == [d['id'] for d in response.json()]
+
+        featured_user.featured = False
+        featured_user.save()
+        response = self.client.get(self.url)
+        assert [] == response.json()
+
 class ChangePasswordViewTests(APITestCase):
     def setUp(self):
         self.application = mommy.make(
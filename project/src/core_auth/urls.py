@@ -6,6 +6,7 @@ urlpatterns = [
     path('auth/change_password/', views.change_password, name='change_password'),
     path('auth/me/tokens/', views.tokens_list, name='list_tokens'),
     path('auth/me/tokens/errors/', views.errors_list, name='list_errors'),
+    path('auth/me/syncs/', views.social_syncs_list, name='list_social_syncs'),
     path('auth/me/tokens/<provider>/', views.tokens_get, name='get_token'),
 
     path('profile/', views.profile_update, name='profile'),
@@ -3,25 +3,28 @@ import json
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.gis.db.models.functions import Distance
-from django.contrib.gis.geos import GEOSGeometry
-from django.contrib.gis.measure import D
+from django.db import models
 from django.http import HttpResponse
 
 from oauth2_provider.oauth2_backends import OAuthLibCore
 from oauth2_provider.settings import oauth2_settings
 from oauth2_provider.views.mixins import OAuthLibMixin
 
+from rest_framework import status
 from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
+from src.core_auth.location_ingest import get_location_buffer
+from src.core_auth.nearby import NearbyUsersSearch
+from src.core_auth.pagination import NearbyUsersPagination
 from src.core_auth.serializers import (AuthErrorSerializer, ChangePasswordSerializer,
                                        LocationSerializer, NearbyUsersSerializer,
                                        ProfileSerializer, SocialProfileSerializer,
-                                       TutorialSerializer, TokenSerializer,
+                                       SocialSyncSerializer, TutorialSerializer,
+                                       TokenSerializer,
                                        UserSerializer)
 
 
@@ -60,6 +63,17 @@ class UserDetailView(RetrieveAPIView):
         return self.request.user
 
 
+class SocialSyncView(ListAPIView):
+    '''Latest deferred sync per provider, for clients polling after a login.'''
+    permission_classes = [IsAuthenticated]
+    serializer_class = SocialSyncSerializer
+
+    def get_queryset(self):
+        return self.request.user.social_syncs.order_by(
+            'provider', '-created_at', '-id'
+        ).distinct('provider')
+
+
 class AuthErrorView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = AuthErrorSerializer
@@ -115,38 +129,41 @@ class UpdateLocationView(UpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    def update(self, request, *args, **kwargs):
+        if not settings.LOCATION_INGEST_ASYNC:
+            return super(UpdateLocationView, self).update(request, *args, **kwargs)
+
+        serializer = self.get_serializer(self.get_object(), data=request.data)
+        serializer.is_valid(raise_exception=True)
+        location = serializer.validated_data['last_location']
+        get_location_buffer().submit(request.user.id, location)
+
+        data = {'last_location': serializer.fields['last_location'].to_representation(location)}
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
 
 class NearbyUsersView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = NearbyUsersSerializer
+    pagination_class = NearbyUsersPagination
 
     def get_queryset(self):
         user = self.request.user
-        miles = self.request.GET.get('miles', 100)
-        distance = D(mi=miles)
-
-        if user.last_location:
-            queryset = (User.objects.filter(
-                last_location__distance_lte=(user.last_location, distance),
-                ghost_mode=False) | User.objects.filter(featured=True)
+        search = NearbyUsersSearch(user, self.request.GET.get('miles'))
+        queryset = search.get_queryset().with_connection_percentage_for_user(user)
+        return queryset.annotate(
+            picture_is_null=models.Case(
+                models.When(picture__isnull=True, then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField()
             )
-            last_location = user.last_location
-        else:
-            queryset = User.objects.filter(featured=True)
-            last_location = GEOSGeometry('POINT (0 0)', srid=4326)
-
-        queryset = queryset.annotate(
-            distance=Distance('last_location', last_location)
-        ).exclude(
-            id=self.request.user.id
-        ).with_connection_percentage_for_user(user)
-        return queryset.extra(
-            select={'picture_is_null': 'picture is NULL'},
-            order_by=['picture_is_null',],
+        ).prefetch_related(
+            'social_auth', 'pictures'
+        ).order_by(
+            *self.paginator.get_ordering()
         )
 
 
-
 class ChangePasswordView(APIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ChangePasswordSerializer
@@ -170,6 +187,7 @@ def redirect_user_to_app(request):
 
 change_password = ChangePasswordView.as_view()
 errors_list = AuthErrorView.as_view()
+social_syncs_list = SocialSyncView.as_view()
 location_update = UpdateLocationView.as_view()
 nearby_users = NearbyUsersView.as_view()
 profile_update = UpdateProfileView.as_view()
@@ -0,0 +1,95 @@
+import logging, threading, time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+STATS = ('hits', 'stale_hits', 'misses')
+
+
+def run_in_thread(func):
+    threading.Thread(target=func, daemon=True).start()
+
+
+class FeedCache(object):
+    '''
+    Caches normalized feed posts per (viewer, target, provider) in the
+    default Django cache. Entries are fresh for the provider TTL; for the
+    following `stale` seconds they're still served while a single
+    background refresh fetches the new posts. Errors are never cached.
+
+    Hit, stale hit and miss counters are kept in the cache too. With the
+    default per-process cache (see CACHES) they, like the entries, are per
+    worker; they only add up across processes with a shared cache backend.
+    '''
+    prefix = 'feed'
+
+    def __init__(self, ttls=None, stale=None, run_async=run_in_thread):
+        self.ttls = ttls
+        self.stale = stale
+        self.run_async = run_async
+
+    def get_ttl(self, provider):
+        ttls = settings.FEED_CACHE_TTLS if self.ttls is None else self.ttls
+        return ttls.get(provider, 0)
+
+    def get_stale(self):
+        return settings.FEED_CACHE_STALE if self.stale is None else self.stale
+
+    def key(self, viewer_id, target_id, provider):
+        return f'{self.prefix}:{provider}:{viewer_id}:{target_id}'
+
+    def get_or_fetch(self, viewer_id, target_id, provider, fetch):
+        ttl = self.get_ttl(provider)
+        if not ttl:
+            return fetch()
+
+        key = self.key(viewer_id, target_id, provider)
+        entry = cache.get(key)
+        if entry is None:
+            self.incr('misses')
+            return self.refresh(key, ttl, fetch)
+
+        if time.time() - entry['fetched_at'] > ttl:
+            self.incr('stale_hits')
+            if cache.add(f'{key}:refreshing', 1, ttl):
+                self.run_async(lambda: self._background_refresh(key, ttl, fetch))
+        else:
+            self.incr('hits')
+        return entry['data']
+
+    def refresh(self, key, ttl, fetch):
+        data = fetch()
+        cache.set(key, {'data': data, 'fetched_at': time.time()}, ttl + self.get_stale())
+        return data
+
+    def _background_refresh(self, key, ttl, fetch):
+        try:
+            self.refresh(key, ttl, fetch)
+        except Exception:
+            logger.exception('Could not refresh cached feed %s.', key)
+        finally:
+            cache.delete(f'{key}:refreshing')
+            connection.close()
+
+    def incr(self, name):
+        key = f'{self.prefix}:stats:{name}'
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    def stats(self):
+        values = cache.get_many([f'{self.prefix}:stats:{name}' for name in STATS])
+        return {
+            name: values.get(f'{self.prefix}:stats:{name}', 0) for name in STATS
+        }
+
+    def reset_stats(self):
+        cache.delete_many([f'{self.prefix}:stats:{name}' for name in STATS])
+
+
+feed_cache = FeedCache()
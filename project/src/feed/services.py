@@ -1,8 +1,70 @@
-import facebook, maya, requests, twitter
+import facebook, heapq, itertools, logging, maya, twitter
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from src.connect.exceptions import CredentialsNotFound, SocialUserNotFound
+from src.feed.cache import feed_cache
+from src.utils import http
+
+logger = logging.getLogger(__name__)
+
+
+def merge_feeds(feeds):
+    '''
+    Lazily merges provider post lists into one stream, newest first.
+    Providers already return their posts newest first, so sorting each list
+    is a linear pass and the merge never materializes the combined feed.
+    '''
+    feeds = [sorted(feed, key=get_date_posted, reverse=True) for feed in feeds]
+    return heapq.merge(*feeds, key=get_date_posted, reverse=True)
+
+
+def slice_feed(posts, since=None, until=None, limit=None, skip=0):
+    '''
+    Returns (page, has_more) for a newest-first post stream, keeping posts
+    with since < date_posted < until, minus the first `skip` of them, and
+    at most `limit` of them.
+    '''
+    if until is not None:
+        posts = itertools.dropwhile(lambda post: get_date_posted(post) >= until, posts)
+    if since is not None:
+        posts = itertools.takewhile(lambda post: get_date_posted(post) > since, posts)
+    if skip:
+        posts = itertools.islice(posts, skip, None)
+    if limit is None:
+        return list(posts), False
+
+    page = list(itertools.islice(posts, limit + 1))
+    return page[:limit], len(page) > limit
+
+
+def next_cursor(page, until=None, skip=0):
+    '''
+    Returns the (until, skip) that continue a newest-first feed after
+    `page`, read with `until` and `skip`. Dates have a one second
+    resolution, so the cursor keeps the posts of the page's last second
+    and skips the ones already served, instead of cutting at that second.
+    '''
+    last = get_date_posted(page[-1])
+    served = sum(1 for post in page if get_date_posted(post) == last)
+    if until == last + 1:
+        served += skip
+    return last + 1, served
+
+
+def get_date_posted(post):
+    return post.get('date_posted') or 0
+
+
+def get_social_uid(provider, user):
+    try:
+        return user.social_auth.get(provider=provider).uid
+    except ObjectDoesNotExist:
+        raise SocialUserNotFound(provider, user)
+
 
 class InstagramFeed(object):
     '''
@@ -19,12 +81,10 @@ class InstagramFeed(object):
             raise CredentialsNotFound(self.provider, user)
 
     def get_feed(self, other_user):
-        try:
-            other_user_uid = other_user.social_auth.get(provider='instagram').uid
-        except ObjectDoesNotExist:
-            raise SocialUserNotFound(self.provider, other_user)
+        return self.fetch(get_social_uid(self.provider, other_user))
 
-        response = requests.get(
+    def fetch(self, other_user_uid):
+        response = http.get(
             'https://api.instagram.com/v1/users/{}/media/recent'.format(other_user_uid),
             params={'access_token': self.access_token}
         )
@@ -59,15 +119,14 @@ class FacebookFeed(object):
 
         return facebook.GraphAPI(
             access_token,
-            version=settings.SOCIAL_AUTH_FACEBOOK_API_VERSION
+            version=settings.SOCIAL_AUTH_FACEBOOK_API_VERSION,
+            session=http.get_session()
         )
 
     def get_feed(self, other_user):
-        try:
-            other_user_uid = other_user.social_auth.get(provider='facebook').uid
-        except ObjectDoesNotExist:
-            raise SocialUserNotFound(self.provider, other_user)
+        return self.fetch(get_social_uid(self.provider, other_user))
 
+    def fetch(self, other_user_uid):
         fields = [
             'likes.summary(true)', 'caption', 'description', 'link',
             'name', 'created_time', 'status_type', 'message',
@@ -117,12 +176,9 @@ class TwitterFeed(object):
         )
 
     def get_feed(self, other_user):
+        return self.fetch(get_social_uid(self.provider, other_user))
 
-        try:
-            other_user_uid = other_user.social_auth.get(provider=self.provider).uid
-        except ObjectDoesNotExist:
-            raise SocialUserNotFound(self.provider, other_user)
-
+    def fetch(self, other_user_uid):
         content = self.api.GetUserTimeline(user_id=other_user_uid)
 
         return [self.format_data(status) for status in content]
@@ -143,3 +199,71 @@ class TwitterFeed(object):
             'type': _type,
             'provider': 'twitter',
         }
+
+
+FEED_SERVICES = OrderedDict([
+    ('instagram', InstagramFeed),
+    ('facebook', FacebookFeed),
+    ('twitter', TwitterFeed),
+])
+
+
+class CombinedFeed(object):
+    '''
+    Fetches the feeds of every provider the other user has linked at once
+    and returns them merged newest first, as a lazy stream. Credentials and
+    uids are looked up up front, so the worker threads only do the HTTP
+    round-trips. A provider that fails or doesn't answer within
+    `timeout` seconds is reported in `errors` instead of failing the feed.
+    '''
+    def __init__(self, user, services=None, timeout=None, cache=feed_cache):
+        self.user = user
+        self.services = FEED_SERVICES if services is None else services
+        self.timeout = settings.FEED_PROVIDER_TIMEOUT if timeout is None else timeout
+        self.cache = cache
+
+    def get_feed(self, other_user):
+        uids = dict(
+            other_user.social_auth.filter(
+                provider__in=self.services
+            ).values_list('provider', 'uid')
+        )
+
+        errors = {}
+        feeds = OrderedDict()
+        for provider, Service in self.services.items():
+            if provider not in uids:
+                continue
+            try:
+                feeds[provider] = Service(self.user)
+            except CredentialsNotFound as err:
+                errors[provider] = err.message
+
+        if not feeds:
+            return iter(()), errors
+
+        executor = ThreadPoolExecutor(max_workers=len(feeds))
+        futures = {
+            executor.submit(
+                self.cache.get_or_fetch, self.user.id, other_user.id, provider,
+                partial(service.fetch, uids[provider])
+            ): provider
+            for provider, service in feeds.items()
+        }
+        done, not_done = wait(futures, timeout=self.timeout)
+        executor.shutdown(wait=False)
+
+        feeds = []
+        for future in done:
+            provider = futures[future]
+            try:
+                feeds.append(future.result())
+            except Exception as err:
+                logger.warning('Could not fetch %s feed: %r', provider, err)
+                errors[provider] = f'Could not fetch {provider} feed.'
+        for future in not_done:
+            future.cancel()
+            provider = futures[future]
+            errors[provider] = f'Timed out fetching {provider} feed.'
+
+        return merge_feeds(feeds), errors
@@ -0,0 +1,65 @@
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from src.feed.cache import FeedCache
+
+
+class FeedCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.background = []
+        self.feed_cache = FeedCache(
+            ttls={'instagram': 60}, stale=120, run_async=self.background.append
+        )
+
+    def test_miss_then_hit(self):
+        fetch = Mock(return_value=[{'date_posted': 1}])
+
+        assert [{'date_posted': 1}] == self.feed_cache.get_or_fetch(1, 2, 'instagram', fetch)
+        assert [{'date_posted': 1}] == self.feed_cache.get_or_fetch(1, 2, 'instagram', fetch)
+
+        assert 1 == fetch.call_count
+        assert {'hits': 1, 'stale_hits': 0, 'misses': 1} == self.feed_cache.stats()
+
+    def test_key_includes_viewer_target_and_provider(self):
+        keys = {
+            self.feed_cache.key(1, 2, 'instagram'),
+            self.feed_cache.key(2, 1, 'instagram'),
+            self.feed_cache.key(1, 2, 'twitter'),
+        }
+        assert 3 == len(keys)
+
+    def test_provider_without_ttl_is_not_cached(self):
+        fetch = Mock(return_value=[])
+        self.feed_cache.get_or_fetch(1, 2, 'twitter', fetch)
+        self.feed_cache.get_or_fetch(1, 2, 'twitter', fetch)
+
+        assert 2 == fetch.call_count
+        assert {'hits': 0, 'stale_hits': 0, 'misses': 0} == self.feed_cache.stats()
+
+    def test_errors_are_not_cached(self):
+        fetch = Mock(side_effect=[ValueError, ['posts']])
+        with self.assertRaises(ValueError):
+            self.feed_cache.get_or_fetch(1, 2, 'instagram', fetch)
+
+        assert ['posts'] == self.feed_cache.get_or_fetch(1, 2, 'instagram', fetch)
+
+    @patch('src.feed.cache.time')
+    def test_stale_entry_is_served_while_refreshing_once(self, mocked_time):
+        mocked_time.time.return_value = 1000
+        self.feed_cache.get_or_fetch(1, 2, 'instagram', Mock(return_value=['old']))
+
+        mocked_time.time.return_value = 1100
+        fetch = Mock(return_value=['new'])
+        assert ['old'] == self.feed_cache.get_or_fetch(1, 2, 'instagram', fetch)
+        assert ['old'] == self.feed_cache.get_or_fetch(1, 2, 'instagram', fetch)
+
+        assert 1 == len(self.background)
+        fetch.assert_not_called()
+        self.background[0]()
+
+        assert ['new'] == self.feed_cache.get_or_fetch(1, 2, 'instagram', fetch)
+        assert 1 == fetch.call_count
+        assert {'hits': 1, 'stale_hits': 2, 'misses': 1} == self.feed_cache.stats()
@@ -1,13 +1,15 @@
-import pytest, responses
+import pytest, responses, threading
 from unittest.mock import Mock, patch
 from model_mommy import mommy
 
 from twitter.models import Status
 
 from django.conf import settings
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 
-from src.feed.services import InstagramFeed, FacebookFeed, TwitterFeed
+from src.feed.services import (CombinedFeed, InstagramFeed, FacebookFeed, TwitterFeed,
+                               merge_feeds, next_cursor, slice_feed)
 from src.connect.exceptions import CredentialsNotFound, SocialUserNotFound
 
 class InstagramFeedTestCase(APITestCase):
@@ -217,3 +219,134 @@ class TwitterFeedTestCase(APITestCase):
         feed = TwitterFeed(self.user)
         with pytest.raises(SocialUserNotFound):
             feed.get_feed(other_user)
+
+
+class StubFeed(object):
+    posts = []
+    error = None
+    block = None
+
+    def __init__(self, user):
+        pass
+
+    def fetch(self, uid):
+        if self.block is not None:
+            self.block.wait(1)
+        if self.error is not None:
+            raise self.error
+        return [dict(post, uid=uid) for post in self.posts]
+
+
+class CombinedFeedTestCase(APITestCase):
+    def setUp(self):
+        self.user = mommy.make(settings.AUTH_USER_MODEL)
+        self.other_user = mommy.make(settings.AUTH_USER_MODEL)
+        for provider in ('instagram', 'facebook', 'twitter'):
+            mommy.make(
+                'UserSocialAuth', user=self.other_user, provider=provider,
+                uid=f'{provider}_uid'
+            )
+        cache.clear()
+
+    def stub(self, **attrs):
+        return type('Feed', (StubFeed,), attrs)
+
+    def test_merges_providers_by_date_posted(self):
+        services = {
+            'instagram': self.stub(posts=[{'date_posted': 3}, {'date_posted': 1}]),
+            'facebook': self.stub(posts=[{'date_posted': 2}]),
+            'twitter': self.stub(posts=[{'date_posted': 4}]),
+        }
+        data, errors = CombinedFeed(self.user, services=services).get_feed(self.other_user)
+        data = list(data)
+
+        assert {} == errors
+        assert [4, 3, 2, 1] == [post['date_posted'] for post in data]
+        assert 'twitter_uid' == data[0]['uid']
+
+    def test_returns_partial_results_when_a_provider_fails(self):
+        services = {
+            'instagram': self.stub(posts=[{'date_posted': 1}]),
+            'facebook': self.stub(error=ValueError('boom')),
+        }
+        data, errors = CombinedFeed(self.user, services=services).get_feed(self.other_user)
+
+        assert [{'date_posted': 1, 'uid': 'instagram_uid'}] == list(data)
+        assert {'facebook': 'Could not fetch facebook feed.'} == errors
+
+    def test_reports_providers_that_time_out(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        services = {
+            'instagram': self.stub(posts=[{'date_posted': 1}]),
+            'twitter': self.stub(posts=[{'date_posted': 2}], block=release),
+        }
+        data, errors = CombinedFeed(
+            self.user, services=services, timeout=0.1
+        ).get_feed(self.other_user)
+
+        assert [1] == [post['date_posted'] for post in data]
+        assert {'twitter': 'Timed out fetching twitter feed.'} == errors
+
+    def test_reports_missing_credentials(self):
+        class NoCredentials(StubFeed):
+            def __init__(self, user):
+                raise CredentialsNotFound('facebook', user)
+
+        services = {
+            'instagram': self.stub(posts=[{'date_posted': 1}]),
+            'facebook': NoCredentials,
+        }
+        data, errors = CombinedFeed(self.user, services=services).get_feed(self.other_user)
+
+        assert 1 == len(list(data))
+        assert ['facebook'] == list(errors)
+
+    def test_skips_providers_the_other_user_has_not_linked(self):
+        self.other_user.social_auth.filter(provider='twitter').delete()
+        twitter = self.stub(posts=[{'date_posted': 1}])
+        data, errors = CombinedFeed(
+            self.user, services={'twitter': twitter}
+        ).get_feed(self.other_user)
+
+        assert [] == list(data)
+        assert {} == errors
+
+
+class MergeFeedsTestCase(APITestCase):
+    def test_merges_newest_first(self):
+        feeds = [
+            [{'date_posted': 5}, {'date_posted': 1}],
+            [{'date_posted': 2}, {'date_posted': 6}],
+            [],
+        ]
+        assert [6, 5, 2, 1] == [post['date_posted'] for post in merge_feeds(feeds)]
+
+    def test_slice_stops_consuming_after_limit(self):
+        consumed = []
+
+        def stream():
+            for date_posted in range(100, 0, -1):
+                consumed.append(date_posted)
+                yield {'date_posted': date_posted}
+
+        page, has_more = slice_feed(stream(), until=90, limit=2)
+
+        assert [89, 88] == [post['date_posted'] for post in page]
+        assert has_more
+        assert 14 == len(consumed)
+
+    def test_slice_skip(self):
+        posts = [{'date_posted': i} for i in (5, 4, 4, 4, 3)]
+        page, has_more = slice_feed(iter(posts), until=5, skip=2, limit=1)
+
+        assert [posts[3]] == page
+        assert has_more
+        assert (5, 3) == next_cursor(page, until=5, skip=2)
+
+    def test_slice_since(self):
+        posts = [{'date_posted': i} for i in (5, 4, 3, 2)]
+        page, has_more = slice_feed(iter(posts), since=3)
+
+        assert [5, 4] == [post['date_posted'] for post in page]
+        assert not has_more
@@ -2,6 +2,7 @@ from unittest.mock import patch, Mock
 from model_mommy import mommy
 
 from django.conf import settings
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 
 from django.urls import reverse
@@ -12,6 +13,7 @@ class FeedViewTestCase(APITestCase):
         self.other_user = mommy.make(settings.AUTH_USER_MODEL)
         self.client.force_authenticate(self.user)
         self.url = reverse('feed:feed', kwargs={'user_id': self.other_user.id, 'provider': 'facebook'})
+        cache.clear()
 
     def test_login_required(self):
         self.client.logout()
@@ -23,9 +25,9 @@ class FeedViewTestCase(APITestCase):
     def test_get_data_from_facebook_service(self, mocked_services):
         facebook = Mock()
         facebook.get_feed.return_value = [
-            {'a': 'b', 'created_time': 1},
-            {'a': 'c', 'created_time': 2},
-            {'d': 'e', 'created_time': 0}
+            {'a': 'b', 'date_posted': 1},
+            {'a': 'c', 'date_posted': 2},
+            {'d': 'e', 'date_posted': 0}
         ]
         mocked_services.FacebookFeed.return_value = facebook
 
@@ -38,9 +40,9 @@ class FeedViewTestCase(APITestCase):
 
         assert (
             content['data'] == [
-                {'a': 'c', 'created_time': 2},
-                {'a': 'b', 'created_time': 1},
-                {'d': 'e', 'created_time': 0}
+                {'a': 'c', 'date_posted': 2},
+                {'a': 'b', 'date_posted': 1},
+                {'d': 'e', 'date_posted': 0}
             ]
         )
         assert content['user_id'] == self.other_user.id
@@ -69,3 +71,112 @@ class FeedViewTestCase(APITestCase):
         facebook.get_feed.assert_called_with(self.other_user)
 
         assert content['error'] == f'User {self.other_user.id} has private feed and is not connected.'
+
+    @patch('src.feed.views.services')
+    def test_since_until_and_limit(self, mocked_services):
+        facebook = Mock()
+        facebook.get_feed.return_value = [{'date_posted': i} for i in range(10)]
+        mocked_services.FacebookFeed.return_value = facebook
+
+        response = self.client.get(self.url, {'since': 2, 'until': 8, 'limit': 3})
+        assert 200 == response.status_code
+        content = response.json()
+
+        assert [7, 6, 5] == [post['date_posted'] for post in content['data']]
+        assert 'until=6' in content['next']
+        assert 'skip=1' in content['next']
+
+        response = self.client.get(content['next'])
+        content = response.json()
+        assert [4, 3] == [post['date_posted'] for post in content['data']]
+        assert content['next'] is None
+
+    @patch('src.feed.views.services')
+    def test_posts_sharing_a_second_are_not_skipped(self, mocked_services):
+        facebook = Mock()
+        facebook.get_feed.return_value = [
+            {'id': i, 'date_posted': date_posted}
+            for i, date_posted in enumerate([9, 8, 8, 8, 8, 7])
+        ]
+        mocked_services.FacebookFeed.return_value = facebook
+
+        ids, url, params = [], self.url, {'limit': 2}
+        while url:
+            content = self.client.get(url, params).json()
+            ids += [post['id'] for post in content['data']]
+            url, params = content['next'], None
+
+        assert [0, 1, 2, 3, 4, 5] == ids
+
+    def test_invalid_slice_params(self):
+        for params in ({'limit': 0}, {'limit': 'x'}, {'since': -1}):
+            response = self.client.get(self.url, params)
+            assert 400 == response.status_code
+
+    @patch('src.feed.views.services')
+    def test_repeated_views_are_served_from_cache(self, mocked_services):
+        facebook = Mock()
+        facebook.get_feed.return_value = [{'a': 'b', 'date_posted': 1}]
+        mocked_services.FacebookFeed.return_value = facebook
+
+        for _ in range(3):
+            response = self.client.get(self.url)
+            assert 200 == response.status_code
+            assert [{'a': 'b', 'date_posted': 1}] == response.json()['data']
+
+        assert 1 == facebook.get_feed.call_count
+
+
+class CombinedFeedViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = mommy.make(settings.AUTH_USER_MODEL)
+        self.other_user = mommy.make(settings.AUTH_USER_MODEL)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('feed:combined_feed', kwargs={'user_id': self.other_user.id})
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+
+        assert 401 == response.status_code
+
+    def test_404_for_unexistent_user(self):
+        self.other_user.delete()
+        response = self.client.get(self.url)
+        assert 404 == response.status_code
+
+    @patch('src.feed.views.services')
+    def test_returns_combined_feed_and_errors(self, mocked_services):
+        combined = Mock()
+        combined.get_feed.return_value = (
+            [{'date_posted': 2}, {'date_posted': 1}],
+            {'twitter': 'Timed out fetching twitter feed.'}
+        )
+        mocked_services.CombinedFeed.return_value = combined
+
+        response = self.client.get(self.url)
+        assert 200 == response.status_code
+        content = response.json()
+
+        mocked_services.CombinedFeed.assert_called_once_with(self.user)
+        combined.get_feed.assert_called_once_with(self.other_user)
+        assert [{'date_posted': 2}, {'date_posted': 1}] == content['data']
+        assert {'twitter': 'Timed out fetching twitter feed.'} == content['errors']
+        assert self.other_user.id == content['user_id']
+
+
+class FeedCacheStatsViewTestCase(APITestCase):
+    def setUp(self):
+        self.url = reverse('feed:cache_stats')
+        cache.clear()
+
+    def test_admin_required(self):
+        self.client.force_authenticate(mommy.make(settings.AUTH_USER_MODEL, is_staff=False))
+        response = self.client.get(self.url)
+        assert 403 == response.status_code
+
+    def test_returns_counters(self):
+        self.client.force_authenticate(mommy.make(settings.AUTH_USER_MODEL, is_staff=True))
+        response = self.client.get(self.url)
+        assert 200 == response.status_code
+        assert {'hits': 0, 'stale_hits': 0, 'misses': 0} == response.json()
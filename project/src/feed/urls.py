@@ -2,5 +2,7 @@ from django.urls import path
 from src.feed import views
 
 urlpatterns = [
+    path('cache/stats/', views.feed_cache_stats_view, name='cache_stats'),
+    path('<int:user_id>/', views.combined_feed_view, name='combined_feed'),
     path('<int:user_id>/<str:provider>/', views.feed_view, name='feed'),
 ]
@@ -1,15 +1,56 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from src.feed import services
+from src.feed.cache import feed_cache
+from src.feed.services import merge_feeds, next_cursor, slice_feed
 from src.connect.exceptions import SocialUserNotFound, CredentialsNotFound
 from src.connect.models import Connection
 
 User = get_user_model()
 
+def get_int_param(request, name, maximum=None):
+    value = request.query_params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValidationError({name: 'A valid integer is required.'})
+    if value < 0 or (name == 'limit' and value == 0):
+        raise ValidationError({name: 'Must be a positive integer.'})
+    return value if maximum is None else min(value, maximum)
+
+
+def feed_response(request, posts, **extra):
+    '''
+    Slices a newest-first post stream with the `since`, `until` (unix
+    timestamps, both exclusive), `skip` and `limit` query params. When the
+    page was cut short, `next` points to the following page.
+    '''
+    since = get_int_param(request, 'since')
+    until = get_int_param(request, 'until')
+    skip = get_int_param(request, 'skip') or 0
+    limit = get_int_param(request, 'limit', maximum=settings.FEED_MAX_LIMIT)
+
+    page, has_more = slice_feed(posts, since=since, until=until, limit=limit, skip=skip)
+    data = {'data': page}
+    if limit is not None:
+        data['next'] = None
+        if has_more:
+            next_until, next_skip = next_cursor(page, until, skip)
+            url = replace_query_param(request.build_absolute_uri(), 'until', next_until)
+            data['next'] = replace_query_param(url, 'skip', next_skip)
+    data.update(extra)
+    return Response(data)
+
+
 class FeedView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -25,12 +66,15 @@ class FeedView(APIView):
 
         try:
             service = Service(self.request.user)
-            data = service.get_feed(other_user)
+            data = feed_cache.get_or_fetch(
+                self.request.user.id, other_user.id, provider,
+                lambda: service.get_feed(other_user)
+            )
         except (SocialUserNotFound, CredentialsNotFound) as err:
             return Response({'error', str(err)}, status=status.HTTP_400_BAD_REQUEST)
 
         if not data:
-            connected = Connection.objects.filter(
+            connected = Connection.objects.done().filter(
                 provider=provider,
                 user_1=self.request.user,
                 user_2=other_user).exists()
@@ -38,8 +82,25 @@ class FeedView(APIView):
                 msg = f'User {other_user.id} has private feed and is not connected.'
                 return Response({'error': msg}, status=status.HTTP_400_BAD_REQUEST)
 
-        data = sorted(data, key=lambda x: x.get('created_time', 0), reverse=True)
-        return Response({'data': data, 'user_id': user_id})
+        return feed_response(request, merge_feeds([data]), user_id=user_id)
+
+
+class CombinedFeedView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, user_id, format=None):
+        other_user = get_object_or_404(User, id=user_id)
+        posts, errors = services.CombinedFeed(self.request.user).get_feed(other_user)
+        return feed_response(request, posts, errors=errors, user_id=user_id)
+
+
+class FeedCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(feed_cache.stats())
 
 
 feed_view = FeedView.as_view()
+combined_feed_view = CombinedFeedView.as_view()
+feed_cache_stats_view = FeedCacheStatsView.as_view()
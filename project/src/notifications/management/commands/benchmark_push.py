@@ -0,0 +1,68 @@
+import time, uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from src.core_auth.models import User
+from src.notifications import push
+from src.notifications.models import Device, Notification
+from src.notifications.services import dispatch_batch
+
+
+class Command(BaseCommand):
+    help = 'Measures push dispatch throughput on synthetic notifications with the fake backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notifications', type=int, default=10000)
+        parser.add_argument('--messages', type=int, default=10)
+        parser.add_argument('--devices', type=int, default=1, help='Devices per recipient.')
+        parser.add_argument('--max-devices', default='1,100,2000')
+        parser.add_argument('--batch', type=int, default=1000)
+        parser.add_argument('--latency', type=float, default=0.05, help='Fake seconds per request.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ids = self.create_notifications(options)
+            self.stdout.write('max devices  requests  seconds  notifications/s')
+            for max_devices in [int(value) for value in options['max_devices'].split(',')]:
+                Notification.objects.filter(id__in=ids).update(
+                    push_status=Notification.QUEUED, push_attempts=0
+                )
+                with override_settings(
+                    PUSH_BACKEND='src.notifications.push.FakePushBackend',
+                    PUSH_MAX_DEVICES=max_devices, PUSH_RATE_LIMIT=0,
+                    PUSH_FAKE_LATENCY=options['latency'], PUSH_FAKE_FAILURE_RATE=0,
+                ):
+                    push.metrics.clear()
+                    start = time.perf_counter()
+                    last_id = 0
+                    while last_id is not None:
+                        last_id, _ = dispatch_batch(options['batch'], last_id)
+                    elapsed = time.perf_counter() - start
+
+                self.stdout.write('{:<12} {:>8} {:>8.2f} {:>16.0f}'.format(
+                    max_devices, push.metrics.snapshot()['requests'], elapsed,
+                    len(ids) / elapsed
+                ))
+            transaction.set_rollback(True)
+
+    def create_notifications(self, options):
+        users = User.objects.bulk_create((
+            User(email=f'push-benchmark-{i}@example.com', notifications=True)
+            for i in range(options['notifications'])
+        ), batch_size=5000)
+        Device.objects.bulk_create((
+            Device(user=user, device_id=uuid.uuid4())
+            for user in users for _ in range(options['devices'])
+        ), batch_size=5000)
+        messages = [f'Benchmark message {i}' for i in range(options['messages'])]
+        notifications = Notification.objects.bulk_create((
+            Notification(
+                message=messages[i % len(messages)], recipient=user,
+                content_hash=Notification.hash_message(messages[i % len(messages)]),
+                push_status=Notification.QUEUED
+            )
+            for i, user in enumerate(users)
+        ), batch_size=5000)
+        return [notification.id for notification in notifications]
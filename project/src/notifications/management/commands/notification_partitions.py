@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from src.notifications.partitions import maintain_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates the upcoming monthly notification partitions and drops, or '
+        'archives, the ones past the retention period. Run it daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.NOTIFICATIONS_PARTITIONS_AHEAD)
+        parser.add_argument(
+            '--retention', type=int, default=settings.NOTIFICATIONS_RETENTION_MONTHS,
+            help='Months of notifications to keep.'
+        )
+        parser.add_argument(
+            '--archive', action='store_true', default=settings.NOTIFICATIONS_ARCHIVE,
+            help='Detach expired partitions into archive tables instead of dropping them.'
+        )
+
+    def handle(self, *args, **options):
+        created, expired = maintain_partitions(
+            options['ahead'], options['retention'], archive=options['archive']
+        )
+        for month in created:
+            self.stdout.write(f'Created partition for {month:%Y-%m}.')
+        for month in expired:
+            action = 'Archived' if options['archive'] else 'Dropped'
+            self.stdout.write(f'{action} partition for {month:%Y-%m}.')
@@ -0,0 +1,51 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import migrations, models
+
+
+def check_postgres_version(apps, schema_editor):
+    if schema_editor.connection.pg_version < 110000:
+        raise ImproperlyConfigured(
+            'The notifications migrations need PostgreSQL 11 or newer.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0010_notification_push_status'),
+    ]
+
+    operations = [
+        # sha256() is only built in from PostgreSQL 11.
+        migrations.RunPython(check_postgres_version, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='notification',
+            name='content_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            '''
+            UPDATE notifications_notification
+            SET content_hash = encode(sha256(convert_to(message, 'UTF8')), 'hex')
+            ''',
+            migrations.RunSQL.noop
+        ),
+        # Keep the oldest of the duplicates get_or_create let through, so
+        # they can be claimed in NotificationKey.
+        migrations.RunSQL(
+            '''
+            DELETE FROM notifications_notification duplicate
+            USING notifications_notification original
+            WHERE duplicate.recipient_id = original.recipient_id
+                AND duplicate.sender_id = original.sender_id
+                AND duplicate.content_hash = original.content_hash
+                AND duplicate.id > original.id
+            ''',
+            migrations.RunSQL.noop
+        ),
+    ]
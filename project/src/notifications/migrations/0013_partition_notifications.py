@@ -0,0 +1,112 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def check_postgres_version(apps, schema_editor):
+    if schema_editor.connection.pg_version < 110000:
+        raise ImproperlyConfigured(
+            'The notifications migrations need PostgreSQL 11 or newer.'
+        )
+
+
+def create_indexes(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    for name in ('sender', 'recipient'):
+        field = Notification._meta.get_field(name)
+        schema_editor.execute(schema_editor._create_index_sql(Notification, [field]))
+    for index in Notification._meta.indexes:
+        schema_editor.add_index(Notification, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0012_notification_read'),
+    ]
+
+    operations = [
+        # Default partitions and primary and foreign keys on partitioned
+        # tables are only supported from PostgreSQL 11.
+        migrations.RunPython(check_postgres_version, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='NotificationKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField()),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='notificationkey',
+            unique_together={('recipient', 'sender', 'content_hash')},
+        ),
+        migrations.AddIndex(
+            model_name='notificationkey',
+            index=models.Index(fields=['created_at'], name='notifications_key_created'),
+        ),
+        migrations.RunSQL(
+            '''
+            INSERT INTO notifications_notificationkey (recipient_id, sender_id, content_hash, created_at)
+            SELECT recipient_id, sender_id, content_hash, created_at FROM notifications_notification
+            WHERE recipient_id IS NOT NULL AND sender_id IS NOT NULL
+            ''',
+            migrations.RunSQL.noop
+        ),
+        # Rebuild the table partitioned by month on created_at: one partition
+        # per month from the oldest row through NOTIFICATIONS_PARTITIONS_AHEAD
+        # months from now, and a default partition for anything outside them.
+        migrations.RunSQL(
+            f'''
+            ALTER TABLE notifications_notification RENAME TO notifications_notification_old;
+
+            CREATE TABLE notifications_notification (
+                LIKE notifications_notification_old INCLUDING DEFAULTS
+            ) PARTITION BY RANGE (created_at);
+            ALTER SEQUENCE notifications_notification_id_seq
+                OWNED BY notifications_notification.id;
+
+            CREATE TABLE notifications_notification_default
+                PARTITION OF notifications_notification DEFAULT;
+
+            DO $$
+            DECLARE
+                bound timestamptz := date_trunc('month', COALESCE(
+                    (SELECT MIN(created_at) FROM notifications_notification_old), now()
+                ));
+            BEGIN
+                WHILE bound < date_trunc('month', now())
+                        + interval '{settings.NOTIFICATIONS_PARTITIONS_AHEAD + 1} months' LOOP
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF notifications_notification '
+                        'FOR VALUES FROM (%L) TO (%L)',
+                        'notifications_notification_' || to_char(bound, '"y"YYYY"m"MM'),
+                        bound, bound + interval '1 month'
+                    );
+                    bound := bound + interval '1 month';
+                END LOOP;
+            END $$;
+
+            INSERT INTO notifications_notification SELECT * FROM notifications_notification_old;
+            DROP TABLE notifications_notification_old;
+
+            ALTER TABLE notifications_notification ADD PRIMARY KEY (id, created_at);
+            ALTER TABLE notifications_notification
+                ADD CONSTRAINT notifications_notification_sender_id_fk
+                FOREIGN KEY (sender_id) REFERENCES core_auth_user (id)
+                DEFERRABLE INITIALLY DEFERRED;
+            ALTER TABLE notifications_notification
+                ADD CONSTRAINT notifications_notification_recipient_id_fk
+                FOREIGN KEY (recipient_id) REFERENCES core_auth_user (id)
+                DEFERRABLE INITIALLY DEFERRED;
+            ''',
+            migrations.RunSQL.noop
+        ),
+        migrations.RunPython(create_indexes, migrations.RunPython.noop),
+    ]
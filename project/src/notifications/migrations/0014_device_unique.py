@@ -0,0 +1,34 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0013_partition_notifications'),
+    ]
+
+    operations = [
+        # Keep the oldest of the devices registered more than once.
+        migrations.RunSQL(
+            '''
+            DELETE FROM notifications_device duplicate
+            USING notifications_device original
+            WHERE duplicate.user_id = original.user_id
+                AND duplicate.device_id = original.device_id
+                AND duplicate.id > original.id
+            ''',
+            migrations.RunSQL.noop
+        ),
+        migrations.AlterUniqueTogether(
+            name='device',
+            unique_together={('user', 'device_id')},
+        ),
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['device_id'], name='notifications_device_id'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.0.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0014_device_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='push_lease_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='push_status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed'), ('skipped', 'Skipped')], default='skipped', max_length=10),
+        ),
+    ]
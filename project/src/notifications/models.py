@@ -1,12 +1,156 @@
+import hashlib
+from collections import Counter, defaultdict
+
 from django.conf import settings
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+class DeviceManager(models.Manager):
+    def device_ids_for_users(self, user_ids):
+        '''
+        Returns {user_id: [device_id, ...]} for the users' devices, read
+        off the (user, device_id) unique index in one query.
+        '''
+        device_ids = defaultdict(list)
+        for user_id, device_id in self.filter(user_id__in=user_ids).values_list(
+            'user_id', 'device_id'
+        ):
+            device_ids[user_id].append(device_id)
+        return device_ids
+
 
 class Device(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     device_id = models.UUIDField(max_length=36)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DeviceManager()
+
+    class Meta:
+        unique_together = ('user', 'device_id')
+        indexes = [
+            models.Index(fields=['device_id'], name='notifications_device_id'),
+        ]
+
+class NotificationQuerySet(models.QuerySet):
+    def acknowledge(self):
+        '''
+        Marks the unread notifications as read in one statement and updates
+        the unread counters. Returns how many were marked.
+        '''
+        with transaction.atomic():
+            rows = self._returning(
+                'UPDATE {table} SET read = true WHERE NOT read AND id IN ({ids}) '
+                'RETURNING recipient_id'
+            )
+            self._discount(recipient_id for recipient_id, in rows)
+        return len(rows)
+
+    def bulk_delete(self):
+        '''
+        Deletes the notifications and their dedup keys in one statement and
+        updates the unread counters. Unlike delete(), no rows are fetched and
+        no signals are sent. Returns how many were deleted.
+        '''
+        with transaction.atomic():
+            rows = self._returning(f'''
+                WITH deleted AS (
+                    DELETE FROM {{table}} WHERE id IN ({{ids}})
+                    RETURNING recipient_id, sender_id, content_hash, read
+                ), released AS (
+                    DELETE FROM {NotificationKey._meta.db_table} AS dedup USING deleted
+                    WHERE dedup.recipient_id = deleted.recipient_id
+                        AND dedup.sender_id = deleted.sender_id
+                        AND dedup.content_hash = deleted.content_hash
+                )
+                SELECT recipient_id, read FROM deleted
+            ''')
+            self._discount(recipient_id for recipient_id, read in rows if not read)
+        return len(rows)
+
+    def _returning(self, sql):
+        ids, params = self.values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(sql.format(table=self.model._meta.db_table, ids=ids), params)
+            return cursor.fetchall()
+
+    def _discount(self, recipient_ids):
+        counts = Counter(recipient_id for recipient_id in recipient_ids if recipient_id)
+        for recipient_id, count in counts.items():
+            UnreadNotificationCounter.objects.add(recipient_id, -count)
+
+
+class NotificationManager(models.Manager.from_queryset(NotificationQuerySet)):
+    def insert_unique(self, sender, recipient, msg, push_status):
+        '''
+        Stores the notification unless the recipient already has the same
+        message from the same sender, in a single statement: the row is only
+        inserted if its (recipient, sender, content_hash) NotificationKey
+        could be claimed, so concurrent calls can't both insert it. The
+        recipient's unread counter is bumped in the same statement. Returns
+        the new id, or None if it already existed.
+        '''
+        table = self.model._meta.db_table
+        key_table = NotificationKey._meta.db_table
+        counter_table = UnreadNotificationCounter._meta.db_table
+        sql = f'''
+            WITH claimed AS (
+                INSERT INTO {key_table} (recipient_id, sender_id, content_hash, created_at)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (recipient_id, sender_id, content_hash) DO NOTHING
+                RETURNING recipient_id, sender_id, content_hash, created_at
+            ), inserted AS (
+                INSERT INTO {table} (
+                    message, sender_id, recipient_id, content_hash, created_at,
+                    push_status, push_attempts, push_error, read
+                )
+                SELECT %s, sender_id, recipient_id, content_hash, created_at, %s, 0, '', false
+                FROM claimed
+                RETURNING id, recipient_id
+            ), counted AS (
+                INSERT INTO {counter_table} (user_id, unread)
+                SELECT recipient_id, 1 FROM inserted
+                ON CONFLICT (user_id) DO UPDATE SET unread = {counter_table}.unread + 1
+            )
+            SELECT id FROM inserted
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                recipient.id, sender.id, self.model.hash_message(msg), timezone.now(),
+                msg, push_status
+            ])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+
 class Notification(models.Model):
+    '''
+    A message shown in the recipient's notification list. It also works as
+    the push outbox: rows to push are written as `queued`, in the same
+    transaction as whatever caused them, and a dispatcher sends them later.
+
+    The table is range partitioned by month on created_at (see
+    `src.notifications.partitions`), so its primary key is (id, created_at)
+    and uniqueness lives in NotificationKey.
+    '''
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+
+    PUSH_STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+        (SKIPPED, 'Skipped'),
+    )
+
     message = models.TextField()
     sender = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -21,3 +165,149 @@ class Notification(models.Model):
         blank=True, null=True
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    read = models.BooleanField(default=False)
+    content_hash = models.CharField(max_length=64, editable=False)
+    push_status = models.CharField(max_length=10, choices=PUSH_STATUS_CHOICES, default=SKIPPED)
+    push_attempts = models.IntegerField(default=0)
+    push_error = models.TextField(blank=True)
+    pushed_at = models.DateTimeField(blank=True, null=True)
+    # A dispatcher owns a `sending` row until then; after it, the row is
+    # claimed again as if the dispatcher had died mid-send.
+    push_lease_until = models.DateTimeField(blank=True, null=True)
+
+    objects = NotificationManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['push_status', 'id'], name='notifications_push_status'),
+            models.Index(
+                fields=['recipient', '-created_at', '-id'], name='notifications_recipient_recent'
+            ),
+        ]
+
+    @staticmethod
+    def hash_message(msg):
+        return hashlib.sha256(msg.encode('utf-8')).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.hash_message(self.message)
+        super(Notification, self).save(*args, **kwargs)
+
+
+class NotificationKeyManager(models.Manager):
+    def claim(self, recipient_id, sender_id, content_hash, created_at):
+        table = self.model._meta.db_table
+        sql = f'''
+            INSERT INTO {table} (recipient_id, sender_id, content_hash, created_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (recipient_id, sender_id, content_hash) DO NOTHING
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [recipient_id, sender_id, content_hash, created_at])
+
+
+class NotificationKey(models.Model):
+    '''
+    One row per (recipient, sender, message hash) with a notification, kept
+    out of the partitioned notifications table so it can be unique.
+    '''
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE
+    )
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE
+    )
+    content_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField()
+
+    objects = NotificationKeyManager()
+
+    class Meta:
+        unique_together = ('recipient', 'sender', 'content_hash')
+        indexes = [
+            models.Index(fields=['created_at'], name='notifications_key_created'),
+        ]
+
+
+class UnreadCounterManager(models.Manager):
+    def add(self, user_id, delta):
+        '''Adds `delta` to the user's unread count, never going below zero.'''
+        if delta < 0:
+            # Only existing rows are touched: deletes may come from a user
+            # cascade, where inserting would reference a user being removed.
+            self.filter(user_id=user_id).update(
+                unread=Greatest(F('unread') + delta, Value(0))
+            )
+            return
+
+        table = self.model._meta.db_table
+        sql = f'''
+            INSERT INTO {table} (user_id, unread) VALUES (%s, %s)
+            ON CONFLICT (user_id) DO UPDATE SET unread = {table}.unread + EXCLUDED.unread
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, delta])
+
+    def get_unread(self, user_id):
+        return self.filter(user_id=user_id).values_list('unread', flat=True).first() or 0
+
+
+class UnreadNotificationCounter(models.Model):
+    '''
+    Number of unread notifications per user, maintained as notifications
+    are created, read and deleted, so reading it is a primary key lookup.
+    '''
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        related_name='unread_notification_counter',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    unread = models.IntegerField(default=0)
+
+    objects = UnreadCounterManager()
+
+
+# save() that flips `read` moves the counter too; queryset update() doesn't,
+# so bulk reads go through acknowledge().
+@receiver(pre_save, sender=Notification, dispatch_uid='unread_counter_before_save')
+def remember_read(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and 'read' not in update_fields):
+        instance._was_read = instance.read
+        return
+    was_read = Notification.objects.filter(pk=instance.pk).values_list('read', flat=True).first()
+    instance._was_read = instance.read if was_read is None else was_read
+
+
+@receiver(post_save, sender=Notification, dispatch_uid='unread_counter_on_save')
+def count_saved_notification(sender, instance, created, **kwargs):
+    if not instance.recipient_id:
+        return
+    if created:
+        if not instance.read:
+            UnreadNotificationCounter.objects.add(instance.recipient_id, 1)
+    elif instance.read != instance._was_read:
+        UnreadNotificationCounter.objects.add(instance.recipient_id, -1 if instance.read else 1)
+
+
+@receiver(post_delete, sender=Notification, dispatch_uid='unread_counter_on_delete')
+def count_deleted_notification(sender, instance, **kwargs):
+    if instance.recipient_id and not instance.read:
+        UnreadNotificationCounter.objects.add(instance.recipient_id, -1)
+
+
+@receiver(post_save, sender=Notification, dispatch_uid='notification_key_on_save')
+def claim_notification_key(sender, instance, created, **kwargs):
+    if created and instance.recipient_id and instance.sender_id:
+        NotificationKey.objects.claim(
+            instance.recipient_id, instance.sender_id,
+            instance.content_hash, instance.created_at
+        )
+
+
+@receiver(post_delete, sender=Notification, dispatch_uid='notification_key_on_delete')
+def release_notification_key(sender, instance, **kwargs):
+    NotificationKey.objects.filter(
+        recipient_id=instance.recipient_id, sender_id=instance.sender_id,
+        content_hash=instance.content_hash
+    ).delete()
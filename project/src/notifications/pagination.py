@@ -0,0 +1,20 @@
+from django.utils.dateparse import parse_datetime
+
+from src.utils.pagination import KeysetPagination
+
+
+class NotificationsPagination(KeysetPagination):
+    keyset = ('-created_at', '-id')
+
+    def encode_value(self, field, value):
+        if field == 'created_at':
+            return value.isoformat()
+        return value
+
+    def decode_value(self, field, value):
+        if field == 'created_at':
+            created_at = parse_datetime(value)
+            if created_at is None:
+                raise ValueError(value)
+            return created_at
+        return int(value)
@@ -0,0 +1,179 @@
+'''
+Monthly range partitions of the notifications table, on created_at.
+
+Partitions are named `notifications_notification_yYYYYmMM` and hold the
+rows of one month; rows outside every partition land in the default one.
+`maintain_partitions` creates the upcoming partitions and expires the ones
+past the retention period, and is meant to run daily through the
+`notification_partitions` command.
+'''
+import logging, re
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from src.notifications.models import Notification, NotificationKey, UnreadNotificationCounter
+
+logger = logging.getLogger(__name__)
+
+PARENT = Notification._meta.db_table
+DEFAULT = f'{PARENT}_default'
+PARTITION_RE = re.compile(rf'^{PARENT}_y(\d{{4}})m(\d{{2}})$')
+
+
+def month_start(value):
+    return timezone.localtime(value, timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def add_months(month, months):
+    year, index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return month.replace(year=year, month=index + 1)
+
+
+def partition_name(month):
+    return f'{PARENT}_y{month:%Y}m{month:%m}'
+
+
+def archive_name(month):
+    return f'{PARENT}_archive_y{month:%Y}m{month:%m}'
+
+
+def list_partitions():
+    '''Returns the months with a partition attached, oldest first.'''
+    with connection.cursor() as cursor:
+        cursor.execute('''
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+        ''', [PARENT])
+        names = [name for name, in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            months.append(datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc))
+    return sorted(months)
+
+
+def create_partition(month):
+    '''
+    Adds the partition for `month`. Rows of that month already in the
+    default partition are moved into it first, since Postgres won't attach
+    a partition whose rows the default one still holds.
+    '''
+    name, end = partition_name(month), add_months(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)')
+        cursor.execute(f'''
+            WITH moved AS (
+                DELETE FROM {DEFAULT} WHERE created_at >= %s AND created_at < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        ''', [month, end])
+        # Bounds have to be plain literals, not the timestamptz casts
+        # psycopg2 adapts datetimes to.
+        cursor.execute(
+            f'ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)',
+            [month.isoformat(), end.isoformat()]
+        )
+
+
+def expire_partition(month, archive=False):
+    '''
+    Removes the partition for `month` along with its dedup keys, after
+    taking its unread notifications off the counters. With `archive` the
+    partition is detached and kept as a plain table instead of dropped.
+    '''
+    name, end = partition_name(month), add_months(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE')
+        _discount(cursor, name)
+        cursor.execute(
+            f'DELETE FROM {NotificationKey._meta.db_table} WHERE created_at < %s', [end]
+        )
+        if not archive:
+            cursor.execute(f'DROP TABLE {name}')
+            return
+
+        cursor.execute(f'ALTER TABLE {PARENT} DETACH PARTITION {name}')
+        # The archive must not stop users from being deleted.
+        cursor.execute('''
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f'
+        ''', [name])
+        for constraint, in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {name} DROP CONSTRAINT {constraint}')
+        cursor.execute(f'ALTER TABLE {name} RENAME TO {archive_name(month)}')
+
+
+def expire_default(before):
+    '''
+    Deletes the rows older than `before` that ended up in the default
+    partition, with their dedup keys and unread counts. Returns how many.
+    '''
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'''
+            CREATE TEMPORARY TABLE expired_notifications AS
+            WITH deleted AS (
+                DELETE FROM {DEFAULT} WHERE created_at < %s RETURNING *
+            )
+            SELECT * FROM deleted
+        ''', [before])
+        cursor.execute('SELECT COUNT(*) FROM expired_notifications')
+        count = cursor.fetchone()[0]
+        _discount(cursor, 'expired_notifications')
+        cursor.execute(f'''
+            DELETE FROM {NotificationKey._meta.db_table} AS dedup USING expired_notifications expired
+            WHERE dedup.recipient_id = expired.recipient_id
+                AND dedup.sender_id = expired.sender_id
+                AND dedup.content_hash = expired.content_hash
+        ''')
+        cursor.execute('DROP TABLE expired_notifications')
+    return count
+
+
+def _discount(cursor, table):
+    counter_table = UnreadNotificationCounter._meta.db_table
+    cursor.execute(f'''
+        UPDATE {counter_table} AS counter
+        SET unread = GREATEST(counter.unread - expired.unread, 0)
+        FROM (
+            SELECT recipient_id, COUNT(*) AS unread FROM {table}
+            WHERE recipient_id IS NOT NULL AND NOT read
+            GROUP BY recipient_id
+        ) expired
+        WHERE counter.user_id = expired.recipient_id
+    ''')
+
+
+def maintain_partitions(ahead, retention, archive=False, now=None):
+    '''
+    Makes sure the partitions from this month to `ahead` months from now
+    exist, and expires the ones older than `retention` months. Returns the
+    months created and expired.
+    '''
+    current = month_start(now or timezone.now())
+    cutoff = add_months(current, -retention)
+    existing = list_partitions()
+
+    created = [
+        month for month in (add_months(current, i) for i in range(ahead + 1))
+        if month not in existing
+    ]
+    for month in created:
+        create_partition(month)
+
+    expired = [month for month in existing if month < cutoff]
+    for month in expired:
+        expire_partition(month, archive=archive)
+    count = expire_default(cutoff)
+    if count:
+        logger.warning('Expired %s notifications from the default partition.', count)
+    return created, expired
@@ -0,0 +1,174 @@
+import random, threading, time
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from src.utils import http
+
+HEADING = 'FriendThem'
+
+
+class PushError(Exception):
+    def __init__(self, message, retry_after=None):
+        super(PushError, self).__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+class PushMetrics(object):
+    '''Push request counts and latencies, kept in memory per process.'''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def record(self, devices, seconds, failed=False):
+        with self._lock:
+            self._metrics['requests'] += 1
+            self._metrics['devices'] += devices
+            self._metrics['failures'] += int(failed)
+            self._metrics['total_seconds'] += seconds
+            self._metrics['max_seconds'] = max(self._metrics['max_seconds'], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            count = self._metrics['requests']
+            return dict(
+                self._metrics,
+                avg_seconds=self._metrics['total_seconds'] / count if count else 0.0
+            )
+
+    def clear(self):
+        with self._lock:
+            self._metrics = {
+                'requests': 0, 'devices': 0, 'failures': 0,
+                'total_seconds': 0.0, 'max_seconds': 0.0,
+            }
+
+
+metrics = PushMetrics()
+
+
+class RateLimiter(object):
+    '''Spaces calls to at most `rate` per second; a falsy rate disables it.'''
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class BasePushBackend(object):
+    '''
+    Sends one message to many devices per request, at most `max_devices`
+    at a time and `rate` requests per second. Every request is timed into
+    `metrics`; failures raise PushError.
+    '''
+    def __init__(self, max_devices, rate):
+        self.max_devices = max_devices
+        self.limiter = RateLimiter(rate)
+
+    def send(self, message, device_ids):
+        device_ids = [str(device_id) for device_id in device_ids]
+        if len(device_ids) > self.max_devices:
+            raise ValueError(f'At most {self.max_devices} devices can be sent to at once.')
+
+        self.limiter.wait()
+        start = time.monotonic()
+        try:
+            self._send(message, device_ids)
+        except Exception:
+            metrics.record(len(device_ids), time.monotonic() - start, failed=True)
+            raise
+        metrics.record(len(device_ids), time.monotonic() - start)
+
+    def _send(self, message, device_ids):
+        raise NotImplementedError
+
+
+class OneSignalBackend(BasePushBackend):
+    '''Sends through the OneSignal REST API, over the shared HTTP session.'''
+    url = 'https://onesignal.com/api/v1/notifications'
+
+    def _send(self, message, device_ids):
+        try:
+            response = http.request(
+                'POST', self.url,
+                headers={'Authorization': f'Basic {settings.ONESIGNAL_APP_KEY}'},
+                json={
+                    'app_id': settings.ONESIGNAL_APP_ID,
+                    'contents': {'en': message},
+                    'headings': {'en': HEADING},
+                    'include_player_ids': device_ids,
+                }
+            )
+        except requests.RequestException as err:
+            raise PushError(repr(err))
+
+        if response.status_code == 429:
+            try:
+                retry_after = int(response.headers.get('Retry-After', ''))
+            except ValueError:
+                retry_after = None
+            raise PushError('Rate limited.', retry_after=retry_after)
+        if not response.ok:
+            raise PushError(f'{response.status_code}: {response.text}')
+
+
+class FakePushBackend(BasePushBackend):
+    '''
+    Offline backend for tests, local development and benchmarks. Records
+    every request; PUSH_FAKE_LATENCY and PUSH_FAKE_FAILURE_RATE simulate
+    the provider round-trip and its errors.
+    '''
+    def __init__(self, max_devices, rate):
+        super(FakePushBackend, self).__init__(max_devices, rate)
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def _send(self, message, device_ids):
+        if settings.PUSH_FAKE_LATENCY:
+            time.sleep(settings.PUSH_FAKE_LATENCY)
+        if random.random() < settings.PUSH_FAKE_FAILURE_RATE:
+            raise PushError('Fake failure.')
+        with self._lock:
+            self.sent.append((message, device_ids))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_push_backend():
+    '''Returns the process-wide PUSH_BACKEND instance.'''
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.PUSH_BACKEND)(
+                    settings.PUSH_MAX_DEVICES, settings.PUSH_RATE_LIMIT
+                )
+    return _backend
+
+
+def reset_push_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+@receiver(setting_changed, dispatch_uid='reset_push_backend')
+def reset_push_backend_on_setting_changed(setting, **kwargs):
+    if setting.startswith('PUSH_'):
+        reset_push_backend()
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 from src.notifications.models import Device, Notification
+from src.notifications.pagination import NotificationsPagination
 from src.core_auth.models import User
 from src.core_auth.serializers import RetrieveUserSerializer
 
@@ -9,6 +11,12 @@ class DeviceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Device
         fields = ('user', 'device_id')
+        # Registering a device twice is not an error, see create().
+        validators = []
+
+    def create(self, validated_data):
+        device, _ = Device.objects.get_or_create(**validated_data)
+        return device
 
 class NotificationSerializer(serializers.ModelSerializer):
     recipient = serializers.HiddenField(default=serializers.CurrentUserDefault())
@@ -16,4 +24,27 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notification
-        fields = ('id', 'sender', 'recipient', 'message', 'created_at')
+        fields = ('id', 'sender', 'recipient', 'message', 'created_at', 'read')
+
+class BulkNotificationSerializer(serializers.Serializer):
+    '''
+    Selects notifications by `ids` and/or by `cursor`, a list cursor that
+    covers every notification the list would return from it on.
+    '''
+    READ = 'read'
+    DELETE = 'delete'
+
+    action = serializers.ChoiceField(choices=(READ, DELETE))
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    cursor = serializers.CharField(required=False)
+
+    def validate_cursor(self, value):
+        try:
+            return NotificationsPagination().parse_cursor(value)
+        except NotFound:
+            raise serializers.ValidationError('Invalid cursor.')
+
+    def validate(self, data):
+        if not data.get('ids') and 'cursor' not in data:
+            raise serializers.ValidationError('Either ids or cursor is required.')
+        return data
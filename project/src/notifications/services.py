@@ -1,30 +1,196 @@
-import onesignal
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
 from django.conf import settings
-from src.notifications.models import Notification
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from src.notifications.models import Device, Notification
+from src.notifications.push import get_push_backend
+from src.tasks.models import Task
+from src.tasks.queue import enqueue_task, task
+
+logger = logging.getLogger(__name__)
+
 
 def notify_user(sender, recipient, msg):
-    device_ids = recipient.device_set.all().values_list('device_id', flat=True)
-    notification, created = Notification.objects.get_or_create(
-        message=msg,
-        sender=sender,
-        recipient=recipient
+    '''
+    Stores the notification and queues its push if the recipient takes
+    notifications on some device. Only writes to the database, so it can
+    run in the same transaction as the change it's about; the push is sent
+    by `dispatch_notifications` once that commits. A notification already
+    stored is not queued again. Returns the push status.
+    '''
+    push_status = Notification.QUEUED if (
+        recipient.notifications and recipient.device_set.exists()
+    ) else Notification.SKIPPED
+    if Notification.objects.insert_unique(sender, recipient, msg, push_status) is None:
+        return Notification.objects.filter(
+            recipient=recipient, sender=sender,
+            content_hash=Notification.hash_message(msg)
+        ).values_list('push_status', flat=True).first()
+
+    if push_status == Notification.QUEUED:
+        transaction.on_commit(schedule_dispatch)
+    return push_status
+
+
+def schedule_dispatch(run_after=None):
+    '''Enqueues `dispatch_notifications` unless one is already due by `run_after`.'''
+    run_after = run_after or timezone.now()
+    waiting = Task.objects.filter(
+        name=dispatch_notifications.task_name, status=Task.QUEUED, run_after__lte=run_after
     )
-    if not created:
-        return True
+    if not waiting.exists():
+        enqueue_task(dispatch_notifications, run_after=run_after)
+
+
+@task(priority=10)
+def dispatch_notifications():
+    '''
+    Drains the queued pushes in batches of NOTIFICATIONS_PUSH_BATCH_SIZE.
+    Failed sends stay queued and are picked up again by a dispatch
+    scheduled NOTIFICATIONS_PUSH_RETRY_DELAY seconds later, or when the
+    provider asks when rate limiting us.
+    '''
+    last_id, retry_delay = 0, None
+    while last_id is not None:
+        last_id, batch_delay = dispatch_batch(settings.NOTIFICATIONS_PUSH_BATCH_SIZE, last_id)
+        if batch_delay is not None:
+            retry_delay = max(retry_delay or 0, batch_delay)
+
+    if retry_delay is not None:
+        schedule_dispatch(timezone.now() + timedelta(seconds=retry_delay))
 
-    if recipient.notifications and device_ids:
-        client = onesignal.Client(
-            app={
-            'app_auth_key': settings.ONESIGNAL_APP_KEY,
-            'app_id': settings.ONESIGNAL_APP_ID
-        })
 
-        notification = onesignal.Notification(contents={'en': msg})
-        notification.set_parameter('headings', {'en': 'FriendThem'})
+def group_pushes(notifications, device_ids, max_devices):
+    '''
+    Yields (message, notifications, device_ids) requests: notifications with
+    the same message share requests of up to `max_devices` devices.
+    '''
+    by_message = defaultdict(list)
+    for notification in notifications:
+        by_message[notification.message].append(notification)
 
-        notification.set_target_devices(list(device_ids))
+    for message, group in by_message.items():
+        chunk, devices = [], []
+        for notification in group:
+            recipient_devices = device_ids[notification.recipient_id][:max_devices]
+            if devices and len(devices) + len(recipient_devices) > max_devices:
+                yield message, chunk, devices
+                chunk, devices = [], []
+            chunk.append(notification)
+            devices += recipient_devices
+        if chunk:
+            yield message, chunk, devices
 
-        response = client.send_notification(notification)
 
-        return response.ok
-    return recipient.notifications and bool(device_ids)
+def dispatch_batch(batch_size, after_id=0):
+    '''
+    Sends the next `batch_size` pushes after `after_id` through the
+    PUSH_BACKEND, one request per message and device chunk. No transaction
+    is open while the provider is called: the rows are first claimed as
+    `sending` and committed, then sent, then their results are written
+    back. Returns the last id handled, or None when there's nothing left
+    or the provider is rate limiting us, and the delay before failed
+    pushes should be retried, or None when none failed.
+
+    A dispatcher that dies between sending and writing back leaves its
+    rows `sending`; they are claimed again once their lease runs out, so a
+    push is sent at least once.
+    '''
+    backend = get_push_backend()
+    last_id, pushes, device_ids = claim_batch(batch_size, after_id)
+    if last_id is None:
+        return None, None
+
+    sent, failed, unsent = [], [], []
+    retry_delay, rate_limited = None, False
+    for message, notifications, devices in group_pushes(
+        pushes, device_ids, backend.max_devices
+    ):
+        if rate_limited:
+            unsent += notifications
+            continue
+        try:
+            backend.send(message, devices)
+        except Exception as err:
+            logger.warning('Could not push %s notifications: %r', len(notifications), err)
+            retry_after = getattr(err, 'retry_after', None)
+            retry_delay = max(
+                retry_delay or 0, retry_after or settings.NOTIFICATIONS_PUSH_RETRY_DELAY
+            )
+            failed.append((notifications, getattr(err, 'message', repr(err))))
+            rate_limited = bool(retry_after)
+        else:
+            sent += notifications
+
+    with transaction.atomic():
+        Notification.objects.filter(id__in=[notification.id for notification in sent]).update(
+            push_status=Notification.SENT, push_attempts=F('push_attempts') + 1,
+            push_error='', pushed_at=timezone.now(), push_lease_until=None
+        )
+        for notifications, error in failed:
+            _record_failure(notifications, error)
+        Notification.objects.filter(id__in=[notification.id for notification in unsent]).update(
+            push_status=Notification.QUEUED, push_lease_until=None
+        )
+    return None if rate_limited else last_id, retry_delay
+
+
+def claim_batch(batch_size, after_id=0):
+    '''
+    Claims the next `batch_size` queued pushes after `after_id`, and the
+    `sending` ones whose lease ran out, for NOTIFICATIONS_PUSH_LEASE
+    seconds. Rows locked by another dispatcher are skipped, and rows whose
+    recipient can't take pushes are marked skipped. Returns the last id
+    seen, or None when there was nothing to claim, the notifications to
+    push and their recipients' device ids.
+    '''
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            Notification.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                Q(push_status=Notification.QUEUED) |
+                Q(push_status=Notification.SENDING, push_lease_until__lt=now),
+                id__gt=after_id
+            ).select_related('recipient').order_by('id')[:batch_size]
+        )
+        if not batch:
+            return None, [], {}
+
+        device_ids = Device.objects.device_ids_for_users(
+            {notification.recipient_id for notification in batch}
+        )
+
+        skipped, pushes = [], []
+        for notification in batch:
+            recipient = notification.recipient
+            if recipient is None or not recipient.notifications or not device_ids[recipient.id]:
+                skipped.append(notification.id)
+            else:
+                pushes.append(notification)
+        Notification.objects.filter(id__in=skipped).update(
+            push_status=Notification.SKIPPED, push_lease_until=None
+        )
+        Notification.objects.filter(id__in=[notification.id for notification in pushes]).update(
+            push_status=Notification.SENDING,
+            push_lease_until=now + timedelta(seconds=settings.NOTIFICATIONS_PUSH_LEASE)
+        )
+    return batch[-1].id, pushes, device_ids
+
+
+def _record_failure(notifications, error):
+    failed = [
+        notification.id for notification in notifications
+        if notification.push_attempts + 1 >= settings.NOTIFICATIONS_PUSH_MAX_ATTEMPTS
+    ]
+    Notification.objects.filter(
+        id__in=[notification.id for notification in notifications]
+    ).update(
+        push_status=Notification.QUEUED, push_attempts=F('push_attempts') + 1,
+        push_error=error, push_lease_until=None
+    )
+    Notification.objects.filter(id__in=failed).update(push_status=Notification.FAILED)
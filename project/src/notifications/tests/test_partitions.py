@@ -0,0 +1,94 @@
+from datetime import datetime
+from model_mommy import mommy
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from src.notifications import partitions
+from src.notifications.models import Notification, NotificationKey, UnreadNotificationCounter
+from src.notifications.services import notify_user
+
+
+def partition_of(notification):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT tableoid::regclass::text FROM {partitions.PARENT} WHERE id = %s',
+            [notification.id]
+        )
+        return cursor.fetchone()[0]
+
+
+class PartitionHelpersTestCase(TestCase):
+    def test_add_months(self):
+        month = datetime(2026, 11, 1, tzinfo=timezone.utc)
+        assert datetime(2027, 2, 1, tzinfo=timezone.utc) == partitions.add_months(month, 3)
+        assert datetime(2025, 11, 1, tzinfo=timezone.utc) == partitions.add_months(month, -12)
+
+    def test_partition_name(self):
+        month = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        assert 'notifications_notification_y2026m03' == partitions.partition_name(month)
+
+
+class MaintainPartitionsTestCase(TestCase):
+    def setUp(self):
+        self.sender = mommy.make(settings.AUTH_USER_MODEL)
+        self.recipient = mommy.make(settings.AUTH_USER_MODEL)
+        self.month = partitions.month_start(timezone.now())
+
+    def test_notifications_are_stored_in_their_month(self):
+        notify_user(self.sender, self.recipient, 'Hello')
+
+        notification = Notification.objects.get()
+        assert partitions.partition_name(self.month) == partition_of(notification)
+        assert self.month in partitions.list_partitions()
+
+    def test_create_partition_moves_rows_from_default(self):
+        later = partitions.add_months(self.month, 4)
+        notification = mommy.make(Notification, recipient=self.recipient)
+        Notification.objects.filter(id=notification.id).update(created_at=later)
+        assert partitions.DEFAULT == partition_of(notification)
+
+        created, expired = partitions.maintain_partitions(4, 12)
+
+        assert later in created
+        assert [] == expired
+        assert partitions.partition_name(later) == partition_of(notification)
+
+    def test_expire_partition(self):
+        notify_user(self.sender, self.recipient, 'Hello')
+        mommy.make(Notification, recipient=self.recipient, read=True)
+        assert 1 == UnreadNotificationCounter.objects.get_unread(self.recipient.id)
+
+        now = partitions.add_months(self.month, 1)
+        created, expired = partitions.maintain_partitions(0, 0, now=now)
+
+        assert [self.month] == expired
+        assert self.month not in partitions.list_partitions()
+        assert 0 == Notification.objects.count()
+        assert 0 == NotificationKey.objects.count()
+        assert 0 == UnreadNotificationCounter.objects.get_unread(self.recipient.id)
+
+    def test_archive_partition(self):
+        notify_user(self.sender, self.recipient, 'Hello')
+
+        now = partitions.add_months(self.month, 1)
+        partitions.maintain_partitions(0, 0, archive=True, now=now)
+
+        assert 0 == Notification.objects.count()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT message FROM {partitions.archive_name(self.month)}')
+            assert [('Hello',)] == cursor.fetchall()
+        self.recipient.delete()
+
+    def test_expire_old_rows_from_default(self):
+        notification = mommy.make(Notification, recipient=self.recipient)
+        Notification.objects.filter(id=notification.id).update(
+            created_at=partitions.add_months(self.month, -24)
+        )
+
+        partitions.maintain_partitions(0, 12)
+
+        assert not Notification.objects.exists()
+        assert 0 == UnreadNotificationCounter.objects.get_unread(self.recipient.id)
@@ -0,0 +1,80 @@
+import json, responses
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from src.notifications import push
+from src.notifications.push import OneSignalBackend, PushError, RateLimiter
+from src.utils import http
+
+
+@override_settings(ONESIGNAL_APP_ID='app-id', ONESIGNAL_APP_KEY='app-key', HTTP_RETRIES=0)
+class OneSignalBackendTestCase(SimpleTestCase):
+    def setUp(self):
+        http.reset_session()
+        push.metrics.clear()
+        self.backend = OneSignalBackend(max_devices=2, rate=0)
+
+    @responses.activate
+    def test_send_to_many_devices(self):
+        responses.add(responses.POST, OneSignalBackend.url, json={'id': '1'})
+
+        self.backend.send('Hello', ['a', 'b'])
+
+        request = responses.calls[0].request
+        assert 'Basic app-key' == request.headers['Authorization']
+        assert ['a', 'b'] == json.loads(request.body)['include_player_ids']
+        metrics = push.metrics.snapshot()
+        assert 1 == metrics['requests']
+        assert 2 == metrics['devices']
+        assert 0 == metrics['failures']
+
+    @responses.activate
+    def test_rate_limited(self):
+        responses.add(
+            responses.POST, OneSignalBackend.url, status=429, headers={'Retry-After': '30'}
+        )
+
+        with self.assertRaises(PushError) as context:
+            self.backend.send('Hello', ['a'])
+
+        assert 30 == context.exception.retry_after
+        assert 1 == push.metrics.snapshot()['failures']
+
+    @responses.activate
+    def test_error_response(self):
+        responses.add(responses.POST, OneSignalBackend.url, status=400, body='Bad Request')
+
+        with self.assertRaises(PushError) as context:
+            self.backend.send('Hello', ['a'])
+
+        assert '400: Bad Request' == context.exception.message
+        assert context.exception.retry_after is None
+
+    def test_device_limit(self):
+        with self.assertRaises(ValueError):
+            self.backend.send('Hello', ['a', 'b', 'c'])
+
+    def test_backend_is_shared(self):
+        assert push.get_push_backend() is push.get_push_backend()
+        with self.settings(PUSH_MAX_DEVICES=5):
+            assert 5 == push.get_push_backend().max_devices
+
+
+class RateLimiterTestCase(SimpleTestCase):
+    @patch('src.notifications.push.time')
+    def test_calls_are_spaced(self, mocked_time):
+        mocked_time.monotonic.return_value = 100.0
+        limiter = RateLimiter(rate=4)
+
+        limiter.wait()
+        limiter.wait()
+        limiter.wait()
+
+        assert [0.25, 0.5] == [call[0][0] for call in mocked_time.sleep.call_args_list]
+
+    @patch('src.notifications.push.time')
+    def test_no_rate(self, mocked_time):
+        limiter = RateLimiter(rate=0)
+        limiter.wait()
+        mocked_time.sleep.assert_not_called()
@@ -1,11 +1,16 @@
-from unittest.mock import Mock, patch
+from datetime import timedelta
+from unittest.mock import patch
 from model_mommy import mommy
 
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
-from src.notifications.services import notify_user
-from src.notifications.models import Notification
+from src.notifications.services import (dispatch_batch, dispatch_notifications,
+                                        notify_user, schedule_dispatch)
+from src.notifications.models import Device, Notification, NotificationKey, UnreadNotificationCounter
+from src.notifications.push import FakePushBackend, PushError, get_push_backend
+from src.tasks.models import Task
 
 class NotifyUserTestCase(TestCase):
     def setUp(self):
@@ -14,64 +19,215 @@ class NotifyUserTestCase(TestCase):
         self.device = mommy.make('Device', user=self.recipient)
         self.msg = 'Test Message'
 
-    @patch('src.notifications.services.onesignal')
-    def test_send_notification(self, onesignal):
-        client = Mock()
-        response = Mock()
-        response.ok = True
-        client.send_notification.return_value = response
-        notification = Mock()
-        onesignal.Client.return_value = client
-        onesignal.Notification.return_value = notification
-
-        notify = notify_user(self.sender, self.recipient, self.msg)
-
-        onesignal.Client.assert_called_once_with(app={
-            'app_auth_key': settings.ONESIGNAL_APP_KEY,
-            'app_id': settings.ONESIGNAL_APP_ID
-        })
-
-        onesignal.Notification.assert_called_once_with(contents={'en': self.msg})
-        notification.set_parameter.assert_called_once_with(
-            'headings', {'en': 'FriendThem'}
-        )
-        notification.set_target_devices.assert_called_once_with([self.device.device_id])
-        client.send_notification.assert_called_once_with(notification)
-
-        assert Notification.objects.first().message == self.msg
+    @patch('src.notifications.services.transaction.on_commit')
+    def test_queue_notification(self, on_commit):
+        status = notify_user(self.sender, self.recipient, self.msg)
 
-        assert notify == True
+        notification = Notification.objects.get()
+        assert notification.message == self.msg
+        assert notification.push_status == Notification.QUEUED
+        assert status == Notification.QUEUED
+        assert 1 == UnreadNotificationCounter.objects.get_unread(self.recipient.id)
+        on_commit.assert_called_once_with(schedule_dispatch)
 
-    @patch('src.notifications.services.onesignal')
-    def test_do_not_send_notification_if_user_deactivated_notifications(self, onesignal):
+    def test_do_not_queue_notification_if_user_deactivated_notifications(self):
         self.recipient.notifications = False
         self.recipient.save()
 
-        notify = notify_user(self.sender, self.recipient, self.msg)
+        status = notify_user(self.sender, self.recipient, self.msg)
 
-        onesignal.Client.assert_not_called()
-        onesignal.Notification.assert_not_called()
+        assert status == Notification.SKIPPED
+        assert Notification.objects.get().push_status == Notification.SKIPPED
 
-        assert notify == False
-
-    @patch('src.notifications.services.onesignal')
-    def test_do_not_send_notification_if_user_dont_have_devices(self, onesignal):
+    def test_do_not_queue_notification_if_user_dont_have_devices(self):
         self.device.delete()
 
-        notify = notify_user(self.sender, self.recipient, self.msg)
+        status = notify_user(self.sender, self.recipient, self.msg)
 
-        onesignal.Client.assert_not_called()
-        onesignal.Notification.assert_not_called()
+        assert status == Notification.SKIPPED
 
-        assert notify == False
+    @patch('src.notifications.services.transaction.on_commit')
+    def test_do_not_queue_notification_if_already_sent(self, on_commit):
+        mommy.make(
+            Notification, message=self.msg, sender=self.sender,
+            recipient=self.recipient, push_status=Notification.SENT
+        )
 
-    @patch('src.notifications.services.onesignal')
-    def test_do_not_send_notification_if_already_sent(self, onesignal):
+        status = notify_user(self.sender, self.recipient, self.msg)
+
+        assert status == Notification.SENT
+        assert 1 == Notification.objects.count()
+        assert 1 == UnreadNotificationCounter.objects.get_unread(self.recipient.id)
+        on_commit.assert_not_called()
+
+    @patch('src.notifications.services.transaction.on_commit')
+    def test_same_message_from_other_sender_is_queued(self, on_commit):
         mommy.make(Notification, message=self.msg, sender=self.sender, recipient=self.recipient)
+        other_sender = mommy.make(settings.AUTH_USER_MODEL)
+
+        status = notify_user(other_sender, self.recipient, self.msg)
+
+        assert status == Notification.QUEUED
+        assert 2 == Notification.objects.filter(content_hash=Notification.hash_message(self.msg)).count()
+
+    def test_deleted_notification_can_be_queued_again(self):
+        notify_user(self.sender, self.recipient, self.msg)
+        Notification.objects.get().delete()
+
+        status = notify_user(self.sender, self.recipient, self.msg)
+
+        assert status == Notification.QUEUED
+        assert 1 == Notification.objects.count()
+        assert 1 == NotificationKey.objects.count()
+
+    def test_notification_hashes_its_message(self):
+        notification = mommy.make(Notification, message=self.msg)
+        assert Notification.hash_message(self.msg) == notification.content_hash
+        assert 64 == len(notification.content_hash)
+
+
+@override_settings(
+    PUSH_BACKEND='src.notifications.push.FakePushBackend', PUSH_MAX_DEVICES=3,
+    PUSH_RATE_LIMIT=0, PUSH_FAKE_LATENCY=0, PUSH_FAKE_FAILURE_RATE=0,
+)
+class DispatchNotificationsTestCase(TestCase):
+    def setUp(self):
+        self.recipient = mommy.make(settings.AUTH_USER_MODEL, notifications=True)
+        self.device = mommy.make('Device', user=self.recipient)
+        self.notification = mommy.make(
+            Notification, message='Test Message', recipient=self.recipient,
+            push_status=Notification.QUEUED
+        )
+        self.backend = get_push_backend()
+
+    def test_send_notification(self):
+        dispatch_notifications()
+
+        assert [('Test Message', [str(self.device.device_id)])] == self.backend.sent
+        self.notification.refresh_from_db()
+        assert self.notification.push_status == Notification.SENT
+        assert self.notification.push_attempts == 1
+        assert self.notification.pushed_at is not None
+
+    def test_same_message_is_sent_to_many_devices_at_once(self):
+        others = mommy.make(settings.AUTH_USER_MODEL, notifications=True, _quantity=3)
+        for user in others:
+            mommy.make('Device', user=user)
+            mommy.make(
+                Notification, message='Test Message', recipient=user,
+                push_status=Notification.QUEUED
+            )
+        mommy.make(
+            Notification, message='Other Message', recipient=others[0],
+            push_status=Notification.QUEUED
+        )
+
+        dispatch_notifications()
+
+        assert [('Test Message', 3), ('Test Message', 1), ('Other Message', 1)] == [
+            (message, len(devices)) for message, devices in self.backend.sent
+        ]
+        assert 5 == Notification.objects.filter(push_status=Notification.SENT).count()
+
+    @override_settings(PUSH_FAKE_FAILURE_RATE=1)
+    def test_failed_send_is_retried_later(self):
+        dispatch_notifications()
+
+        self.notification.refresh_from_db()
+        assert self.notification.push_status == Notification.QUEUED
+        assert self.notification.push_attempts == 1
+        assert 'Fake failure.' == self.notification.push_error
+        task = Task.objects.get(name=dispatch_notifications.task_name)
+        assert task.run_after > self.notification.created_at
+
+    @override_settings(PUSH_FAKE_FAILURE_RATE=1, NOTIFICATIONS_PUSH_MAX_ATTEMPTS=1)
+    def test_send_fails_after_max_attempts(self):
+        dispatch_notifications()
+
+        self.notification.refresh_from_db()
+        assert self.notification.push_status == Notification.FAILED
+        assert not Task.objects.exists()
+
+    @patch.object(FakePushBackend, '_send')
+    def test_rate_limit_stops_dispatch(self, send):
+        send.side_effect = PushError('Rate limited.', retry_after=120)
+        mommy.make(Notification, recipient=self.recipient, push_status=Notification.QUEUED)
+
+        dispatch_notifications()
+
+        assert 1 == send.call_count
+        assert 2 == Notification.objects.filter(push_status=Notification.QUEUED).count()
+        task = Task.objects.get(name=dispatch_notifications.task_name)
+        assert (task.run_after - task.created_at).total_seconds() >= 119
+
+    def test_batches_are_drained_in_order(self):
+        second = mommy.make(
+            Notification, recipient=self.recipient, push_status=Notification.QUEUED
+        )
+
+        assert (self.notification.id, None) == dispatch_batch(1)
+        assert (second.id, None) == dispatch_batch(1, self.notification.id)
+        assert (None, None) == dispatch_batch(1, second.id)
+
+    @patch.object(FakePushBackend, '_send')
+    def test_rows_are_claimed_before_sending(self, send):
+        statuses = []
+        send.side_effect = lambda message, device_ids: statuses.append(
+            Notification.objects.get().push_status
+        )
+
+        dispatch_batch(10)
+
+        assert [Notification.SENDING] == statuses
+        self.notification.refresh_from_db()
+        assert self.notification.push_status == Notification.SENT
+        assert self.notification.push_lease_until is None
+
+    def test_expired_lease_is_claimed_again(self):
+        Notification.objects.filter(id=self.notification.id).update(
+            push_status=Notification.SENDING,
+            push_lease_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        dispatch_notifications()
+
+        self.notification.refresh_from_db()
+        assert self.notification.push_status == Notification.SENT
+
+    def test_active_lease_is_not_claimed(self):
+        Notification.objects.filter(id=self.notification.id).update(
+            push_status=Notification.SENDING,
+            push_lease_until=timezone.now() + timedelta(seconds=60)
+        )
+
+        assert (None, None) == dispatch_batch(10)
+        assert [] == self.backend.sent
+
+    def test_skip_recipient_without_devices(self):
+        self.device.delete()
+
+        dispatch_notifications()
+
+        self.notification.refresh_from_db()
+        assert self.notification.push_status == Notification.SKIPPED
+        assert [] == self.backend.sent
+
+    def test_schedule_dispatch_once(self):
+        schedule_dispatch()
+        schedule_dispatch()
+
+        assert 1 == Task.objects.filter(name=dispatch_notifications.task_name).count()
+
 
-        notify = notify_user(self.sender, self.recipient, self.msg)
+class DeviceIdsForUsersTestCase(TestCase):
+    def test_device_ids_by_user(self):
+        user, other_user, no_devices = mommy.make(settings.AUTH_USER_MODEL, _quantity=3)
+        devices = mommy.make(Device, user=user, _quantity=2)
+        other_device = mommy.make(Device, user=other_user)
+        mommy.make(Device)
 
-        onesignal.Client.assert_not_called()
-        onesignal.Notification.assert_not_called()
+        device_ids = Device.objects.device_ids_for_users([user.id, other_user.id, no_devices.id])
 
-        assert notify == True
+        assert {device.device_id for device in devices} == set(device_ids[user.id])
+        assert [other_device.device_id] == device_ids[other_user.id]
+        assert [] == device_ids[no_devices.id]
@@ -1,11 +1,12 @@
 import uuid
+from urllib.parse import parse_qs, urlparse
 from model_mommy import mommy
 from rest_framework.test import APITestCase
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
-from src.notifications.models import Device, Notification
+from src.notifications.models import Device, Notification, UnreadNotificationCounter
 
 User = get_user_model()
 
@@ -29,6 +30,20 @@ class DeviceAPIViewTestCase(APITestCase):
         assert device_id == device.device_id
         assert self.user == device.user
 
+    def test_register_device_twice(self):
+        device_id = uuid.uuid4()
+        mommy.make(Device, user=self.user, device_id=device_id)
+        response = self.client.post(self.url, data={'device_id': device_id})
+        assert 201 == response.status_code
+        assert 1 == Device.objects.count()
+
+    def test_same_device_for_other_user(self):
+        device_id = uuid.uuid4()
+        mommy.make(Device, device_id=device_id)
+        response = self.client.post(self.url, data={'device_id': device_id})
+        assert 201 == response.status_code
+        assert 2 == Device.objects.filter(device_id=device_id).count()
+
 class NotificationsViewTestCase(APITestCase):
     def setUp(self):
         self.user = mommy.make(User)
@@ -54,6 +69,134 @@ class NotificationsViewTestCase(APITestCase):
         assert content[0]['sender']['id'] == self.other_user.id
         assert content[0]['id'] == self.notification.id
 
+    def test_list_notifications_by_cursor(self):
+        newer = mommy.make('Notification', recipient=self.user, sender=self.other_user)
+        mommy.make('Notification', recipient=self.other_user)
+
+        response = self.client.get(self.url, {'page_size': 1})
+        assert 200 == response.status_code
+        content = response.json()
+        assert [newer.id] == [item['id'] for item in content['results']]
+        assert content['next'] is not None
+
+        response = self.client.get(content['next'])
+        content = response.json()
+        assert [self.notification.id] == [item['id'] for item in content['results']]
+        assert content['next'] is None
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'invalid'})
+        assert 404 == response.status_code
+
+    def test_senders_are_fetched_in_bulk(self):
+        for sender in mommy.make(User, _quantity=3):
+            mommy.make('UserSocialAuth', user=sender)
+            mommy.make('Notification', recipient=self.user, sender=sender)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'page_size': 10})
+        assert 4 == len(response.json()['results'])
+
+class UnreadNotificationsViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('notifications:unread_notifications')
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        assert 401 == response.status_code
+
+    def test_unread_count(self):
+        notifications = mommy.make('Notification', recipient=self.user, _quantity=3)
+        mommy.make('Notification', recipient=self.user, read=True)
+        notifications[0].delete()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        assert 200 == response.status_code
+        assert {'unread': 2} == response.json()
+
+    def test_no_notifications(self):
+        response = self.client.get(self.url)
+        assert {'unread': 0} == response.json()
+
+    def test_saving_read_updates_count(self):
+        notifications = mommy.make('Notification', recipient=self.user, _quantity=2)
+        notifications[0].read = True
+        notifications[0].save()
+        notifications[0].save()
+
+        response = self.client.get(self.url)
+        assert {'unread': 1} == response.json()
+
+        notifications[0].read = False
+        notifications[0].save(update_fields=['read'])
+        response = self.client.get(self.url)
+        assert {'unread': 2} == response.json()
+
+class BulkNotificationsViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+        self.notifications = mommy.make('Notification', recipient=self.user, _quantity=4)
+        self.other_notification = mommy.make('Notification', recipient=mommy.make(User))
+        self.client.force_authenticate(self.user)
+        self.url = reverse('notifications:bulk_notifications')
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.post(self.url)
+        assert 401 == response.status_code
+
+    def test_read_by_ids(self):
+        ids = [self.notifications[0].id, self.notifications[1].id, self.other_notification.id]
+        # SAVEPOINT, UPDATE ... RETURNING, the counter UPDATE and RELEASE.
+        with self.assertNumQueries(4):
+            response = self.client.post(self.url, {'action': 'read', 'ids': ids}, format='json')
+        assert 200 == response.status_code
+        assert {'count': 2} == response.json()
+        assert 2 == Notification.objects.filter(recipient=self.user, read=True).count()
+        assert 2 == UnreadNotificationCounter.objects.get_unread(self.user.id)
+
+        response = self.client.post(self.url, {'action': 'read', 'ids': ids}, format='json')
+        assert {'count': 0} == response.json()
+
+    def test_delete_by_cursor(self):
+        page = self.client.get(reverse('notifications:notifications'), {'page_size': 1}).json()
+        cursor = parse_qs(urlparse(page['next']).query)['cursor'][0]
+        newest = page['results'][0]['id']
+        Notification.objects.filter(id=self.notifications[0].id).acknowledge()
+
+        # SAVEPOINT, DELETE ... RETURNING, the counter UPDATE and RELEASE.
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                self.url, {'action': 'delete', 'cursor': cursor}, format='json'
+            )
+        assert 200 == response.status_code
+        assert {'count': 3} == response.json()
+        assert [newest] == list(Notification.objects.filter(recipient=self.user).values_list('id', flat=True))
+        assert Notification.objects.filter(id=self.other_notification.id).exists()
+        assert 1 == UnreadNotificationCounter.objects.get_unread(self.user.id)
+
+    def test_delete_by_ids_and_cursor(self):
+        page = self.client.get(reverse('notifications:notifications'), {'page_size': 1}).json()
+        cursor = parse_qs(urlparse(page['next']).query)['cursor'][0]
+        data = {'action': 'delete', 'ids': [page['results'][0]['id']], 'cursor': cursor}
+
+        response = self.client.post(self.url, data, format='json')
+        assert {'count': 4} == response.json()
+        assert 0 == UnreadNotificationCounter.objects.get_unread(self.user.id)
+
+    def test_ids_or_cursor_required(self):
+        response = self.client.post(self.url, {'action': 'delete'}, format='json')
+        assert 400 == response.status_code
+
+    def test_invalid_cursor(self):
+        response = self.client.post(self.url, {'action': 'delete', 'cursor': 'x'}, format='json')
+        assert 400 == response.status_code
+
+
 class DeleteNotificationsViewTestCase(APITestCase):
     def setUp(self):
         self.user = mommy.make(User)
@@ -4,5 +4,7 @@ from src.notifications import views
 urlpatterns = [
     path('', views.notifications_view, name='notifications'),
     path('device/', views.add_device_view, name='add_device'),
+    path('unread/', views.unread_notifications_view, name='unread_notifications'),
+    path('bulk/', views.bulk_notifications_view, name='bulk_notifications'),
     path('<pk>/', views.delete_notification_view, name='delete_notification')
 ]
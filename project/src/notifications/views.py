@@ -1,7 +1,14 @@
-from rest_framework.generics import CreateAPIView, DestroyAPIView, ListAPIView
-from rest_framework.permissions import IsAuthenticated
+from django.db.models import Q
+from rest_framework.generics import CreateAPIView, DestroyAPIView, GenericAPIView, ListAPIView
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.shortcuts import render
-from src.notifications.serializers import DeviceSerializer, NotificationSerializer
+from src.notifications import push
+from src.notifications.models import UnreadNotificationCounter
+from src.notifications.pagination import NotificationsPagination
+from src.notifications.serializers import (BulkNotificationSerializer, DeviceSerializer,
+                                           NotificationSerializer)
 
 class AddDeviceView(CreateAPIView):
     permission_classes = [IsAuthenticated]
@@ -10,12 +17,23 @@ class AddDeviceView(CreateAPIView):
 class ListNotificationsView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = NotificationSerializer
+    pagination_class = NotificationsPagination
 
     def get_queryset(self):
         return self.request.user.received_notifications.order_by(
             '-created_at', '-id'
+        ).select_related('sender').prefetch_related(
+            'sender__social_auth', 'sender__pictures'
         )
 
+class UnreadNotificationsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        return Response({
+            'unread': UnreadNotificationCounter.objects.get_unread(request.user.id)
+        })
+
 class DeleteNotificationView(DestroyAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = NotificationSerializer
@@ -23,6 +41,41 @@ class DeleteNotificationView(DestroyAPIView):
     def get_queryset(self):
         return self.request.user.received_notifications.all()
 
+class BulkNotificationsView(GenericAPIView):
+    '''
+    Marks as read or deletes many of the user's notifications with a single
+    statement. Returns how many were affected.
+    '''
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkNotificationSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        selected = Q(pk__in=[])
+        if data.get('ids'):
+            selected |= Q(id__in=data['ids'])
+        if data.get('cursor') is not None:
+            selected |= NotificationsPagination().get_seek_filter(data['cursor'])
+
+        notifications = request.user.received_notifications.filter(selected)
+        if data['action'] == BulkNotificationSerializer.READ:
+            count = notifications.acknowledge()
+        else:
+            count = notifications.bulk_delete()
+        return Response({'count': count})
+
+class PushMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(push.metrics.snapshot())
+
 add_device_view = AddDeviceView.as_view()
 notifications_view = ListNotificationsView.as_view()
+unread_notifications_view = UnreadNotificationsView.as_view()
+bulk_notifications_view = BulkNotificationsView.as_view()
 delete_notification_view = DeleteNotificationView.as_view()
+push_metrics_view = PushMetricsView.as_view()
@@ -5,6 +5,7 @@ from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from src.connect.exceptions import CredentialsNotFound
 from src.pictures.exceptions import ProfilePicturesAlbumNotFound
+from src.utils import http
 
 
 class FacebookProfilePicture(object):
@@ -22,7 +23,8 @@ class FacebookProfilePicture(object):
                 raise CredentialsNotFound(self.provider, user)
 
         return facebook.GraphAPI(
-            access_token, version=settings.SOCIAL_AUTH_FACEBOOK_API_VERSION
+            access_token, version=settings.SOCIAL_AUTH_FACEBOOK_API_VERSION,
+            session=http.get_session()
         )
 
     def get_profile_picture_album(self, uid='me'):
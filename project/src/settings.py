@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     'src.pictures',
     'src.invite',
     'src.competition',
+    'src.tasks',
 ]
 
 MIDDLEWARE = [
@@ -186,11 +187,30 @@ SOCIAL_AUTH_PIPELINE = [
     'social_core.pipeline.social_auth.associate_user',
     'social_core.pipeline.social_auth.load_extra_data',
     'social_core.pipeline.user.user_details',
+]
+
+# Slow steps (S3 uploads, channel lookups, friend list pagination). With
+# SOCIAL_AUTH_DEFER_STEPS they run as a background task instead of in the
+# OAuth callback.
+SOCIAL_AUTH_DEFERRED_STEPS = [
     'src.core_auth.pipelines.profile_data',
     'src.core_auth.pipelines.get_youtube_channel',
     'src.pictures.pipelines.autoset_user_pictures',
     'src.connect.pipelines.connect_existing_friends',
 ]
+SOCIAL_AUTH_DEFER_STEPS = config('SOCIAL_AUTH_DEFER_STEPS', default=True, cast=bool)
+if SOCIAL_AUTH_DEFER_STEPS:
+    SOCIAL_AUTH_PIPELINE.append('src.core_auth.social_sync.defer_social_sync')
+else:
+    SOCIAL_AUTH_PIPELINE += SOCIAL_AUTH_DEFERRED_STEPS
+
+SOCIAL_SYNC_MAX_ATTEMPTS = config('SOCIAL_SYNC_MAX_ATTEMPTS', default=5, cast=int)
+
+TASKS_ALWAYS_EAGER = config('TASKS_ALWAYS_EAGER', default=False, cast=bool)
+TASKS_MAX_ATTEMPTS = config('TASKS_MAX_ATTEMPTS', default=5, cast=int)
+TASKS_RETRY_DELAY = config('TASKS_RETRY_DELAY', default=30, cast=int)
+TASKS_TIMEOUT = config('TASKS_TIMEOUT', default=600, cast=int)
+TASKS_RETENTION_DAYS = config('TASKS_RETENTION_DAYS', default=7, cast=int)
 
 
 SOCIAL_AUTH_FACEBOOK_KEY = config('FACEBOOK_KEY')
@@ -235,8 +255,28 @@ SOCIAL_AUTH_TWITTER_SECRET = config('TWITTER_SECRET')
 
 ONESIGNAL_APP_ID = config('ONESIGNAL_APP_ID')
 ONESIGNAL_APP_KEY = config('ONESIGNAL_APP_KEY')
+NOTIFICATIONS_PUSH_BATCH_SIZE = config('NOTIFICATIONS_PUSH_BATCH_SIZE', default=1000, cast=int)
+NOTIFICATIONS_PUSH_MAX_ATTEMPTS = config('NOTIFICATIONS_PUSH_MAX_ATTEMPTS', default=5, cast=int)
+NOTIFICATIONS_PUSH_RETRY_DELAY = config('NOTIFICATIONS_PUSH_RETRY_DELAY', default=60, cast=int)
+NOTIFICATIONS_PUSH_LEASE = config('NOTIFICATIONS_PUSH_LEASE', default=300, cast=int)
+NOTIFICATIONS_RETENTION_MONTHS = config('NOTIFICATIONS_RETENTION_MONTHS', default=12, cast=int)
+NOTIFICATIONS_PARTITIONS_AHEAD = config('NOTIFICATIONS_PARTITIONS_AHEAD', default=2, cast=int)
+NOTIFICATIONS_ARCHIVE = config('NOTIFICATIONS_ARCHIVE', default=False, cast=bool)
+PUSH_BACKEND = config('PUSH_BACKEND', default='src.notifications.push.OneSignalBackend')
+PUSH_MAX_DEVICES = config('PUSH_MAX_DEVICES', default=2000, cast=int)
+PUSH_RATE_LIMIT = config('PUSH_RATE_LIMIT', default=10, cast=float)
+PUSH_FAKE_LATENCY = config('PUSH_FAKE_LATENCY', default=0, cast=float)
+PUSH_FAKE_FAILURE_RATE = config('PUSH_FAKE_FAILURE_RATE', default=0, cast=float)
 
 GOOGLE_MAPS_API_KEY = config('GOOGLE_MAPS_API_KEY')
+GEOCODER_BACKEND = config('GEOCODER_BACKEND', default='src.core_auth.geocoding.GoogleGeocoder')
+GEOCODE_PRECISION = config('GEOCODE_PRECISION', default=3, cast=int)
+GEOCODE_CACHE_SIZE = config('GEOCODE_CACHE_SIZE', default=10000, cast=int)
+GEOCODE_CACHE_TTL = config('GEOCODE_CACHE_TTL', default=60 * 60 * 24 * 30, cast=int)
+
+LOCATION_INGEST_ASYNC = config('LOCATION_INGEST_ASYNC', default=False, cast=bool)
+LOCATION_INGEST_WINDOW = config('LOCATION_INGEST_WINDOW', default=5, cast=int)
+LOCATION_INGEST_BATCH_SIZE = config('LOCATION_INGEST_BATCH_SIZE', default=500, cast=int)
 
 MAP_WIDGETS = {
     'GooglePointFieldWidget': (
@@ -246,6 +286,44 @@ MAP_WIDGETS = {
     'GOOGLE_MAP_API_KEY': GOOGLE_MAPS_API_KEY,
 }
 
+HTTP_TIMEOUT = config('HTTP_TIMEOUT', default=10, cast=float)
+HTTP_RETRIES = config('HTTP_RETRIES', default=3, cast=int)
+HTTP_BACKOFF = config('HTTP_BACKOFF', default=0.3, cast=float)
+HTTP_POOL_SIZE = config('HTTP_POOL_SIZE', default=20, cast=int)
+
+CONNECT_FRIENDS_CHUNK_SIZE = config('CONNECT_FRIENDS_CHUNK_SIZE', default=1000, cast=int)
+CONNECT_SYNC_INTERVAL = config('CONNECT_SYNC_INTERVAL', default=3600, cast=int)
+CONNECT_ASYNC = config('CONNECT_ASYNC', default=False, cast=bool)
+CONNECT_BATCH_MAX_SIZE = config('CONNECT_BATCH_MAX_SIZE', default=100, cast=int)
+CONNECT_BATCH_WORKERS = config('CONNECT_BATCH_WORKERS', default=8, cast=int)
+
+# Per-process memory by default, so cached entries, their invalidation and
+# the feed cache counters are local to each worker. Point these at a shared
+# backend (e.g. django.core.cache.backends.db.DatabaseCache, after
+# `createcachetable`) to share them.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+FEED_PROVIDER_TIMEOUT = config('FEED_PROVIDER_TIMEOUT', default=5, cast=float)
+FEED_CACHE_TTLS = {
+    'instagram': config('FEED_CACHE_TTL_INSTAGRAM', default=120, cast=int),
+    'facebook': config('FEED_CACHE_TTL_FACEBOOK', default=120, cast=int),
+    'twitter': config('FEED_CACHE_TTL_TWITTER', default=30, cast=int),
+}
+FEED_CACHE_STALE = config('FEED_CACHE_STALE', default=120, cast=int)
+FEED_MAX_LIMIT = config('FEED_MAX_LIMIT', default=100, cast=int)
+
+NEARBY_DEFAULT_MILES = config('NEARBY_DEFAULT_MILES', default=100, cast=int)
+NEARBY_DISTANCE_TIERS = config('NEARBY_DISTANCE_TIERS', default='1,5,25,100', cast=Csv(int))
+NEARBY_FEATURED_CACHE_TIMEOUT = config('NEARBY_FEATURED_CACHE_TIMEOUT', default=60, cast=int)
+NEARBY_GRID_INDEX = config('NEARBY_GRID_INDEX', default=False, cast=bool)
+NEARBY_GRID_CELL_DEGREES = config('NEARBY_GRID_CELL_DEGREES', default=0.25, cast=float)
+NEARBY_GRID_REFRESH_SECONDS = config('NEARBY_GRID_REFRESH_SECONDS', default=300, cast=int)
+
 GDAL_LIBRARY_PATH = config('GDAL_LIBRARY_PATH', default='')
 GEOS_LIBRARY_PATH = config('GEOS_LIBRARY_PATH', default='')
 
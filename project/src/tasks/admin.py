@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from src.tasks.models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'name', 'status', 'priority', 'attempts', 'run_after', 'finished_at', 'duration'
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'duration')
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from src.tasks.queue import claim_tasks, purge_finished_tasks, run_task
+
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=10)
+        parser.add_argument('--sleep', type=float, default=1)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when there are no due tasks left.'
+        )
+
+    def handle(self, *args, **options):
+        purged_at = 0
+        while True:
+            close_old_connections()
+            tasks = claim_tasks(options['batch'])
+            for instance in tasks:
+                run_task(instance)
+                self.stdout.write(
+                    f'{instance.name} [{instance.id}]: {instance.status} '
+                    f'in {instance.duration:.3f}s'
+                )
+
+            if tasks:
+                continue
+            if options['once']:
+                return
+
+            if time.monotonic() - purged_at > PURGE_INTERVAL:
+                purge_finished_tasks(
+                    timezone.now() - timedelta(days=settings.TASKS_RETENTION_DAYS)
+                )
+                purged_at = time.monotonic()
+            time.sleep(options['sleep'])
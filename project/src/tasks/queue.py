@@ -0,0 +1,136 @@
+import functools, logging, threading, time, traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from src.tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+_running = threading.local()
+
+
+def task(func=None, priority=0, max_attempts=None):
+    '''
+    Marks `func` as a task. `func.enqueue(*args, **kwargs)` stores the call
+    for a `run_tasks` worker; arguments must be JSON serializable. Failed
+    calls are retried with exponential backoff up to `max_attempts`
+    (TASKS_MAX_ATTEMPTS by default).
+    '''
+    if func is None:
+        return functools.partial(task, priority=priority, max_attempts=max_attempts)
+
+    func.task_name = f'{func.__module__}.{func.__qualname__}'
+    func.task_priority = priority
+    func.task_max_attempts = max_attempts
+    func.enqueue = functools.partial(enqueue, func)
+    return func
+
+
+def enqueue(func, *args, **kwargs):
+    return enqueue_task(func, args, kwargs)
+
+
+def enqueue_task(func, args=(), kwargs=None, priority=None, run_after=None):
+    max_attempts = func.task_max_attempts or settings.TASKS_MAX_ATTEMPTS
+    instance = Task.objects.create(
+        name=func.task_name, args=list(args), kwargs=kwargs or {},
+        priority=func.task_priority if priority is None else priority,
+        max_attempts=max_attempts, run_after=run_after or timezone.now()
+    )
+    if settings.TASKS_ALWAYS_EAGER and instance.run_after <= timezone.now():
+        instance.status = Task.RUNNING
+        instance.attempts = 1
+        instance.started_at = timezone.now()
+        run_task(instance)
+    return instance
+
+
+def claim_tasks(limit=10):
+    '''
+    Marks up to `limit` due tasks as running, highest priority first, and
+    returns them. Rows locked by another worker are skipped; tasks left
+    running for longer than TASKS_TIMEOUT (a dead worker) are claimed again.
+    '''
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.TASKS_TIMEOUT)
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update(skip_locked=True).filter(
+                Q(status=Task.QUEUED, run_after__lte=now) |
+                Q(status=Task.RUNNING, started_at__lt=stale)
+            ).order_by('-priority', 'run_after')[:limit]
+        )
+        Task.objects.filter(id__in=[instance.id for instance in tasks]).update(
+            status=Task.RUNNING, started_at=now, attempts=F('attempts') + 1
+        )
+    for instance in tasks:
+        instance.status = Task.RUNNING
+        instance.started_at = now
+        instance.attempts += 1
+    return tasks
+
+
+def current_task():
+    '''The Task `run_task` is running in this thread, None outside of one.'''
+    return getattr(_running, 'task', None)
+
+
+def run_task(instance):
+    start = time.monotonic()
+    _running.task = instance
+    try:
+        func = import_string(instance.name)
+        func(*instance.args, **instance.kwargs)
+    except Exception:
+        logger.exception('Task %s (%s) failed.', instance.id, instance.name)
+        instance.error = traceback.format_exc()
+        if instance.attempts >= instance.max_attempts:
+            instance.status = Task.FAILED
+        else:
+            instance.status = Task.QUEUED
+            delay = settings.TASKS_RETRY_DELAY * 2 ** (instance.attempts - 1)
+            instance.run_after = timezone.now() + timedelta(seconds=delay)
+    else:
+        instance.status = Task.DONE
+        instance.error = ''
+    finally:
+        _running.task = None
+
+    instance.finished_at = timezone.now()
+    instance.duration = time.monotonic() - start
+    instance.save(update_fields=[
+        'status', 'error', 'run_after', 'finished_at', 'duration', 'attempts', 'started_at'
+    ])
+    return instance
+
+
+def task_metrics(since):
+    '''Per task name counts and run times of the tasks finished since `since`.'''
+    finished = Task.objects.filter(finished_at__gte=since).values('name').annotate(
+        done=Count('id', filter=Q(status=Task.DONE)),
+        failed=Count('id', filter=Q(status=Task.FAILED)),
+        retried=Count('id', filter=Q(status=Task.QUEUED)),
+        avg_seconds=Avg('duration'),
+        max_seconds=Max('duration'),
+    )
+    queued = dict(
+        Task.objects.filter(status=Task.QUEUED).values('name').annotate(
+            count=Count('id')
+        ).values_list('name', 'count')
+    )
+
+    metrics = {name: {'queued': count} for name, count in queued.items()}
+    for row in finished:
+        metrics.setdefault(row.pop('name'), {'queued': 0}).update(row)
+    return metrics
+
+
+def purge_finished_tasks(older_than):
+    return Task.objects.filter(
+        status__in=[Task.DONE, Task.FAILED], finished_at__lt=older_than
+    ).delete()[0]
@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from model_mommy import mommy
+from rest_framework.test import APITestCase
+
+from src.tasks.models import Task
+from src.tasks.queue import (claim_tasks, enqueue_task, purge_finished_tasks, run_task,
+                             task, task_metrics)
+
+calls = []
+
+@task
+def record(value):
+    calls.append(value)
+
+@task(priority=5, max_attempts=2)
+def flaky():
+    raise ValueError('boom')
+
+
+@override_settings(TASKS_RETRY_DELAY=10, TASKS_MAX_ATTEMPTS=3, TASKS_TIMEOUT=60)
+class TaskQueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_stores_call(self):
+        instance = record.enqueue('a')
+
+        assert 'src.tasks.tests.test_queue.record' == instance.name
+        assert ['a'] == instance.args
+        assert Task.QUEUED == instance.status
+        assert 3 == instance.max_attempts
+        assert [] == calls
+
+    def test_claims_by_priority_and_runs(self):
+        record.enqueue('a')
+        flaky.enqueue()
+
+        tasks = claim_tasks()
+        assert ['src.tasks.tests.test_queue.flaky', 'src.tasks.tests.test_queue.record'] == [
+            instance.name for instance in tasks
+        ]
+        assert [] == claim_tasks()
+
+        run_task(tasks[1])
+        done = Task.objects.get(id=tasks[1].id)
+        assert Task.DONE == done.status
+        assert 1 == done.attempts
+        assert done.duration is not None
+        assert ['a'] == calls
+
+    def test_failed_task_is_retried_with_backoff(self):
+        instance = flaky.enqueue()
+
+        run_task(claim_tasks()[0])
+        instance.refresh_from_db()
+        assert Task.QUEUED == instance.status
+        assert instance.run_after > timezone.now() + timedelta(seconds=5)
+        assert 'boom' in instance.error
+
+        Task.objects.filter(id=instance.id).update(run_after=timezone.now())
+        run_task(claim_tasks()[0])
+        instance.refresh_from_db()
+        assert Task.FAILED == instance.status
+        assert 2 == instance.attempts
+
+    def test_future_tasks_are_not_claimed(self):
+        enqueue_task(record, ['a'], run_after=timezone.now() + timedelta(minutes=1))
+        assert [] == claim_tasks()
+
+    def test_stale_running_tasks_are_claimed_again(self):
+        instance = record.enqueue('a')
+        Task.objects.filter(id=instance.id).update(
+            status=Task.RUNNING, started_at=timezone.now() - timedelta(minutes=5)
+        )
+        assert [instance] == claim_tasks()
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode_runs_immediately(self):
+        instance = record.enqueue('a')
+
+        assert ['a'] == calls
+        assert Task.DONE == Task.objects.get(id=instance.id).status
+
+    def test_metrics_and_purge(self):
+        record.enqueue('a')
+        run_task(claim_tasks()[0])
+        flaky.enqueue()
+
+        metrics = task_metrics(timezone.now() - timedelta(minutes=1))
+        assert 1 == metrics['src.tasks.tests.test_queue.record']['done']
+        assert 1 == metrics['src.tasks.tests.test_queue.flaky']['queued']
+
+        assert 1 == purge_finished_tasks(timezone.now() + timedelta(seconds=1))
+        assert 1 == Task.objects.count()
+
+
+class TaskMetricsViewTestCase(APITestCase):
+    def test_admin_required(self):
+        self.client.force_authenticate(mommy.make(settings.AUTH_USER_MODEL, is_staff=False))
+        response = self.client.get(reverse('task_metrics'))
+        assert 403 == response.status_code
+
+    def test_returns_metrics(self):
+        self.client.force_authenticate(mommy.make(settings.AUTH_USER_MODEL, is_staff=True))
+        record.enqueue('a')
+        response = self.client.get(reverse('task_metrics'), {'minutes': 5})
+        assert 200 == response.status_code
+        assert {'queued': 1} == response.json()['src.tasks.tests.test_queue.record']
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from src.tasks.queue import task_metrics
+
+
+class TaskMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        try:
+            minutes = int(request.query_params.get('minutes', 60))
+        except ValueError:
+            minutes = 60
+        since = timezone.now() - timedelta(minutes=minutes)
+        return Response(task_metrics(since))
+
+
+task_metrics_view = TaskMetricsView.as_view()
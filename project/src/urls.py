@@ -2,6 +2,9 @@ from django.contrib import admin
 from django.apps import apps
 from django.urls import path, include
 from rest_framework_social_oauth2 import urls as rest_framework_social_oauth2_urls
+from src.notifications.views import push_metrics_view
+from src.tasks.views import task_metrics_view
+from src.utils.views import http_metrics_view
 
 auth_name = apps.get_app_config('core_auth').verbose_name
 connect_name = apps.get_app_config('connect').verbose_name
@@ -21,4 +24,7 @@ urlpatterns = [
     path('pictures/', include(('src.pictures.urls', pictures_name), namespace='pictures')),
     path('invites/', include(('src.invite.urls', invite_name), namespace='invite')),
     path('competition/', include(('src.competition.urls', competition_name), namespace='competition')),
+    path('metrics/http/', http_metrics_view, name='http_metrics'),
+    path('metrics/tasks/', task_metrics_view, name='task_metrics'),
+    path('metrics/push/', push_metrics_view, name='push_metrics'),
 ]
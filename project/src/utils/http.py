@@ -0,0 +1,114 @@
+import threading, time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class HostMetrics(object):
+    '''Per-host request counts and latencies, kept in memory per process.'''
+    def __init__(self):
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def record(self, host, seconds, failed=False):
+        with self._lock:
+            metrics = self._hosts.setdefault(
+                host, {'requests': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+            )
+            metrics['requests'] += 1
+            metrics['errors'] += int(failed)
+            metrics['total_seconds'] += seconds
+            metrics['max_seconds'] = max(metrics['max_seconds'], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                host: dict(
+                    metrics, avg_seconds=metrics['total_seconds'] / metrics['requests']
+                )
+                for host, metrics in self._hosts.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+metrics = HostMetrics()
+
+
+class PooledSession(requests.Session):
+    '''
+    Session shared by all outbound API calls, so connections to each host
+    are pooled and kept alive. Idempotent requests are retried with backoff
+    on connection errors and 502/503/504, every request gets a default
+    timeout, and each one is timed into `metrics`.
+    '''
+    def __init__(self, timeout, retries, backoff, pool_size):
+        super(PooledSession, self).__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries, backoff_factor=backoff,
+                status_forcelist=(502, 503, 504), raise_on_status=False
+            )
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlparse(url).hostname
+        start = time.monotonic()
+        try:
+            response = super(PooledSession, self).request(method, url, **kwargs)
+        except requests.RequestException:
+            metrics.record(host, time.monotonic() - start, failed=True)
+            raise
+        metrics.record(host, time.monotonic() - start, failed=response.status_code >= 500)
+        return response
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PooledSession(
+                    settings.HTTP_TIMEOUT, settings.HTTP_RETRIES,
+                    settings.HTTP_BACKOFF, settings.HTTP_POOL_SIZE
+                )
+    return _session
+
+
+def reset_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+@receiver(setting_changed, dispatch_uid='reset_http_session')
+def reset_session_on_setting_changed(setting, **kwargs):
+    if setting.startswith('HTTP_'):
+        reset_session()
+
+
+def request(method, url, **kwargs):
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
@@ -0,0 +1,149 @@
+import base64, binascii, json
+from collections import OrderedDict
+
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    '''
+    Opt-in keyset (seek) pagination. Subclasses declare `keyset`, the fields
+    the queryset is ordered by (prefix with "-" for descending), ending with a
+    unique field. The cursor carries the keyset values of the last row of the
+    page, so every page is a single indexed range scan instead of an OFFSET.
+
+    Nullable keys are sorted last in both directions. Requests without a
+    cursor or page size keep the unpaginated list response.
+    '''
+    keyset = ()
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def is_requested(self, request):
+        return (
+            self.cursor_query_param in request.query_params or
+            self.page_size_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.get_ordering())
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position))
+
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_position = self.get_position(page[-1]) if self.has_next else None
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self):
+        ordering = []
+        for key in self.keyset:
+            field, descending = self._parse_key(key)
+            expression = F(field)
+            if descending:
+                ordering.append(expression.desc(nulls_last=True))
+            else:
+                ordering.append(expression.asc(nulls_last=True))
+        return ordering
+
+    def get_seek_filter(self, position):
+        '''
+        Builds "row comes after position" for the keyset, i.e.
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... with NULLs sorted last.
+        '''
+        seek = Q(pk__in=[])
+        equal = Q()
+        for key, value in zip(self.keyset, position):
+            field, descending = self._parse_key(key)
+            if value is None:
+                equal &= Q(**{f'{field}__isnull': True})
+                continue
+
+            lookup = 'lt' if descending else 'gt'
+            after = Q(**{f'{field}__{lookup}': value}) | Q(**{f'{field}__isnull': True})
+            seek |= equal & after
+            equal &= Q(**{field: value})
+        return seek
+
+    def get_position(self, obj):
+        return [
+            self.encode_value(field, getattr(obj, field))
+            for field, _ in map(self._parse_key, self.keyset)
+        ]
+
+    def encode_value(self, field, value):
+        return value
+
+    def decode_value(self, field, value):
+        return value
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        return self.parse_cursor(encoded)
+
+    def parse_cursor(self, encoded):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.keyset):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            return [
+                None if value is None else self.decode_value(field, value)
+                for (field, _), value in zip(map(self._parse_key, self.keyset), values)
+            ]
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        data = json.dumps(position).encode('ascii')
+        return base64.urlsafe_b64encode(data).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    @staticmethod
+    def _parse_key(key):
+        if key.startswith('-'):
+            return key[1:], True
+        return key, False
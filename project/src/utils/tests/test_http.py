@@ -0,0 +1,49 @@
+import pytest, requests, responses
+
+from django.test import SimpleTestCase, override_settings
+
+from src.utils import http
+
+
+@override_settings(HTTP_TIMEOUT=2, HTTP_RETRIES=2, HTTP_BACKOFF=0, HTTP_POOL_SIZE=4)
+class PooledSessionTestCase(SimpleTestCase):
+    def setUp(self):
+        http.reset_session()
+        http.metrics.clear()
+
+    def test_session_is_shared(self):
+        assert http.get_session() is http.get_session()
+        assert 2 == http.get_session().timeout
+
+    def test_setting_change_resets_session(self):
+        session = http.get_session()
+        with self.settings(HTTP_TIMEOUT=5):
+            assert session is not http.get_session()
+            assert 5 == http.get_session().timeout
+
+    @responses.activate
+    def test_records_per_host_metrics(self):
+        responses.add(responses.GET, 'https://api.example.com/a', json={})
+        responses.add(responses.GET, 'https://other.example.com/b', status=500)
+
+        http.get('https://api.example.com/a')
+        http.get('https://api.example.com/a')
+        http.get('https://other.example.com/b')
+
+        metrics = http.metrics.snapshot()
+        assert 2 == metrics['api.example.com']['requests']
+        assert 0 == metrics['api.example.com']['errors']
+        assert 1 == metrics['other.example.com']['errors']
+        assert 'avg_seconds' in metrics['api.example.com']
+
+    @responses.activate
+    def test_connection_errors_are_recorded_and_raised(self):
+        responses.add(
+            responses.GET, 'https://api.example.com/a',
+            body=requests.ConnectionError('refused')
+        )
+
+        with pytest.raises(requests.ConnectionError):
+            http.get('https://api.example.com/a')
+
+        assert 1 == http.metrics.snapshot()['api.example.com']['errors']
@@ -0,0 +1,15 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from src.utils import http
+
+
+class HttpMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(http.metrics.snapshot())
+
+
+http_metrics_view = HttpMetricsView.as_view()